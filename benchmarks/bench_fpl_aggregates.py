@@ -0,0 +1,169 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_merged_gw, serve_merged_gw
+from src.data_prep.fpl_pl_table_players import (
+    finalise_fpl_data,
+    read_fpl_aggregates,
+    read_fpl_aggregates_incremental,
+)
+
+
+def legacy_process_fpl_data(df):
+    """
+    The groupby implementation of the FPL tables, kept as a baseline.
+
+    It works on the whole season in memory. Covers seasons whose data already
+    has a 'position' column. Like the original, it adds columns to the input
+    frame.
+    """
+    df["gk_points"] = df["total_points"].where(df["position"] == "GK", 0)
+    df["def_points"] = df["total_points"].where(df["position"] == "DEF", 0)
+    df["mid_points"] = df["total_points"].where(df["position"] == "MID", 0)
+    df["fwd_points"] = df["total_points"].where(df["position"] == "FWD", 0)
+
+    summary_df = (
+        df.groupby("team")
+        .agg(
+            total_points=("total_points", "sum"),
+            gk_points=("gk_points", "sum"),
+            def_points=("def_points", "sum"),
+            mid_points=("mid_points", "sum"),
+            fwd_points=("fwd_points", "sum"),
+            goals_scored=("goals_scored", "sum"),
+            assists=("assists", "sum"),
+            clean_sheets=("clean_sheets", "sum"),
+            yellow_cards=("yellow_cards", "sum"),
+            red_cards=("red_cards", "sum"),
+            goals_conceded=("goals_conceded", "sum"),
+            own_goals=("own_goals", "sum"),
+            penalties_missed=("penalties_missed", "sum"),
+            penalties_saved=("penalties_saved", "sum"),
+            saves=("saves", "sum"),
+            bonus_points=("bonus", "sum"),
+        )
+        .reset_index()
+    )
+
+    max_gw = df["GW"].max()
+    df_max_gw = df[df["GW"] == max_gw]
+    value_max_gw_sum = df_max_gw.groupby("team")["value"].sum().reset_index()
+    summary_df = summary_df.merge(value_max_gw_sum, on="team", how="left")
+    summary_df.rename(columns={"value": "value_latest_gw"}, inplace=True)
+    summary_df = summary_df.sort_values(by="total_points", ascending=False).reset_index(
+        drop=True
+    )
+
+    player_df = (
+        df.groupby("name")
+        .agg(
+            total_points=("total_points", "sum"),
+            goals_scored=("goals_scored", "sum"),
+            assists=("assists", "sum"),
+            clean_sheets=("clean_sheets", "sum"),
+            yellow_cards=("yellow_cards", "sum"),
+            red_cards=("red_cards", "sum"),
+            goals_conceded=("goals_conceded", "sum"),
+            own_goals=("own_goals", "sum"),
+            penalties_missed=("penalties_missed", "sum"),
+            penalties_saved=("penalties_saved", "sum"),
+            saves=("saves", "sum"),
+            bonus_points=("bonus", "sum"),
+        )
+        .reset_index()
+    )
+    player_df = player_df.sort_values(by="total_points", ascending=False).reset_index(
+        drop=True
+    )
+    player_df = player_df.merge(
+        df_max_gw[["name", "position", "team"]], on="name", how="left"
+    )
+    return summary_df, player_df
+
+
+def measure(function, repeats):
+    """
+    Measure the best wall time and the peak traced memory of a function.
+
+    Parameters
+    ----------
+    function : callable
+        The function to measure, called without arguments.
+    repeats : int
+        The number of timed runs.
+
+    Returns
+    -------
+    result : dict
+        The best wall time in seconds ('seconds') and the peak memory allocated
+        during one run in bytes ('peak_bytes').
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": min(times), "peak_bytes": peak_bytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the chunked FPL aggregation the refresh runs with "
+        "the groupby baseline, both reading the season's CSV."
+    )
+    parser.add_argument(
+        "--scale", type=int, default=10, help="Season size multiplier (default 10)."
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "merged_gw.csv")
+        df = generate_merged_gw(n_players=700 * args.scale)
+        df.to_csv(path, index=False)
+        print(f"Synthetic season: {len(df):,} rows ({args.scale}x players)")
+        del df
+
+        session = serve_merged_gw(path, "2024-25")
+        aggregates_dir = os.path.join(tmp_dir, "aggregates")
+        read_fpl_aggregates_incremental("2024-25", aggregates_dir, session=session)
+
+        results = {
+            "groupby baseline": measure(
+                lambda: legacy_process_fpl_data(pd.read_csv(path)), args.repeats
+            ),
+            "chunked": measure(
+                lambda: finalise_fpl_data(
+                    read_fpl_aggregates("2024-25", session=session)
+                ),
+                args.repeats,
+            ),
+            "incremental": measure(
+                lambda: finalise_fpl_data(
+                    read_fpl_aggregates_incremental(
+                        "2024-25", aggregates_dir, session=session
+                    )
+                ),
+                args.repeats,
+            ),
+        }
+    for name, result in results.items():
+        print(
+            f"{name:<18} {result['seconds'] * 1000:8.1f} ms"
+            f" {result['peak_bytes'] / 1024 ** 2:8.1f} MiB peak"
+        )
+
+
+if __name__ == "__main__":
+    main()
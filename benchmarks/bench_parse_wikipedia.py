@@ -0,0 +1,103 @@
+import argparse
+import time
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from src.data_prep.actual_pl_table import parse_table_from_html
+
+FIXTURES_DIR = Path("tests/unit/data_prep/fixtures/wikipedia")
+
+
+def legacy_parse_table_from_html(html_content):
+    """
+    The BeautifulSoup implementation of parse_table_from_html, kept as a
+    baseline. pd.read_html needs lxml (or html5lib) installed.
+    """
+    soup = BeautifulSoup(html_content, "html.parser")
+    tables = soup.find_all("table", {"class": "wikitable"})
+
+    for table in tables:
+        df = pd.read_html(StringIO(str(table)))[0]
+        if set(["Pos", "Pts"]).issubset(df.columns):
+            if "Teamvte" in df.columns:
+                df.rename(columns={"Teamvte": "Team"}, inplace=True)
+
+            df = df[["Pos", "Team", "Pts"]]
+            df["Team"] = df["Team"].str.replace(" (C)", "", case=False)
+            df["Team"] = df["Team"].str.replace(" (R)", "", case=False)
+            df = df.replace(r"\[.*?\]", "", regex=True).map(
+                lambda x: x.strip() if isinstance(x, str) else x
+            )
+            return df
+
+    raise ValueError("No table with the columns Pos, Team, and Pts was found.")
+
+
+def pad_page(html_content, page_bytes):
+    """
+    Pad a fixture page with article prose, before and after the tables, up to
+    about the size of a real season page.
+    """
+    head, body = html_content.split('<div class="mw-parser-output">', 1)
+    paragraph = (
+        "<p>The season saw <a href='/wiki/Premier_League'>clubs</a> compete for"
+        " the title over 38 matches.<sup class='reference'><a>[1]</a></sup></p>\n"
+    )
+    repeats = max(page_bytes - len(html_content), 0) // len(paragraph) // 2
+    filler = paragraph * repeats
+    return f'{head}<div class="mw-parser-output">{filler}{body}'.replace(
+        "</div></div></body>", f"{filler}</div></div></body>"
+    )
+
+
+def measure(function, pages, repeats):
+    """
+    Return the best wall time in seconds of parsing every page once.
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for page in pages:
+            function(page)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare parse_table_from_html with the BeautifulSoup baseline."
+    )
+    parser.add_argument(
+        "--page-kb",
+        type=int,
+        default=600,
+        help="Size the fixture pages are padded to (default 600 KiB).",
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = [
+        pad_page(path.read_text(encoding="utf-8"), args.page_kb * 1024)
+        for path in sorted(FIXTURES_DIR.glob("*_Premier_League.html"))
+    ]
+    print(f"{len(pages)} season pages of ~{args.page_kb} KiB")
+
+    for page in pages:
+        expected = legacy_parse_table_from_html(page).astype({"Pts": "int64"})
+        pd.testing.assert_frame_equal(parse_table_from_html(page), expected)
+
+    results = {
+        "BeautifulSoup baseline": measure(
+            legacy_parse_table_from_html, pages, args.repeats
+        ),
+        "parse_table_from_html": measure(parse_table_from_html, pages, args.repeats),
+    }
+    for name, seconds in results.items():
+        print(f"{name:<22} {seconds * 1000 / len(pages):8.1f} ms per page")
+
+
+if __name__ == "__main__":
+    main()
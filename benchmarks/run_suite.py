@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import warnings
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import (
+    generate_data_dir,
+    generate_merged_gw,
+    serve_merged_gw,
+)
+from src.dashboard.data_loader import build_team_index, load_season_tables
+from src.dashboard.season_store import SeasonStore
+from src.data_prep.actual_pl_table import parse_table_from_html
+from src.data_prep.fpl_pl_table_players import (
+    finalise_fpl_data,
+    read_fpl_aggregates,
+    read_fpl_aggregates_incremental,
+)
+from src.data_prep.join_table_data import join_all_seasons, join_table_data
+
+FIXTURES_DIR = Path(__file__).parents[1] / "tests/unit/data_prep/fixtures/wikipedia"
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+@contextmanager
+def working_directory(path):
+    """
+    Run the enclosed code with `path` as the working directory.
+
+    The join stage reads and writes data/ relative to the working directory.
+    """
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def time_stage(function, repeats, setup=None):
+    """
+    Time a stage and measure its peak traced memory.
+
+    Parameters
+    ----------
+    function : callable
+        The stage, called with the result of `setup`, or without arguments.
+    repeats : int
+        The number of timed runs.
+    setup : callable, optional
+        Called before each run, outside the measurement, to build the input.
+
+    Returns
+    -------
+    result : dict
+        The best and median wall time in seconds ('seconds_min',
+        'seconds_median'), the peak memory allocated during one run in bytes
+        ('peak_bytes') and the number of timed runs ('repeats').
+    """
+
+    def run():
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        function(*args)
+        return time.perf_counter() - start
+
+    times = [run() for _ in range(repeats)]
+
+    args = () if setup is None else (setup(),)
+    tracemalloc.start()
+    function(*args)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds_min": min(times),
+        "seconds_median": statistics.median(times),
+        "peak_bytes": peak_bytes,
+        "repeats": repeats,
+    }
+
+
+def run_suite(n_players=700, n_gameweeks=38, n_seasons=9, repeats=5, seed=0):
+    """
+    Run every benchmark stage on synthetic data of the given scale.
+
+    Parameters
+    ----------
+    n_players : int, optional
+        The number of players per season (default is 700).
+    n_gameweeks : int, optional
+        The number of gameweeks per season (default is 38).
+    n_seasons : int, optional
+        The number of seasons (default is 9).
+    repeats : int, optional
+        The number of timed runs of each stage (default is 5).
+    seed : int, optional
+        The random seed of the generated data (default is 0).
+
+    Returns
+    -------
+    results : dict
+        The measurements of each stage, keyed by stage name.
+    """
+    results = {}
+
+    # The FPL tables are built as in the refresh, streaming the season's
+    # merged_gw.csv in chunks
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        merged_gw_path = os.path.join(tmp_dir, "merged_gw.csv")
+        generate_merged_gw(
+            n_players=n_players, n_gameweeks=n_gameweeks, seed=seed
+        ).to_csv(merged_gw_path, index=False)
+        session = serve_merged_gw(merged_gw_path, "2024-25")
+
+        results["read_fpl_aggregates"] = time_stage(
+            lambda: finalise_fpl_data(read_fpl_aggregates("2024-25", session=session)),
+            repeats,
+        )
+
+        # The saved aggregates hold every gameweek but the latest, which each
+        # refresh folds in again
+        aggregates_dir = os.path.join(tmp_dir, "aggregates")
+        read_fpl_aggregates_incremental("2024-25", aggregates_dir, session=session)
+        results["read_fpl_aggregates_incremental"] = time_stage(
+            lambda: finalise_fpl_data(
+                read_fpl_aggregates_incremental(
+                    "2024-25", aggregates_dir, session=session
+                )
+            ),
+            repeats,
+        )
+
+    pages = [
+        path.read_bytes() for path in sorted(FIXTURES_DIR.glob("*_Premier_League.html"))
+    ]
+    results["parse_table_from_html"] = time_stage(
+        lambda: [parse_table_from_html(page) for page in pages], repeats
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir, working_directory(tmp_dir):
+        seasons, team_name_mapping = generate_data_dir(
+            "data",
+            n_seasons=n_seasons,
+            n_players=n_players,
+            n_gameweeks=n_gameweeks,
+            seed=seed,
+        )
+        latest_season = seasons[-1]
+
+        results["join_table_data"] = time_stage(
+            lambda: join_table_data(latest_season, team_name_mapping), repeats
+        )
+        results["join_all_seasons"] = time_stage(
+            lambda: join_all_seasons(team_name_mapping, force=True), repeats
+        )
+        results["join_all_seasons_up_to_date"] = time_stage(
+            lambda: join_all_seasons(team_name_mapping), repeats
+        )
+        results["load_season_tables"] = time_stage(
+            lambda: load_season_tables(latest_season), repeats
+        )
+        player_stats = load_season_tables(latest_season)[1]
+        results["build_team_index"] = time_stage(
+            lambda: build_team_index(player_stats), repeats
+        )
+        results["season_store_load"] = time_stage(SeasonStore.load, repeats)
+        store = SeasonStore.load()
+        results["season_store_top_players"] = time_stage(
+            lambda: store.top_players("Total Points", first_season=seasons[1]),
+            repeats,
+        )
+        results["season_store_player_career"] = time_stage(
+            lambda: store.player_career(store.player_names[0]), repeats
+        )
+
+    return results
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    """
+    Print the results of a run, with the ratio to a baseline run if given.
+    """
+    for stage, result in results.items():
+        line = (
+            f"{stage:<32} {result['seconds_min'] * 1000:9.2f} ms"
+            f" {result['peak_bytes'] / 1024 ** 2:8.2f} MiB peak"
+        )
+        if baseline and stage in baseline:
+            ratio = result["seconds_min"] / baseline[stage]["seconds_min"]
+            line += f" {ratio:6.2f}x baseline"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time each pipeline stage on synthetic data and save the results."
+    )
+    parser.add_argument("--players", type=int, default=700)
+    parser.add_argument("--gameweeks", type=int, default=38)
+    parser.add_argument("--seasons", type=int, default=9)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output",
+        help="JSON file to write the results to (default is a timestamped file in "
+        "benchmarks/results/).",
+    )
+    parser.add_argument(
+        "--compare", help="JSON file of an earlier run to compare the results to."
+    )
+    args = parser.parse_args()
+
+    # The join stage assigns to a slice of the merged table on every run
+    warnings.simplefilter("ignore", pd.errors.SettingWithCopyWarning)
+
+    parameters = {
+        "players": args.players,
+        "gameweeks": args.gameweeks,
+        "seasons": args.seasons,
+        "repeats": args.repeats,
+        "seed": args.seed,
+    }
+    results = run_suite(
+        n_players=args.players,
+        n_gameweeks=args.gameweeks,
+        n_seasons=args.seasons,
+        repeats=args.repeats,
+        seed=args.seed,
+    )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as file:
+            previous = json.load(file)
+        if previous["parameters"] != parameters:
+            print("Warning: the baseline run used different parameters.")
+        baseline = previous["results"]
+    print_results(results, baseline)
+
+    created = datetime.now(timezone.utc)
+    output = args.output or RESULTS_DIR / f"{created:%Y%m%d-%H%M%S}.json"
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(
+            {
+                "created": created.isoformat(),
+                "git_commit": get_git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "parameters": parameters,
+                "results": results,
+            },
+            file,
+            indent=2,
+        )
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
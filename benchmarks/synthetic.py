@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+
+POSITION_WEIGHTS = {"GK": 0.1, "DEF": 0.35, "MID": 0.4, "FWD": 0.15}
+
+
+def generate_merged_gw(n_players=700, n_gameweeks=38, n_teams=20, seed=0):
+    """
+    Generate synthetic data shaped like vaastav's merged_gw.csv.
+
+    Each player has one row per gameweek. Player names are unique and every
+    player stays at one team and position for the whole season.
+
+    Parameters
+    ----------
+    n_players : int, optional
+        The number of players (default is 700, about one season).
+    n_gameweeks : int, optional
+        The number of gameweeks (default is 38).
+    n_teams : int, optional
+        The number of teams (default is 20).
+    seed : int, optional
+        The random seed (default is 0).
+
+    Returns
+    -------
+    df : pd.DataFrame
+        A DataFrame with one row per player per gameweek, with the columns of
+        merged_gw.csv.
+    """
+    rng = np.random.default_rng(seed)
+    teams = [f"Team {i:02d}" for i in range(n_teams)]
+
+    player_positions = rng.choice(
+        list(POSITION_WEIGHTS), size=n_players, p=list(POSITION_WEIGHTS.values())
+    )
+    player_teams = rng.integers(0, n_teams, n_players)
+    player_values = rng.integers(40, 140, n_players)
+
+    n_rows = n_players * n_gameweeks
+    player_index = np.tile(np.arange(n_players), n_gameweeks)
+    positions = player_positions[player_index]
+    is_gk = positions == "GK"
+    is_def = positions == "DEF"
+    is_attacker = (positions == "MID") | (positions == "FWD")
+
+    minutes = rng.choice([0, 0, 15, 60, 90, 90, 90], size=n_rows)
+    played = minutes > 0
+    goals_scored = rng.poisson(0.15, n_rows) * is_attacker * played
+    assists = rng.poisson(0.1, n_rows) * played
+    clean_sheets = (rng.random(n_rows) < 0.3) * (minutes >= 60)
+    goals_conceded = rng.poisson(1.3, n_rows) * played
+    saves = rng.poisson(3, n_rows) * is_gk * played
+    bonus = rng.choice([0, 0, 0, 0, 0, 0, 1, 2, 3], size=n_rows) * played
+    yellow_cards = (rng.random(n_rows) < 0.08) * played
+    red_cards = (rng.random(n_rows) < 0.005) * played
+    own_goals = (rng.random(n_rows) < 0.003) * played
+    penalties_missed = (rng.random(n_rows) < 0.002) * played
+    penalties_saved = (rng.random(n_rows) < 0.01) * is_gk * played
+    total_points = (
+        played.astype(int)
+        + (minutes >= 60)
+        + goals_scored * 5
+        + assists * 3
+        + clean_sheets * (4 * (is_gk | is_def))
+        + bonus
+        - yellow_cards
+        - red_cards * 3
+    )
+
+    gameweeks = np.repeat(np.arange(1, n_gameweeks + 1), n_players)
+    return pd.DataFrame(
+        {
+            "name": np.array([f"Player {i}" for i in range(n_players)])[player_index],
+            "position": positions,
+            "team": np.array(teams)[player_teams[player_index]],
+            "xP": np.round(rng.random(n_rows) * 6, 1),
+            "assists": assists,
+            "bonus": bonus,
+            "bps": rng.integers(0, 40, n_rows) * played,
+            "clean_sheets": clean_sheets.astype(int),
+            "creativity": np.round(rng.random(n_rows) * 50, 1),
+            "element": player_index + 1,
+            "fixture": (gameweeks - 1) * (n_teams // 2)
+            + player_teams[player_index] // 2
+            + 1,
+            "goals_conceded": goals_conceded,
+            "goals_scored": goals_scored,
+            "ict_index": np.round(rng.random(n_rows) * 15, 1),
+            "influence": np.round(rng.random(n_rows) * 60, 1),
+            "kickoff_time": "2024-08-16T19:00:00Z",
+            "minutes": minutes,
+            "opponent_team": rng.integers(1, n_teams + 1, n_rows),
+            "own_goals": own_goals.astype(int),
+            "penalties_missed": penalties_missed.astype(int),
+            "penalties_saved": penalties_saved.astype(int),
+            "red_cards": red_cards.astype(int),
+            "round": gameweeks,
+            "saves": saves,
+            "selected": rng.integers(0, 5_000_000, n_rows),
+            "team_a_score": rng.integers(0, 4, n_rows),
+            "team_h_score": rng.integers(0, 4, n_rows),
+            "threat": np.round(rng.random(n_rows) * 60, 1),
+            "total_points": total_points,
+            "transfers_balance": rng.integers(-50_000, 50_000, n_rows),
+            "transfers_in": rng.integers(0, 50_000, n_rows),
+            "transfers_out": rng.integers(0, 50_000, n_rows),
+            "value": player_values[player_index],
+            "was_home": rng.random(n_rows) < 0.5,
+            "yellow_cards": yellow_cards.astype(int),
+            "GW": gameweeks,
+        }
+    )
+
+
+def serve_merged_gw(path, season):
+    """
+    Serve a local file as a season's merged_gw.csv to the pipeline's readers.
+
+    The readers look the season's file up in the session before fetching it,
+    so they run on synthetic data without network access.
+
+    Parameters
+    ----------
+    path : str
+        The path of the merged gameweek CSV.
+    season : str
+        The season string in the format "YYYY-YY".
+
+    Returns
+    -------
+    session : ArtifactSession
+        A session to pass to the readers.
+    """
+    # Imported here so the generators above do not depend on the pipeline
+    from src.data_prep.fpl_pl_table_players import get_merged_gw_source
+    from src.tools.artifact_session import ArtifactSession
+
+    session = ArtifactSession()
+    session.get_or_create(("file", get_merged_gw_source(season)[0]), lambda: path)
+    return session
+
+
+def generate_actual_table(teams, seed=0):
+    """
+    Generate a synthetic final Premier League table for the given teams.
+
+    Parameters
+    ----------
+    teams : list of str
+        The team names.
+    seed : int, optional
+        The random seed (default is 0).
+
+    Returns
+    -------
+    df : pd.DataFrame
+        A DataFrame with the columns 'Pos', 'Team' and 'Pts', sorted by position.
+    """
+    rng = np.random.default_rng(seed)
+    points = np.sort(rng.integers(15, 100, len(teams)))[::-1]
+    return pd.DataFrame(
+        {
+            "Pos": np.arange(1, len(teams) + 1),
+            "Team": rng.permutation(teams),
+            "Pts": points,
+        }
+    )
+
+
+def generate_data_dir(
+    data_dir, n_seasons=9, n_players=700, n_gameweeks=38, n_teams=20, seed=0
+):
+    """
+    Write a synthetic data directory with the tables of several seasons.
+
+    For each season, the FPL team and player tables are computed from
+    generated merged_gw.csv data with process_fpl_data, and a final Premier
+    League table is generated. Actual team names differ from the FPL names, so
+    the returned mapping is needed to join them.
+
+    Parameters
+    ----------
+    data_dir : str
+        The directory to write the tables to, laid out like data/.
+    n_seasons : int, optional
+        The number of seasons, ending with 2024-25 (default is 9).
+    n_players : int, optional
+        The number of players per season (default is 700).
+    n_gameweeks : int, optional
+        The number of gameweeks per season (default is 38).
+    n_teams : int, optional
+        The number of teams (default is 20).
+    seed : int, optional
+        The random seed (default is 0).
+
+    Returns
+    -------
+    seasons : list of str
+        The season strings written, oldest first.
+    team_name_mapping : dict
+        A dictionary mapping FPL team names to actual team names.
+    """
+    # Imported here so the generators above do not depend on the pipeline
+    from src.data_prep.fpl_pl_table_players import process_fpl_data
+    from src.data_prep.storage import save_table
+    from src.tools.season_string import get_season_string
+
+    seasons = []
+    team_name_mapping = {}
+    for i, season_start in enumerate(range(2025 - n_seasons, 2025)):
+        season = get_season_string(season_start)
+        merged_gw = generate_merged_gw(
+            n_players=n_players,
+            n_gameweeks=n_gameweeks,
+            n_teams=n_teams,
+            seed=seed + i,
+        )
+        summary_df, player_df = process_fpl_data(merged_gw, season)
+        save_table(summary_df, "fpl_premier_league_tables", season, data_dir=data_dir)
+        save_table(
+            player_df, "fpl_premier_league_player_data", season, data_dir=data_dir
+        )
+
+        teams = sorted(merged_gw["team"].unique())
+        team_name_mapping.update({team: f"{team} FC" for team in teams})
+        actual_df = generate_actual_table(
+            [team_name_mapping[team] for team in teams], seed=seed + i
+        )
+        save_table(actual_df, "actual_premier_league_tables", season, data_dir=data_dir)
+        seasons.append(season)
+
+    return seasons, team_name_mapping
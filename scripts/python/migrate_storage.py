@@ -0,0 +1,23 @@
+import argparse
+from src.dashboard.data_loader import ALL_TEAMS
+from src.data_prep.schema import TABLE_SCHEMAS
+from src.data_prep.storage import list_seasons, load_table, save_table
+
+# Convert every table saved as CSV under data/ to Parquet
+parser = argparse.ArgumentParser(description="Convert data/ tables to Parquet.")
+parser.add_argument(
+    "--keep-csv",
+    action="store_true",
+    help="Keep a CSV copy of each table alongside the Parquet file.",
+)
+args = parser.parse_args()
+
+for table in TABLE_SCHEMAS:
+    for season in list_seasons(table):
+        df = load_table(table, season)
+        # Player files written before players were stored once per season also
+        # hold a copy of every player with the team "All Teams"
+        if table == "fpl_premier_league_player_data":
+            df = df[df["Team"] != ALL_TEAMS].reset_index(drop=True)
+        save_table(df, table, season, export_csv=args.keep_csv)
+        print(f"Converted {table}/{season}")
@@ -1,40 +1,131 @@
-from src.data_prep.reload_data import (
-    get_current_season_start_year,
-    get_current_gameweek,
-    check_and_update_metadata,
-    get_current_season_fpl,
-    get_current_season_actual,
-    get_completed_seasons_fpl,
-    get_completed_seasons_actual,
-)
+import argparse
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from src.data_prep.refresh_pipeline import STAGES, build_refresh_tasks
+from src.data_prep.reload_data import get_current_season_start_year
+from src.tools.artifact_session import ArtifactSession
+from src.tools.http_cache import hold_cached_files
+from src.tools.profiling import Profiler
+from src.tools.task_graph import FAILED, run_task_graph
 from src.tools.yaml_loader import load_yaml_file
-from src.tools.season_string import get_season_string
-from src.data_prep.join_table_data import join_all_seasons
 
-# Get Team name mapping
-team_name_mapping_path = "conf/team_name_mapping.yaml"
-team_name_mapping = load_yaml_file(team_name_mapping_path)
 
-season_start = get_current_season_start_year()
-season_string = get_season_string(season_start)
+def main():
+    current_season_start = get_current_season_start_year()
 
-current_gameweek = get_current_gameweek(season_string)
+    parser = argparse.ArgumentParser(
+        description="Refresh the FPL and league tables. Tasks whose outputs are up "
+        "to date are skipped, so by default only a newly scored gameweek of the "
+        "current season is processed."
+    )
+    parser.add_argument(
+        "--first-season",
+        type=int,
+        default=current_season_start,
+        metavar="YEAR",
+        help="Start year of the first season to refresh (default: current season).",
+    )
+    parser.add_argument(
+        "--last-season",
+        type=int,
+        default=current_season_start,
+        metavar="YEAR",
+        help="Start year of the last season to refresh (default: current season).",
+    )
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=STAGES,
+        default=STAGES,
+        help="Stages to run (default: all). Dependencies on other stages are "
+        "treated as satisfied.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=4,
+        help="Maximum number of tasks run at once (default: 4).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show which tasks would run without running them.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run every task, and rebuild every joined table, even if up to date.",
+    )
+    parser.add_argument(
+        "--report",
+        default=".cache/refresh_report.json",
+        help="Where to write the timing report of the run (default: "
+        ".cache/refresh_report.json, outside the tracked data directory, so a "
+        "run with nothing to refresh changes no tracked file).",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record the peak traced memory of each stage (slows the run down).",
+    )
+    parser.add_argument(
+        "--profile-stage",
+        action="append",
+        default=[],
+        metavar="TASK",
+        help="Dump a cProfile of the named task to .cache/profiles/ (repeatable).",
+    )
+    args = parser.parse_args()
 
-check_and_update_metadata(current_gameweek)
+    # Get Team name mapping
+    team_name_mapping_path = "conf/team_name_mapping.yaml"
+    team_name_mapping = load_yaml_file(team_name_mapping_path)
 
-# Get completed seasons fpl
-# get_completed_seasons_fpl(first_season_start=2016, latest_season_start=2023)
+    # Share downloads between tasks, so merged_gw.csv is only fetched once
+    session = ArtifactSession()
 
-# Get current season fpl
-# Only run if new player data run
-get_current_season_fpl(season_start=season_start)
+    # Completed seasons are aggregated in worker processes. They are spawned, not
+    # forked, as the task graph's threads may hold locks when a worker starts.
+    executor = ProcessPoolExecutor(
+        max_workers=args.jobs, mp_context=multiprocessing.get_context("spawn")
+    )
 
-# Get completed seasons actual
-# get_completed_seasons_actual(first_season_start=2016, latest_season_start=2023)
+    tasks = build_refresh_tasks(
+        first_season_start=args.first_season,
+        latest_season_start=args.last_season,
+        current_season_start=current_season_start,
+        team_name_mapping=team_name_mapping,
+        stages=args.stages,
+        session=session,
+        force=args.force,
+        executor=executor,
+    )
 
-# Get current season actual
-# Only run if new player data run
-get_current_season_actual(season_start=season_start)
+    if args.dry_run:
+        statuses, _ = run_task_graph(tasks, force=args.force, dry_run=True)
+        for task in tasks:
+            deps = f" (after {', '.join(task.deps)})" if task.deps else ""
+            print(f"{statuses[task.name]:<12} {task.name}{deps}")
+        return 0
 
-# Join league table data
-join_all_seasons(team_name_mapping=team_name_mapping)
+    # Time each task and network call
+    profiler = Profiler(
+        trace_memory=args.trace_memory, profile_stages=args.profile_stage
+    )
+    # The session hands cached file paths to later tasks, so nothing fetched in
+    # the run is evicted before it ends
+    with executor, profiler.activate(), hold_cached_files():
+        statuses, errors = run_task_graph(tasks, jobs=args.jobs, force=args.force)
+    profiler.save_report(args.report)
+    print(profiler.format_report())
+
+    for name, status in statuses.items():
+        error = f": {errors[name]}" if name in errors else ""
+        print(f"{status:<12} {name}{error}")
+
+    return 1 if FAILED in statuses.values() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
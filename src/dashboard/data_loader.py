@@ -0,0 +1,230 @@
+import os
+
+import numpy as np
+import pandas as pd
+from src.data_prep.fpl_history import HISTORY_TABLE, TeamHistory
+from src.data_prep.storage import DATA_DIR, find_table_file, load_table
+
+DASHBOARD_TABLES = [
+    "fpl_premier_league_tables_joined",
+    "fpl_premier_league_player_data",
+    HISTORY_TABLE,
+]
+LOGO_PATH = "assets/pwt.png"
+# The logo, base64 encoded ahead of time so the app does not encode it
+ENCODED_LOGO_PATH = "assets/pwt.b64"
+ALL_TEAMS = "All Teams"
+
+
+def get_file_fingerprint(path):
+    """
+    Get a fingerprint of a file that changes whenever the file is rewritten.
+
+    Only the file's metadata is read, not its content.
+
+    Parameters
+    ----------
+    path : str
+        The file path.
+
+    Returns
+    -------
+    fingerprint : tuple or None
+        The modification time in nanoseconds and the size of the file, or None
+        if the file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_season_tables(season, data_dir=DATA_DIR):
+    """
+    Load the league table and player statistics shown for a season.
+
+    Parameters
+    ----------
+    season : str
+        The season string in the format "YYYY-YY".
+    data_dir : str, optional
+        The data directory (default is 'data').
+
+    Returns
+    -------
+    league_table : pd.DataFrame
+        The joined FPL and Premier League table.
+    player_stats : pd.DataFrame
+        The player statistics, one row per player.
+    """
+    league_table = load_table(
+        "fpl_premier_league_tables_joined", season, data_dir=data_dir
+    )
+    player_stats = load_table(
+        "fpl_premier_league_player_data", season, data_dir=data_dir
+    )
+
+    # Files written before players were stored once per season also hold a
+    # copy of every player with the team "All Teams"
+    player_stats = player_stats[player_stats["Team"] != ALL_TEAMS].reset_index(
+        drop=True
+    )
+
+    # Files written before players were keyed by element ID hold the raw
+    # names, some with the ID appended. Newer files hold display names.
+    if "element" not in player_stats.columns:
+        player_stats["Player Name"] = player_stats["Player Name"].str.replace(
+            r"\s\d+$", "", regex=True
+        )
+    return league_table, player_stats
+
+
+def load_team_history(season, data_dir=DATA_DIR):
+    """
+    Load the gameweek-by-gameweek FPL table history of a season.
+
+    Parameters
+    ----------
+    season : str
+        The season string in the format "YYYY-YY".
+    data_dir : str, optional
+        The data directory (default is 'data').
+
+    Returns
+    -------
+    history : TeamHistory or None
+        The history, or None if the refresh has not saved one for the season.
+    """
+    if find_table_file(HISTORY_TABLE, season, data_dir) is None:
+        return None
+    return TeamHistory.load(season, data_dir=data_dir)
+
+
+def rank_history_chart_spec(n_teams):
+    """
+    Build the Vega-Lite spec of a chart of each team's position over time.
+
+    Parameters
+    ----------
+    n_teams : int
+        The number of teams, i.e. the lowest position.
+
+    Returns
+    -------
+    spec : dict
+        The chart spec, for data with 'GW', 'team' and 'Pos' columns. Position
+        1 is at the top of the chart.
+    """
+    return {
+        "mark": {"type": "line", "point": True},
+        "encoding": {
+            "x": {"field": "GW", "type": "quantitative", "title": "Gameweek"},
+            "y": {
+                "field": "Pos",
+                "type": "quantitative",
+                "title": "FPL table position",
+                "scale": {"reverse": True, "domain": [1, n_teams]},
+            },
+            "color": {"field": "team", "type": "nominal", "title": "Team"},
+            "tooltip": [
+                {"field": "team", "title": "Team"},
+                {"field": "GW", "title": "Gameweek"},
+                {"field": "Pos", "title": "Position"},
+                {"field": "total_points", "title": "Points"},
+            ],
+        },
+    }
+
+
+def build_team_index(player_stats):
+    """
+    Group the player statistics by team for fast per-team lookups.
+
+    The rows are stably sorted by team, so each team's players form one
+    contiguous block, still in their original order.
+
+    Parameters
+    ----------
+    player_stats : pd.DataFrame
+        The player statistics, with a 'Team' column.
+
+    Returns
+    -------
+    sorted_stats : pd.DataFrame
+        The player statistics sorted by team.
+    team_index : dict
+        A dictionary mapping each team, in alphabetical order, to the slice of
+        `sorted_stats` holding its rows. Rows without a team are excluded.
+    """
+    codes, teams = pd.factorize(player_stats["Team"], sort=True)
+    order = np.argsort(codes, kind="stable")
+    sorted_stats = player_stats.iloc[order].reset_index(drop=True)
+
+    # Rows without a team have code -1 and sort before every team
+    bounds = np.searchsorted(codes[order], np.arange(len(teams) + 1))
+    team_index = {
+        team: slice(int(bounds[i]), int(bounds[i + 1])) for i, team in enumerate(teams)
+    }
+    return sorted_stats, team_index
+
+
+def format_rank_difference(difference):
+    """
+    Format rank differences for display, e.g. 2 as '⬆️ +2' and -1 as '⬇️ -1'.
+
+    Parameters
+    ----------
+    difference : pd.Series
+        The differences between the actual and FPL positions.
+
+    Returns
+    -------
+    labels : pd.Series
+        The display strings, blank for no difference.
+    """
+    magnitude = difference.abs().astype(str)
+    labels = np.select(
+        [difference > 0, difference < 0],
+        ["⬆️ +" + magnitude, "⬇️ -" + magnitude],
+        " ",
+    )
+    return pd.Series(labels, index=difference.index, name=difference.name)
+
+
+def format_league_table(league_table):
+    """
+    Format a joined league table for display.
+
+    Parameters
+    ----------
+    league_table : pd.DataFrame
+        The joined FPL and Premier League table, with a numeric 'Difference'.
+
+    Returns
+    -------
+    display_table : pd.DataFrame
+        A copy of the table with the differences formatted as arrows.
+    """
+    return league_table.assign(
+        Difference=format_rank_difference(league_table["Difference"])
+    )
+
+
+def load_logo_data_uri(file_path=ENCODED_LOGO_PATH):
+    """
+    Load the pre-encoded PNG logo as a data URI, for embedding in HTML.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        The path to the base64 encoded logo (default is 'assets/pwt.b64'),
+        i.e. the base64 encoding of the PNG at LOGO_PATH.
+
+    Returns
+    -------
+    data_uri : str
+        The logo as a 'data:image/png;base64,...' URI.
+    """
+    with open(file_path, "r") as file:
+        return f"data:image/png;base64,{file.read().strip()}"
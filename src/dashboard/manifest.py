@@ -0,0 +1,158 @@
+import json
+import os
+
+from src.dashboard.data_loader import DASHBOARD_TABLES
+from src.data_prep.storage import (
+    DATA_DIR,
+    SCORING_META_PATH,
+    find_table_file,
+    list_seasons,
+)
+
+MANIFEST_PATH = os.path.join(DATA_DIR, "dashboard_manifest.json")
+
+
+def build_dashboard_manifest(data_dir=DATA_DIR, scoring_meta_path=SCORING_META_PATH):
+    """
+    Build the manifest of everything the dashboard needs to start.
+
+    Parameters
+    ----------
+    data_dir : str, optional
+        The data directory (default is 'data').
+    scoring_meta_path : str, optional
+        The path to the scoring metadata (default is 'data/scoring_meta.json').
+
+    Returns
+    -------
+    manifest : dict
+        'seasons', every season with a joined table, most recent first,
+        'scoring_data_gameweek', the latest scored gameweek or None, and
+        'files', the content hash of each season's dashboard tables, keyed by
+        season and table. Tables a season does not have are None.
+    """
+    # Hashing is only needed when the manifest is built, not when it is read
+    from src.data_prep.join_table_data import hash_file
+
+    # No season has been joined before the first refresh
+    seasons = []
+    if os.path.isdir(os.path.join(data_dir, "fpl_premier_league_tables_joined")):
+        seasons = sorted(
+            list_seasons("fpl_premier_league_tables_joined", data_dir), reverse=True
+        )
+    files = {}
+    for season in seasons:
+        files[season] = {}
+        for table in DASHBOARD_TABLES:
+            path = find_table_file(table, season, data_dir)
+            files[season][table] = hash_file(path) if path is not None else None
+
+    try:
+        with open(scoring_meta_path, "r") as file:
+            scoring_data_gameweek = json.load(file).get("scoring_data_gameweek")
+    except (FileNotFoundError, json.JSONDecodeError):
+        scoring_data_gameweek = None
+
+    return {
+        "seasons": seasons,
+        "scoring_data_gameweek": scoring_data_gameweek,
+        "files": files,
+    }
+
+
+def save_dashboard_manifest(manifest, file_path=MANIFEST_PATH):
+    """
+    Save the dashboard manifest.
+
+    The file is replaced, not rewritten in place, so the dashboard never reads
+    a partly written manifest.
+
+    Parameters
+    ----------
+    manifest : dict
+        The manifest, see build_dashboard_manifest.
+    file_path : str, optional
+        The path to the manifest (default is 'data/dashboard_manifest.json').
+
+    Returns
+    -------
+    None
+    """
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(tmp_path, file_path)
+
+
+def dashboard_manifest_is_up_to_date(
+    file_path=MANIFEST_PATH, data_dir=DATA_DIR, scoring_meta_path=SCORING_META_PATH
+):
+    """
+    Check whether the saved dashboard manifest matches the data on disk.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        The path to the manifest (default is 'data/dashboard_manifest.json').
+    data_dir : str, optional
+        The data directory (default is 'data').
+    scoring_meta_path : str, optional
+        The path to the scoring metadata (default is 'data/scoring_meta.json').
+
+    Returns
+    -------
+    up_to_date : bool
+        Whether the manifest is saved and unchanged by a rebuild.
+    """
+    try:
+        with open(file_path, "r") as file:
+            saved = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    return saved == build_dashboard_manifest(data_dir, scoring_meta_path)
+
+
+def load_dashboard_manifest(file_path=MANIFEST_PATH, data_dir=DATA_DIR):
+    """
+    Load the dashboard manifest saved by the refresh job.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        The path to the manifest (default is 'data/dashboard_manifest.json').
+    data_dir : str, optional
+        The data directory the manifest is built from if it has not been saved
+        (default is 'data').
+
+    Returns
+    -------
+    manifest : dict
+        The manifest, see build_dashboard_manifest.
+    """
+    try:
+        with open(file_path, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return build_dashboard_manifest(data_dir)
+
+
+def get_manifest_snapshot(manifest, season):
+    """
+    Get a snapshot key for the dashboard data of a season from the manifest.
+
+    No file is touched, so the key is free to compute on every rerun.
+
+    Parameters
+    ----------
+    manifest : dict
+        The manifest, see build_dashboard_manifest.
+    season : str
+        The season string in the format "YYYY-YY".
+
+    Returns
+    -------
+    snapshot : tuple
+        The content hashes of the season's dashboard tables.
+    """
+    files = manifest["files"].get(season, {})
+    return tuple(files.get(table) for table in DASHBOARD_TABLES)
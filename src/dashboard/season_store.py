@@ -0,0 +1,426 @@
+import numpy as np
+import pandas as pd
+from src.dashboard.data_loader import load_season_tables
+from src.data_prep.schema import COUNT_DISPLAY_COLUMNS
+from src.data_prep.storage import DATA_DIR, list_seasons
+
+# The summed columns of the player and team tables
+PLAYER_METRICS = ["Total Points", *COUNT_DISPLAY_COLUMNS]
+TEAM_METRICS = [
+    "Points",
+    "GK Points",
+    "DEF Points",
+    "MID Points",
+    "FWD Points",
+    *COUNT_DISPLAY_COLUMNS,
+]
+
+
+def _build_index(codes, n_groups):
+    """
+    Group row positions by code, for per-group lookups without a scan.
+
+    Returns the row positions stably sorted by code, so each group's rows are
+    one contiguous block in their original order, and the start of each
+    group's block, with the end of the last group appended.
+    """
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(n_groups + 1))
+    return order, bounds
+
+
+def _career_keys(players):
+    """
+    Key each player row on the player's career, and label each career.
+
+    Rows with an FPL code are keyed on it, as codes are kept across seasons.
+    Files written before codes were saved only hold names, so their rows are
+    keyed on the name, or on the name and team if several players in a season
+    share the name. They are linked to the career of the one player with a
+    code and the same key, if there is one. Careers that share a name are
+    labelled with their latest team, and numbered if that is not enough.
+
+    Returns the career code of each row and the label of each career, sorted.
+    """
+    names = players["Player Name"].astype(object)
+    teams = players["Team"].astype(object).fillna("")
+    codes = (
+        players["code"]
+        if "code" in players.columns
+        else pd.Series(pd.NA, index=players.index)
+    )
+    has_code = codes.notna().to_numpy()
+    codes = "code:" + codes.astype("Int64").astype(str)
+
+    # Names held by several players in a season are told apart by team in
+    # every season
+    shared_names = names[
+        players.duplicated(["season", "Player Name"], keep=False).to_numpy() & ~has_code
+    ]
+    name_keys = "name:" + names
+    name_team_keys = name_keys + "\x1f" + teams
+    legacy_keys = name_keys.where(~names.isin(shared_names), name_team_keys)
+
+    # The codes of the keys held by a single player with a code
+    coded = pd.DataFrame(
+        {
+            "key": pd.concat([name_keys[has_code], name_team_keys[has_code]]),
+            "code": pd.concat([codes[has_code], codes[has_code]]),
+        }
+    )
+    key_codes = coded.groupby("key")["code"].agg(["nunique", "first"])
+    key_codes = key_codes.loc[key_codes["nunique"] == 1, "first"]
+
+    keys = np.where(has_code, codes, legacy_keys.map(key_codes).fillna(legacy_keys))
+
+    # Label each career with the name and team of its latest row
+    career_codes, _ = pd.factorize(keys)
+    latest = pd.Series(np.arange(len(keys))).groupby(career_codes).last().to_numpy()
+    labels = pd.Series(names.to_numpy()[latest])
+    latest_teams = pd.Series(teams.to_numpy()[latest])
+    clash = labels.duplicated(keep=False) & (latest_teams != "")
+    labels[clash] = labels[clash] + " (" + latest_teams[clash] + ")"
+    clash = labels.duplicated(keep=False)
+    labels[clash] = (
+        labels[clash]
+        + " "
+        + (labels[clash].groupby(labels[clash]).cumcount() + 1).astype(str)
+    )
+    return pd.factorize(labels.iloc[career_codes], sort=True)
+
+
+class SeasonStore:
+    """
+    The player and team tables of every season, loaded once and indexed for
+    cross-season queries.
+
+    The rows of each table are held in season order, so any range of seasons
+    is one contiguous block of rows. Players, teams and positions are held as
+    integer codes, with an index of the rows of each player and team, so
+    queries are array reductions that do not touch disk.
+
+    Element IDs are only stable within a season, so a player's career is
+    keyed on their FPL code, see _career_keys. Players are looked up by the
+    label of their career in player_names, which is their display name unless
+    another player shares it.
+    """
+
+    def __init__(self, seasons, league_tables, player_tables):
+        """
+        Parameters
+        ----------
+        seasons : list of str
+            The season strings, oldest first.
+        league_tables : list of pd.DataFrame
+            The joined FPL and Premier League table of each season.
+        player_tables : list of pd.DataFrame
+            The player statistics of each season.
+        """
+        self.seasons = list(seasons)
+        self.teams = self._concat(league_tables)
+        self.players = self._concat(player_tables)
+
+        self._team_season_bounds = self._season_bounds(self.teams)
+        self._player_season_bounds = self._season_bounds(self.players)
+
+        self._team_codes, self.team_names = pd.factorize(self.teams["Team"], sort=True)
+        self._team_order, self._team_bounds = _build_index(
+            self._team_codes, len(self.team_names)
+        )
+        self._team_metrics = self._metric_array(self.teams, TEAM_METRICS)
+
+        self._player_codes, self.player_names = _career_keys(self.players)
+        self._player_order, self._player_bounds = _build_index(
+            self._player_codes, len(self.player_names)
+        )
+        self._player_team_codes = pd.Categorical(
+            self.players["Team"], categories=self.team_names
+        ).codes
+        self._player_position_codes, self.positions = pd.factorize(
+            self.players["Position"], sort=True
+        )
+        self._player_metrics = self._metric_array(self.players, PLAYER_METRICS)
+
+    def _concat(self, tables):
+        """
+        Concatenate the tables of every season, with a 'season' column first.
+        """
+        season_codes = np.repeat(
+            np.arange(len(self.seasons)), [len(table) for table in tables]
+        )
+        df = pd.concat(
+            [table.astype({"Team": object}) for table in tables], ignore_index=True
+        )
+        df.insert(
+            0,
+            "season",
+            pd.Categorical.from_codes(
+                season_codes, categories=self.seasons, ordered=True
+            ),
+        )
+        return df
+
+    @staticmethod
+    def _season_bounds(df):
+        codes = df["season"].cat.codes.to_numpy()
+        return np.searchsorted(codes, np.arange(len(df["season"].cat.categories) + 1))
+
+    @staticmethod
+    def _metric_array(df, metrics):
+        """
+        Stack the metric columns into one int64 array of shape (rows, metrics).
+        Columns missing from older files are zeros.
+        """
+        values = np.zeros((len(df), len(metrics)), dtype=np.int64)
+        for i, metric in enumerate(metrics):
+            if metric in df.columns:
+                values[:, i] = df[metric].fillna(0).to_numpy(dtype=np.int64)
+        return values
+
+    @classmethod
+    def load(cls, seasons=None, data_dir=DATA_DIR):
+        """
+        Load every season's player and team tables into one store.
+
+        Parameters
+        ----------
+        seasons : list of str, optional
+            The seasons to load. All seasons with a joined table are loaded by
+            default.
+        data_dir : str, optional
+            The data directory (default is 'data').
+
+        Returns
+        -------
+        store : SeasonStore
+            The store of the seasons.
+        """
+        if seasons is None:
+            seasons = list_seasons("fpl_premier_league_tables_joined", data_dir)
+        seasons = sorted(seasons)
+
+        league_tables = []
+        player_tables = []
+        for season in seasons:
+            league_table, player_stats = load_season_tables(season, data_dir=data_dir)
+            league_tables.append(league_table)
+            player_tables.append(player_stats)
+        return cls(seasons, league_tables, player_tables)
+
+    def _season_range(self, first_season, last_season):
+        """
+        Get the positions of the first and last season of a range.
+
+        Raises
+        ------
+        ValueError
+            If a season is not in the store, or the range is empty.
+        """
+        first = self.seasons.index(first_season) if first_season else 0
+        last = self.seasons.index(last_season) if last_season else len(self.seasons) - 1
+        if first > last:
+            raise ValueError(f"Season {first_season} is after season {last_season}.")
+        return first, last
+
+    def top_players(
+        self,
+        metric,
+        n=10,
+        first_season=None,
+        last_season=None,
+        team=None,
+        position=None,
+    ):
+        """
+        Get the players with the highest total of a metric over a range of
+        seasons.
+
+        Parameters
+        ----------
+        metric : str
+            The metric, one of PLAYER_METRICS.
+        n : int, optional
+            The number of players (default is 10).
+        first_season : str, optional
+            The first season of the range (default is the earliest season).
+        last_season : str, optional
+            The last season of the range (default is the latest season).
+        team : str, optional
+            Only count seasons the player ended at this team.
+        position : str, optional
+            Only count seasons the player played in this position.
+
+        Returns
+        -------
+        leaders : pd.DataFrame
+            Up to `n` rows in descending order of the total, with the label of
+            the player's career as 'Player Name', the total under the metric's
+            name and the number of 'Seasons' counted. Players tied on the
+            total are ordered by label.
+
+        Raises
+        ------
+        ValueError
+            If the metric or a season is not in the store.
+        KeyError
+            If the team or position is not in the store.
+        """
+        if metric not in PLAYER_METRICS:
+            raise ValueError(f"Unknown player metric: {metric}")
+        first, last = self._season_range(first_season, last_season)
+        rows = slice(
+            self._player_season_bounds[first], self._player_season_bounds[last + 1]
+        )
+        codes = self._player_codes[rows]
+        values = self._player_metrics[rows, PLAYER_METRICS.index(metric)]
+
+        keep = np.ones(len(codes), dtype=bool)
+        if team is not None:
+            keep &= self._player_team_codes[rows] == self.team_names.get_loc(team)
+        if position is not None:
+            keep &= self._player_position_codes[rows] == self.positions.get_loc(
+                position
+            )
+        codes = codes[keep]
+
+        n_players = len(self.player_names)
+        totals = np.bincount(codes, weights=values[keep], minlength=n_players)
+        seasons = np.bincount(codes, minlength=n_players)
+
+        # Only players with a counted season, highest total first, then by name
+        candidates = np.flatnonzero(seasons)
+        order = candidates[np.lexsort([candidates, -totals[candidates]])][:n]
+        return pd.DataFrame(
+            {
+                "Player Name": np.asarray(self.player_names, dtype=object)[order],
+                metric: totals[order].astype(np.int64),
+                "Seasons": seasons[order],
+            }
+        )
+
+    def player_career(self, player):
+        """
+        Get a player's statistics season by season.
+
+        Parameters
+        ----------
+        player : str
+            The player's label in player_names.
+
+        Returns
+        -------
+        career : pd.DataFrame
+            One row per season the player played, oldest first, with the
+            season, team, position and PLAYER_METRICS.
+
+        Raises
+        ------
+        KeyError
+            If no player has the label.
+        """
+        code = self.player_names.get_loc(player)
+        rows = self._player_order[
+            self._player_bounds[code] : self._player_bounds[code + 1]
+        ]
+        career = self.players.iloc[rows][["season", "Team", "Position"]]
+        career = career.reset_index(drop=True)
+        metrics = pd.DataFrame(self._player_metrics[rows], columns=PLAYER_METRICS)
+        return pd.concat([career, metrics], axis=1)
+
+    def career_totals(self, player):
+        """
+        Get a player's totals over every season.
+
+        Parameters
+        ----------
+        player : str
+            The player's label in player_names.
+
+        Returns
+        -------
+        totals : pd.Series
+            The sum of each of PLAYER_METRICS, and the number of 'Seasons'.
+
+        Raises
+        ------
+        KeyError
+            If no player has the label.
+        """
+        code = self.player_names.get_loc(player)
+        rows = self._player_order[
+            self._player_bounds[code] : self._player_bounds[code + 1]
+        ]
+        totals = pd.Series(self._player_metrics[rows].sum(axis=0), index=PLAYER_METRICS)
+        totals["Seasons"] = len(rows)
+        return totals
+
+    def team_trend(self, team):
+        """
+        Get a team's FPL and actual league positions and totals season by
+        season.
+
+        Parameters
+        ----------
+        team : str
+            The FPL team name.
+
+        Returns
+        -------
+        trend : pd.DataFrame
+            One row per season the team played, oldest first, with the
+            season, 'Pos', 'Actual Pos' and TEAM_METRICS.
+
+        Raises
+        ------
+        KeyError
+            If no team has the name.
+        """
+        code = self.team_names.get_loc(team)
+        rows = self._team_order[self._team_bounds[code] : self._team_bounds[code + 1]]
+        trend = self.teams.iloc[rows][["season", "Pos", "Actual Pos"]]
+        trend = trend.reset_index(drop=True)
+        metrics = pd.DataFrame(self._team_metrics[rows], columns=TEAM_METRICS)
+        return pd.concat([trend, metrics], axis=1)
+
+    def team_totals(self, metric, first_season=None, last_season=None):
+        """
+        Get every team's total of a metric in each season of a range.
+
+        Parameters
+        ----------
+        metric : str
+            The metric, one of TEAM_METRICS.
+        first_season : str, optional
+            The first season of the range (default is the earliest season).
+        last_season : str, optional
+            The last season of the range (default is the latest season).
+
+        Returns
+        -------
+        totals : pd.DataFrame
+            One row per season and one column per team, alphabetically. Seasons
+            a team was not in the league are missing values.
+
+        Raises
+        ------
+        ValueError
+            If the metric or a season is not in the store.
+        """
+        if metric not in TEAM_METRICS:
+            raise ValueError(f"Unknown team metric: {metric}")
+        first, last = self._season_range(first_season, last_season)
+        rows = slice(
+            self._team_season_bounds[first], self._team_season_bounds[last + 1]
+        )
+        season_codes = self.teams["season"].cat.codes.to_numpy()[rows]
+        team_codes = self._team_codes[rows]
+
+        totals = np.full((last - first + 1, len(self.team_names)), np.nan)
+        totals[season_codes - first, team_codes] = self._team_metrics[
+            rows, TEAM_METRICS.index(metric)
+        ]
+        return pd.DataFrame(
+            totals,
+            index=pd.Index(self.seasons[first : last + 1], name="season"),
+            columns=pd.Index(self.team_names, name="Team"),
+        )
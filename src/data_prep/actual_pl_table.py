@@ -1,10 +1,50 @@
+import re
+from html.parser import HTMLParser
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
+from src.data_prep.storage import save_table
+from src.tools.http_client import get_default_client
+from src.tools.profiling import span
 from src.tools.season_string import get_season_string
 
+WIKIPEDIA_URL = "https://en.wikipedia.org"
+LEAGUE_TABLE_SECTION = "League table"
+LEAGUE_TABLE_COLUMNS = ["Pos", "Team", "Pts"]
 
-def fetch_html_from_wikipedia(season):
+_TABLE_OR_SCRIPT = re.compile(
+    r"<(?P<script>script|style)\b.*?</(?P=script)\s*>|<table\b[^>]*>",
+    re.IGNORECASE | re.DOTALL,
+)
+_WIKITABLE_CLASS = re.compile(
+    r"\bclass\s*=\s*([\"'])[^\"']*\bwikitable\b", re.IGNORECASE
+)
+_TABLE_TAG = re.compile(r"<(/?)table\b[^>]*>", re.IGNORECASE)
+_ROW_END = re.compile(r"</tr\s*>", re.IGNORECASE)
+_TAG = re.compile(r"<[^>]*>")
+_FOOTNOTE = re.compile(r"\[.*?\]")
+_TEAM_MARKERS = re.compile(r"\[.*?\]|\s*\((?:C|R)\)", re.IGNORECASE)
+
+
+def get_season_page_url(season, base_url=WIKIPEDIA_URL):
+    """
+    Get the URL of a season's Wikipedia page.
+
+    Parameters
+    ----------
+    season : str
+        The season string in the format "YYYY-YY".
+    base_url : str, optional
+        The base URL of Wikipedia (default is 'https://en.wikipedia.org').
+
+    Returns
+    -------
+    url : str
+        The URL of the page.
+    """
+    return f"{base_url}/wiki/{season}_Premier_League"
+
+
+def fetch_html_from_wikipedia(season, base_url=WIKIPEDIA_URL):
     """
     Fetch HTML content from a Wikipedia page for the given season.
 
@@ -12,10 +52,12 @@ def fetch_html_from_wikipedia(season):
     ----------
     season : str
         The season string in the format "YYYY-YY".
+    base_url : str, optional
+        The base URL of Wikipedia (default is 'https://en.wikipedia.org').
 
     Returns
     -------
-    html_content : str
+    html_content : bytes
         The HTML content of the Wikipedia page.
 
     Raises
@@ -23,109 +65,371 @@ def fetch_html_from_wikipedia(season):
     requests.exceptions.RequestException
         If the HTTP request to fetch the page fails.
     """
-    url = f"https://en.wikipedia.org/wiki/{season}_Premier_League"
-    response = requests.get(url)
-    response.raise_for_status()  # Ensure we notice bad responses
+    url = get_season_page_url(season, base_url)
+    with span("http_fetch", url=url) as fetch_span:
+        response = get_default_client().get(url)
+        response.raise_for_status()  # Ensure we notice bad responses
+        fetch_span.add(bytes_downloaded=len(response.content))
     return response.content
 
 
-def parse_table_from_html(html_content):
+def query_wikipedia_api(params, base_url=WIKIPEDIA_URL):
     """
-    Parse tables from the given HTML content and return as DataFrames.
+    Query the MediaWiki action API of Wikipedia.
 
     Parameters
     ----------
-    html_content : str
-        The HTML content to parse.
+    params : dict
+        The query parameters, e.g. {"action": "parse", "page": ...}. JSON output
+        in format version 2 is always requested.
+    base_url : str, optional
+        The base URL of Wikipedia (default is 'https://en.wikipedia.org').
 
     Returns
     -------
-    df : pd.DataFrame
-        A DataFrame containing the Premier League table data.
+    data : dict
+        The decoded JSON response.
 
     Raises
     ------
+    requests.exceptions.RequestException
+        If the HTTP request fails.
     ValueError
-        If no table with the columns 'Pos', 'Team', and 'Pts' is found.
+        If the API returns an error, e.g. for a missing page.
     """
-    soup = BeautifulSoup(html_content, "html.parser")
-    tables = soup.find_all("table", {"class": "wikitable"})
+    url = f"{base_url}/w/api.php"
+    with span("http_fetch", url=url, **params) as fetch_span:
+        response = get_default_client().get(
+            url, params={**params, "format": "json", "formatversion": 2}
+        )
+        response.raise_for_status()
+        fetch_span.add(bytes_downloaded=len(response.content))
+    data = response.json()
+    if "error" in data:
+        error = data["error"]
+        raise ValueError(
+            f"Wikipedia API error {error.get('code')}: {error.get('info')}"
+        )
+    return data
 
-    for table in tables:
-        df = pd.read_html(str(table))[0]
-        if set(["Pos", "Pts"]).issubset(df.columns):
-            if "Teamvte" in df.columns:
-                df.rename(columns={"Teamvte": "Team"}, inplace=True)
 
-            df = df[["Pos", "Team", "Pts"]]
-            df["Team"] = df["Team"].str.replace(" (C)", "", case=False)
-            df["Team"] = df["Team"].str.replace(" (R)", "", case=False)
-            df = df.replace(r"\[.*?\]", "", regex=True).applymap(
-                lambda x: x.strip() if isinstance(x, str) else x
-            )
-            return df
+def find_section_index(sections, section_title):
+    """
+    Find the index of a section from the section list of a parsed page.
 
-    raise ValueError("No table with the columns Pos, Team, and Pts was found.")
+    Sections are matched on their heading text or anchor, ignoring case and
+    any markup in the heading.
 
+    Parameters
+    ----------
+    sections : list of dict
+        The 'sections' of an action=parse API response.
+    section_title : str
+        The heading of the section, e.g. "League table".
 
-def get_actual_premier_league_table(season):
+    Returns
+    -------
+    index : str or None
+        The section index to request with action=parse, or None if the page has
+        no such section.
     """
-    Get and process the Premier League table for the given season.
+    title = section_title.casefold()
+    anchor = section_title.replace(" ", "_").casefold()
+    for section in sections:
+        line = " ".join(_TAG.sub("", section.get("line", "")).split())
+        if line.casefold() == title or section.get("anchor", "").casefold() == anchor:
+            return section["index"]
+    return None
+
+
+def fetch_league_table_section_from_wikipedia(season, base_url=WIKIPEDIA_URL):
+    """
+    Fetch the rendered HTML of the league table section of a season's page.
+
+    Uses the MediaWiki parse API to look up the section index, then requests
+    only that section, which is a small fraction of the full article.
 
     Parameters
     ----------
     season : str
         The season string in the format "YYYY-YY".
+    base_url : str, optional
+        The base URL of Wikipedia (default is 'https://en.wikipedia.org').
+
+    Returns
+    -------
+    html_content : str
+        The HTML content of the section.
+
+    Raises
+    ------
+    requests.exceptions.RequestException
+        If an HTTP request fails.
+    ValueError
+        If the API returns an error or the page has no league table section.
+    """
+    page = f"{season}_Premier_League"
+    params = {"action": "parse", "page": page, "redirects": 1}
+
+    sections = query_wikipedia_api({**params, "prop": "sections"}, base_url)
+    index = find_section_index(sections["parse"]["sections"], LEAGUE_TABLE_SECTION)
+    if index is None:
+        raise ValueError(f"No {LEAGUE_TABLE_SECTION} section found on {page}.")
+
+    section = query_wikipedia_api(
+        {**params, "prop": "text", "section": index}, base_url
+    )
+    return section["parse"]["text"]
+
+
+def _find_league_table(html_content):
+    """
+    Find the league table in a single pass over the HTML.
+
+    Returns the markup of the first wikitable whose header row has the columns
+    'Pos' and 'Pts', or None. Script and style blocks are skipped.
+    """
+    for match in _TABLE_OR_SCRIPT.finditer(html_content):
+        if match.group("script") or not _WIKITABLE_CLASS.search(match.group(0)):
+            continue
+
+        # Find the end of the table, allowing for nested tables
+        depth = 0
+        for tag in _TABLE_TAG.finditer(html_content, match.start()):
+            depth += -1 if tag.group(1) else 1
+            if depth == 0:
+                break
+        else:
+            return None
+        table_html = html_content[match.start() : tag.end()]
+
+        header_end = _ROW_END.search(table_html)
+        header = table_html[: header_end.start()] if header_end else table_html
+        if {"Pos", "Pts"}.issubset(_TAG.sub(" ", header).split()):
+            return table_html
+
+    return None
+
+
+class _TableParser(HTMLParser):
+    """
+    Collect the cell text of one HTML table, row by row.
+
+    Each cell is stored as (text, rowspan, colspan). Navbar links, styles,
+    scripts and the content of nested tables are skipped.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.rows = []
+        self._cell = None
+        self._skip_tag = None
+        self._skip_depth = 0
+        self._in_table = False
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+
+        attrs = dict(attrs)
+        if tag == "table" and not self._in_table:
+            self._in_table = True
+            return
+        if (
+            tag in ("script", "style", "table")
+            or "navbar" in (attrs.get("class") or "").split()
+        ):
+            self._skip_tag, self._skip_depth = tag, 1
+            return
+
+        if tag == "tr":
+            self._end_cell()
+            self.rows.append([])
+        elif tag in ("td", "th") and self.rows:
+            self._end_cell()
+            self._cell = (
+                [],
+                _span(attrs.get("rowspan")),
+                _span(attrs.get("colspan")),
+            )
+        elif tag == "br" and self._cell is not None:
+            self._cell[0].append(" ")
+
+    def handle_endtag(self, tag):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+
+        if tag in ("td", "th", "tr", "table"):
+            self._end_cell()
+
+    def handle_data(self, data):
+        if self._cell is not None and self._skip_tag is None:
+            self._cell[0].append(data)
+
+    def _end_cell(self):
+        if self._cell is not None:
+            parts, rowspan, colspan = self._cell
+            self.rows[-1].append((" ".join("".join(parts).split()), rowspan, colspan))
+            self._cell = None
+
+
+def _span(value):
+    try:
+        return max(int(value), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _expand_spans(rows):
+    """
+    Lay out rows of (text, rowspan, colspan) cells on a grid, repeating cells
+    that span several rows or columns.
+    """
+    grid = []
+    spans = {}  # column -> [text, remaining rows]
+    for row in rows:
+        values = []
+        cells = iter(row)
+        cell = next(cells, None)
+        column = 0
+        while cell is not None or any(c >= column for c in spans):
+            if column in spans:
+                text, remaining = spans[column]
+                values.append(text)
+                if remaining == 1:
+                    del spans[column]
+                else:
+                    spans[column][1] -= 1
+                column += 1
+            elif cell is not None:
+                text, rowspan, colspan = cell
+                for _ in range(colspan):
+                    values.append(text)
+                    if rowspan > 1:
+                        spans[column] = [text, rowspan - 1]
+                    column += 1
+                cell = next(cells, None)
+            else:
+                values.append(None)
+                column += 1
+        grid.append(values)
+    return grid
+
+
+def parse_table_from_html(html_content):
+    """
+    Parse the Premier League table from a season's Wikipedia page or section.
+
+    The league table is located with a targeted scan for the first wikitable
+    with the columns 'Pos' and 'Pts', and only that table is parsed. Footnote
+    markers and the (C)/(R) champion and relegation markers are removed.
+
+    Parameters
+    ----------
+    html_content : str or bytes
+        The HTML content to parse. Bytes are decoded as UTF-8.
 
     Returns
     -------
     df : pd.DataFrame
-        A DataFrame containing the processed Premier League table data.
+        A DataFrame containing the Premier League table data, with the columns
+        'Pos', 'Team' and 'Pts'.
+
+    Raises
+    ------
+    ValueError
+        If no table with the columns 'Pos', 'Team', and 'Pts' is found.
     """
-    html_content = fetch_html_from_wikipedia(season)
-    return parse_table_from_html(html_content)
+    if isinstance(html_content, bytes):
+        html_content = html_content.decode("utf-8")
+
+    table_html = _find_league_table(html_content)
+    if table_html is None:
+        raise ValueError("No table with the columns Pos, Team, and Pts was found.")
+
+    parser = _TableParser()
+    parser.feed(table_html)
+    parser.close()
+    grid = _expand_spans(parser.rows)
+
+    header = [_FOOTNOTE.sub("", text).strip() for text in grid[0]]
+    if not set(LEAGUE_TABLE_COLUMNS).issubset(header):
+        raise ValueError("No table with the columns Pos, Team, and Pts was found.")
+    indices = [header.index(column) for column in LEAGUE_TABLE_COLUMNS]
+    df = pd.DataFrame(
+        [[row[i] if i < len(row) else None for i in indices] for row in grid[1:]],
+        columns=LEAGUE_TABLE_COLUMNS,
+    )
+
+    df["Team"] = df["Team"].str.replace(_TEAM_MARKERS, "", regex=True).str.strip()
+    for column in ["Pos", "Pts"]:
+        df[column] = pd.to_numeric(
+            df[column].str.replace(_FOOTNOTE, "", regex=True).str.strip()
+        )
+    return df
 
 
-def save_season_data(season_start, file_path):
+def get_actual_premier_league_table(season, base_url=WIKIPEDIA_URL):
     """
-    Fetch and save Premier League table data for a given season.
+    Get and process the Premier League table for the given season.
+
+    Only the league table section of the season's Wikipedia page is fetched.
+    If that fails, e.g. because the section is missing or has been renamed,
+    the full page is fetched instead. Which was parsed is recorded on the
+    span of the call, as 'source', with the section's error if it failed.
 
     Parameters
     ----------
-    season_start : int
-        The start year of the season.
-    file_path : str
-        The file path where the CSV should be saved.
+    season : str
+        The season string in the format "YYYY-YY".
+    base_url : str, optional
+        The base URL of Wikipedia (default is 'https://en.wikipedia.org').
 
     Returns
     -------
-    None
+    df : pd.DataFrame
+        A DataFrame containing the processed Premier League table data.
     """
-    season_string = get_season_string(season_start)
-    season_df = get_actual_premier_league_table(season=season_string)
-    season_df.to_csv(file_path, index=False)
+    with span("get_actual_premier_league_table", season=season) as table_span:
+        try:
+            html_content = fetch_league_table_section_from_wikipedia(season, base_url)
+            df = parse_table_from_html(html_content)
+            table_span.set(source="section")
+            return df
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            url = get_season_page_url(season, base_url)
+            print(
+                f"Failed to fetch the {LEAGUE_TABLE_SECTION} section for {season} "
+                f"({e!r}), parsing the full page {url} instead."
+            )
+            table_span.set(source="full_page", url=url, section_error=repr(e))
+
+        html_content = fetch_html_from_wikipedia(season, base_url)
+        return parse_table_from_html(html_content)
 
 
-def get_completed_seasons_actual(first_season_start, latest_season_start):
+def save_season_data(season_start):
     """
-    Fetch and save Premier League table data for a range of seasons.
+    Fetch and save Premier League table data for a given season.
 
     Parameters
     ----------
-    first_season_start : int
-        The start year of the first season in the range.
-    latest_season_start : int
-        The start year of the latest season in the range.
+    season_start : int
+        The start year of the season.
 
     Returns
     -------
     None
     """
-    for season_start in range(first_season_start, latest_season_start + 1):
-        save_season_data(
-            season_start,
-            f"data/actual_premier_league_tables/{get_season_string(season_start)}.csv",
-        )
+    season_string = get_season_string(season_start)
+    season_df = get_actual_premier_league_table(season=season_string)
+    save_table(season_df, "actual_premier_league_tables", season_string)
 
 
 def get_current_season_actual(season_start):
@@ -141,7 +445,4 @@ def get_current_season_actual(season_start):
     -------
     None
     """
-    save_season_data(
-        season_start,
-        f"data/actual_premier_league_tables/{get_season_string(season_start)}.csv",
-    )
+    save_season_data(season_start)
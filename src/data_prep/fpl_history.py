@@ -0,0 +1,239 @@
+import numpy as np
+import pandas as pd
+from src.data_prep.ranking import RANKING_METRICS, rank_table
+from src.data_prep.schema import COUNT_COLUMNS, apply_schema
+from src.data_prep.storage import DATA_DIR, load_table
+
+HISTORY_TABLE = "fpl_team_history"
+
+# The team table columns tracked gameweek by gameweek
+HISTORY_METRICS = [
+    "total_points",
+    "gk_points",
+    "def_points",
+    "mid_points",
+    "fwd_points",
+    *COUNT_COLUMNS,
+]
+
+
+def build_team_history(team_gw):
+    """
+    Build the cumulative team totals after each gameweek of a season.
+
+    Parameters
+    ----------
+    team_gw : pd.DataFrame
+        The team totals of each gameweek, one row per team and gameweek, with
+        'team', 'GW' and HISTORY_METRICS columns.
+
+    Returns
+    -------
+    history_df : pd.DataFrame
+        One row per team and gameweek, from gameweek 1 to the latest, with the
+        team's totals up to and including that gameweek. Gameweeks in which a
+        team did not play repeat the totals of the gameweek before.
+    """
+    team_codes, teams = pd.factorize(team_gw["team"], sort=True)
+    gameweeks = team_gw["GW"].to_numpy(dtype=np.int64)
+    n_gameweeks = int(gameweeks.max()) if len(gameweeks) else 0
+    values = team_gw[HISTORY_METRICS].to_numpy()
+
+    # Rows are unique per team and gameweek, so they can be assigned directly
+    totals = np.zeros((len(teams), n_gameweeks + 1, len(HISTORY_METRICS)), values.dtype)
+    valid = team_codes >= 0
+    totals[team_codes[valid], gameweeks[valid]] = values[valid]
+    cumulative = totals.cumsum(axis=1)[:, 1:]
+
+    history_df = pd.DataFrame(
+        cumulative.reshape(-1, len(HISTORY_METRICS)), columns=HISTORY_METRICS
+    )
+    history_df.insert(
+        0, "team", np.repeat(np.asarray(teams, dtype=object), n_gameweeks)
+    )
+    history_df.insert(1, "GW", np.tile(np.arange(1, n_gameweeks + 1), len(teams)))
+    return apply_schema(history_df, HISTORY_TABLE)
+
+
+class TeamHistory:
+    """
+    The FPL team table of a season after any gameweek, or over any range of
+    gameweeks.
+
+    The cumulative totals are held as a team x gameweek x metric array, with a
+    row of zeros for gameweek 0. The totals over gameweeks a to b are then the
+    difference of the slices for gameweeks b and a - 1, so any table costs one
+    subtraction per team instead of a pass over the player rows.
+    """
+
+    def __init__(self, teams, cumulative, metrics=HISTORY_METRICS):
+        """
+        Parameters
+        ----------
+        teams : array-like of str
+            The team names, in the order of the first axis of `cumulative`.
+        cumulative : np.ndarray
+            The cumulative totals, of shape (teams, gameweeks + 1, metrics),
+            with zeros for gameweek 0.
+        metrics : list of str, optional
+            The metric names, in the order of the last axis of `cumulative`
+            (default is HISTORY_METRICS).
+        """
+        self.teams = np.asarray(teams, dtype=object)
+        self.cumulative = cumulative
+        self.metrics = list(metrics)
+
+    @classmethod
+    def from_table(cls, history_df):
+        """
+        Build the history from a table written by build_team_history.
+
+        Parameters
+        ----------
+        history_df : pd.DataFrame
+            One row per team and gameweek, with the cumulative totals.
+
+        Returns
+        -------
+        history : TeamHistory
+            The history of the season.
+        """
+        team_codes, teams = pd.factorize(
+            history_df["team"].to_numpy(dtype=object), sort=True
+        )
+        gameweeks = history_df["GW"].to_numpy(dtype=np.int64)
+        n_gameweeks = int(gameweeks.max()) if len(gameweeks) else 0
+        metrics = [column for column in HISTORY_METRICS if column in history_df]
+
+        cumulative = np.zeros((len(teams), n_gameweeks + 1, len(metrics)), np.int64)
+        valid = team_codes >= 0
+        cumulative[team_codes[valid], gameweeks[valid]] = history_df[
+            metrics
+        ].to_numpy()[valid]
+        return cls(teams, cumulative, metrics)
+
+    @classmethod
+    def load(cls, season, data_dir=DATA_DIR):
+        """
+        Load the history of a season saved by the refresh.
+
+        Parameters
+        ----------
+        season : str
+            The season string in the format "YYYY-YY".
+        data_dir : str, optional
+            The data directory (default is 'data').
+
+        Returns
+        -------
+        history : TeamHistory
+            The history of the season.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the season has no saved history.
+        """
+        return cls.from_table(load_table(HISTORY_TABLE, season, data_dir=data_dir))
+
+    @property
+    def last_gameweek(self):
+        """
+        The latest gameweek in the history.
+        """
+        return self.cumulative.shape[1] - 1
+
+    def totals(self, first_gameweek=1, last_gameweek=None):
+        """
+        Get each team's totals over a range of gameweeks.
+
+        Parameters
+        ----------
+        first_gameweek : int, optional
+            The first gameweek of the range (default is 1).
+        last_gameweek : int, optional
+            The last gameweek of the range (default is the latest gameweek).
+
+        Returns
+        -------
+        totals : np.ndarray
+            The totals, of shape (teams, metrics).
+
+        Raises
+        ------
+        ValueError
+            If the range is empty or outside the history.
+        """
+        if last_gameweek is None:
+            last_gameweek = self.last_gameweek
+        if not 1 <= first_gameweek <= last_gameweek <= self.last_gameweek:
+            raise ValueError(
+                f"Gameweeks {first_gameweek} to {last_gameweek} are not within "
+                f"gameweeks 1 to {self.last_gameweek}."
+            )
+        return (
+            self.cumulative[:, last_gameweek] - self.cumulative[:, first_gameweek - 1]
+        )
+
+    def table(self, first_gameweek=1, last_gameweek=None, metrics=RANKING_METRICS):
+        """
+        Get the ranked FPL team table over a range of gameweeks.
+
+        Parameters
+        ----------
+        first_gameweek : int, optional
+            The first gameweek of the range (default is 1).
+        last_gameweek : int, optional
+            The last gameweek of the range (default is the latest gameweek), so
+            the default is the table as of the latest gameweek.
+        metrics : list of str, optional
+            The columns to rank on, most important first (default is the
+            ranking of the FPL table).
+
+        Returns
+        -------
+        table : pd.DataFrame
+            One row per team in ranked order, with 'Pos', 'team' and the
+            totals over the range.
+        """
+        table = pd.DataFrame(
+            self.totals(first_gameweek, last_gameweek), columns=self.metrics
+        )
+        table.insert(0, "team", self.teams)
+        table = rank_table(table, metrics, tiebreak=["team"])
+        return apply_schema(
+            table[["Pos", "team", *self.metrics]], "fpl_premier_league_tables"
+        )
+
+    def rank_history(self, metrics=RANKING_METRICS):
+        """
+        Get each team's position in the FPL table after every gameweek.
+
+        All gameweeks are ranked at once with a single lexsort.
+
+        Parameters
+        ----------
+        metrics : list of str, optional
+            The columns to rank on, most important first (default is the
+            ranking of the FPL table).
+
+        Returns
+        -------
+        ranks : pd.DataFrame
+            One row per gameweek and team, with 'GW', 'team', 'Pos' and the
+            ranked metrics, in gameweek and position order.
+        """
+        n_teams = len(self.teams)
+        columns = [self.metrics.index(metric) for metric in metrics]
+        history = pd.DataFrame(
+            self.cumulative[:, 1:, columns]
+            .transpose(1, 0, 2)
+            .reshape(-1, len(columns)),
+            columns=metrics,
+        )
+        history.insert(
+            0, "GW", np.repeat(np.arange(1, self.last_gameweek + 1), n_teams)
+        )
+        history.insert(1, "team", np.tile(self.teams, self.last_gameweek))
+        ranks = rank_table(history, metrics, tiebreak=["team"], group_by="GW")
+        return ranks[["GW", "team", "Pos", *metrics]]
@@ -1,18 +1,110 @@
+import json
+import os
 import pandas as pd
 import numpy as np
+from src.data_prep.fpl_history import HISTORY_METRICS, HISTORY_TABLE, build_team_history
+from src.data_prep.player_cube import (
+    aggregate_cube_cells,
+    combine_cube_cells,
+    write_player_cube,
+)
+from src.data_prep.player_dimension import (
+    aggregate_player_stints,
+    build_player_dimension,
+    combine_player_stints,
+)
+from src.data_prep.schema import MERGED_GW_DTYPES, apply_schema
+from src.data_prep.storage import save_table
+from src.tools.http_cache import fetch_url_to_file, fetch_urls_to_files
+from src.tools.profiling import memory_report, span
 from src.tools.season_string import get_season_string
 
+POSITIONS = ["GK", "DEF", "MID", "FWD"]
 
-def fetch_data_from_url(url, encoding="utf-8"):
+VAASTAV_DATA_URL = (
+    "https://raw.githubusercontent.com/vaastav/Fantasy-Premier-League/master/data"
+)
+
+MERGED_GW_CHUNKSIZE = 100_000
+
+# The latest gameweeks re-aggregated on every incremental refresh, so rows
+# added late to a gameweek that was already processed are still counted
+TRAILING_GAMEWEEKS = 1
+
+# The partial aggregates saved between incremental refreshes
+AGGREGATE_KEYS = [
+    "team",
+    "player",
+    "player_teams",
+    "team_gw",
+    "latest_gw",
+    "cube_cells",
+]
+
+# Summed statistics, keyed by output column with the merged_gw source column
+STAT_COLUMNS = {
+    "goals_scored": "goals_scored",
+    "assists": "assists",
+    "clean_sheets": "clean_sheets",
+    "yellow_cards": "yellow_cards",
+    "red_cards": "red_cards",
+    "goals_conceded": "goals_conceded",
+    "own_goals": "own_goals",
+    "penalties_missed": "penalties_missed",
+    "penalties_saved": "penalties_saved",
+    "saves": "saves",
+    "bonus_points": "bonus",
+}
+
+
+def fetch_file_from_url(url, immutable=False, session=None):
+    """
+    Fetch a file from a URL through the on-disk HTTP cache.
+
+    Parameters
+    ----------
+    url : str
+        The URL to fetch the file from.
+    immutable : bool, optional
+        Whether the file is known never to change, e.g. it belongs to a completed
+        season (default is False). Immutable files are served from the cache
+        without revalidation.
+    session : ArtifactSession, optional
+        A per-run session. If given, the file is only fetched once per run.
+
+    Returns
+    -------
+    path : str
+        The path of the cached file, which must not be modified.
+    """
+    if session is None:
+        return fetch_url_to_file(url, immutable=immutable)
+    return session.get_or_create(
+        ("file", url), lambda: fetch_url_to_file(url, immutable=immutable)
+    )
+
+
+def fetch_data_from_url(url, encoding="utf-8", immutable=False, session=None):
     """
     Fetch data from a URL and return a DataFrame.
 
+    The download goes through the on-disk HTTP cache, so unchanged files are not
+    downloaded again.
+
     Parameters
     ----------
     url : str
         The URL to fetch data from.
     encoding : str, optional
-        The encoding to use for reading the data (default is 'ISO-8859-1').
+        The encoding to use for reading the data (default is 'utf-8').
+    immutable : bool, optional
+        Whether the file is known never to change, e.g. it belongs to a completed
+        season (default is False). Immutable files are served from the cache
+        without revalidation.
+    session : ArtifactSession, optional
+        A per-run session. If given, the parsed DataFrame is shared with every
+        other caller in the run requesting the same URL, and must not be
+        modified.
 
     Returns
     -------
@@ -20,13 +112,64 @@ def fetch_data_from_url(url, encoding="utf-8"):
         The DataFrame containing the fetched data.
     """
 
-    df = pd.read_csv(url, encoding=encoding)
-    return df
+    def read_data():
+        path = fetch_file_from_url(url, immutable=immutable, session=session)
+        return pd.read_csv(path, encoding=encoding)
 
+    if session is None:
+        return read_data()
+    return session.get_or_create(("csv", url, encoding), read_data)
 
-def process_fpl_data(df, season_year):
+
+def get_player_positions(season_year, immutable=False, session=None):
     """
-    Process the FPL data by merging and calculating columns.
+    Get each player's team and position from the season's player and team lists.
+
+    Parameters
+    ----------
+    season_year : str
+        The season year in the format "YYYY-YY".
+    immutable : bool, optional
+        Whether the season is completed, so its source files never change
+        (default is False).
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between stages.
+
+    Returns
+    -------
+    positions : pd.DataFrame
+        One row per player, with the 'element' ID, 'team' name and 'position'.
+    """
+    df_players = fetch_data_from_url(
+        get_players_raw_url(season_year),
+        immutable=immutable,
+        session=session,
+    )
+    df_players = df_players[["id", "team", "element_type"]]
+
+    df_teams = fetch_data_from_url(
+        f"{VAASTAV_DATA_URL}/master_team_list.csv",
+        session=session,
+    )
+    df_teams = df_teams[df_teams["season"] == season_year]
+    df_players = df_players.merge(df_teams, on="team", how="left")
+
+    return pd.DataFrame(
+        {
+            "element": df_players["id"],
+            "team": df_players["team_name"],
+            "position": df_players["element_type"].map(
+                {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
+            ),
+        }
+    )
+
+
+def add_player_positions(
+    df, season_year, immutable=False, session=None, positions=None
+):
+    """
+    Add team and position columns to seasons whose raw data lacks them.
 
     Parameters
     ----------
@@ -34,63 +177,285 @@ def process_fpl_data(df, season_year):
         The DataFrame containing raw FPL data.
     season_year : str
         The season year in the format "YYYY-YY".
+    immutable : bool, optional
+        Whether the season is completed, so its source files never change
+        (default is False).
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between stages.
+    positions : pd.DataFrame, optional
+        The season's player positions from get_player_positions. By default
+        they are fetched, so callers adding positions to several chunks of a
+        season should get them once and pass them in.
 
     Returns
     -------
-    summary_df : pd.DataFrame
-        A DataFrame containing the processed and aggregated FPL data.
+    df : pd.DataFrame
+        The DataFrame with 'team' and 'position' columns.
     """
-    if "position" not in df.columns:
-        df_players = fetch_data_from_url(
-            f"https://raw.githubusercontent.com/vaastav/Fantasy-Premier-League/master/data/{season_year}/players_raw.csv"
-        )
-        df_players = df_players[["id", "team", "element_type"]]
-        df = df.merge(df_players, left_on="element", right_on="id", how="left")
+    if "position" in df.columns:
+        return df
 
-        df_teams = fetch_data_from_url(
-            "https://raw.githubusercontent.com/vaastav/Fantasy-Premier-League/master/data/master_team_list.csv"
+    if positions is None:
+        positions = get_player_positions(
+            season_year, immutable=immutable, session=session
         )
-        df_teams = df_teams[df_teams["season"] == season_year]
-        df = df.merge(df_teams, on="team", how="left")
+    df = df.merge(positions, on="element", how="left")
+    df["position"] = df["position"].fillna("Unknown")
+    return df
+
+
+def add_player_codes(player_df, season_year, immutable=False, session=None):
+    """
+    Add each player's FPL code from the season's player list.
+
+    Element IDs are reassigned every season, while a player keeps their code,
+    so the code links a player's seasons.
+
+    Parameters
+    ----------
+    player_df : pd.DataFrame
+        The FPL player data, with an 'element' column.
+    season_year : str
+        The season year in the format "YYYY-YY".
+    immutable : bool, optional
+        Whether the season is completed, so its source files never change
+        (default is False).
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between stages.
+
+    Returns
+    -------
+    player_df : pd.DataFrame
+        The player data with a 'code' column, missing for players not in the
+        player list.
+    """
+    df_players = fetch_data_from_url(
+        get_players_raw_url(season_year),
+        immutable=immutable,
+        session=session,
+    )
+    codes = df_players.set_index("id")["code"]
+    return apply_schema(
+        player_df.assign(code=player_df["element"].map(codes)),
+        "fpl_premier_league_player_data",
+    )
+
 
-        df.rename(columns={"team": "team_id", "team_name": "team"}, inplace=True)
+def _bincount(codes, n_groups, weights):
+    """
+    Sum weights by group code, skipping rows with code -1.
+    """
+    valid = codes >= 0
+    if not valid.all():
+        codes = codes[valid]
+        weights = weights[valid]
+    return np.bincount(codes, weights=weights, minlength=n_groups)
+
+
+def aggregate_fpl_data(df):
+    """
+    Aggregate player gameweek rows into partial team and player totals.
+
+    Partial aggregates from disjoint sets of rows can be merged with
+    combine_fpl_aggregates, and turned into the output tables with
+    finalise_fpl_data.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The DataFrame containing FPL data with 'team' and 'position' columns.
+
+    Returns
+    -------
+    aggregates : dict
+        A dictionary with the team totals ('team'), player totals by element
+        ID ('player'), each player's stints at a team ('player_teams'), team
+        totals of each gameweek ('team_gw'), the team and value of each row of
+        the latest gameweek ('latest_gw'), that gameweek number ('gameweek')
+        and the cells of the player cube ('cube_cells').
+    """
+    # Factorise the keys once. A code of -1 marks a missing key, which is left
+    # out of that key's totals as in a groupby.
+    team_codes, teams = pd.factorize(df["team"], sort=True)
+    player_codes, elements = pd.factorize(df["element"], sort=True)
+    teams = np.asarray(teams, dtype=object)
+    elements = np.asarray(elements, dtype=np.int64)
+    position_codes = pd.Categorical(df["position"], categories=POSITIONS).codes
+
+    # Combine the keys into one (player, team, position) group per row, so each
+    # column is summed over the rows in a single bincount. The few hundred
+    # group sums are then rolled up to teams, players and positions.
+    n_team_keys = len(teams) + 1
+    n_position_keys = len(POSITIONS) + 1
+    row_keys = (
+        (player_codes.astype(np.int64) + 1) * n_team_keys + (team_codes + 1)
+    ) * n_position_keys + (position_codes + 1)
+    group_codes, group_keys = pd.factorize(row_keys)
+    group_positions = group_keys % n_position_keys - 1
+    group_teams = group_keys // n_position_keys % n_team_keys - 1
+    group_players = group_keys // (n_position_keys * n_team_keys) - 1
+    group_team_positions = np.where(
+        (group_teams >= 0) & (group_positions >= 0),
+        group_teams * len(POSITIONS) + group_positions,
+        -1,
+    )
+
+    # Team totals of each gameweek, for the table history. Rows without a team
+    # are left out, as in the team totals.
+    gw_codes, gameweeks = pd.factorize(df["GW"], sort=True)
+    n_team_gws = len(teams) * len(gameweeks)
+    team_gw_codes = np.where(
+        team_codes >= 0, team_codes * len(gameweeks) + gw_codes, -1
+    )
+    team_gw_position_codes = np.where(
+        (team_gw_codes >= 0) & (position_codes >= 0),
+        team_gw_codes * len(POSITIONS) + position_codes,
+        -1,
+    )
 
-        df["position"] = (
-            df["element_type"]
-            .map({1: "GK", 2: "DEF", 3: "MID", 4: "FWD"})
-            .fillna("Unknown")
+    team_sums = {"team": teams}
+    player_sums = {"element": elements}
+    team_gw_sums = {
+        "team": np.repeat(teams, len(gameweeks)),
+        "GW": np.tile(np.asarray(gameweeks, dtype=np.int64), len(teams)),
+    }
+    for column, source_column in {
+        "total_points": "total_points",
+        **STAT_COLUMNS,
+    }.items():
+        values = df[source_column].to_numpy()
+        is_integer = values.dtype.kind in "iub"
+        if values.dtype.kind == "f":
+            values = np.nan_to_num(values)
+
+        # Integer columns are summed to int64, matching a pandas groupby sum
+        dtype = np.int64 if is_integer else np.float64
+        group_sums = np.bincount(group_codes, weights=values, minlength=len(group_keys))
+        team_sums[column] = _bincount(group_teams, len(teams), group_sums).astype(dtype)
+        player_sums[column] = _bincount(
+            group_players, len(elements), group_sums
+        ).astype(dtype)
+        team_gw_sums[column] = _bincount(team_gw_codes, n_team_gws, values).astype(
+            dtype
         )
 
-    df["gk_points"] = df["total_points"].where(df["position"] == "GK", 0)
-    df["def_points"] = df["total_points"].where(df["position"] == "DEF", 0)
-    df["mid_points"] = df["total_points"].where(df["position"] == "MID", 0)
-    df["fwd_points"] = df["total_points"].where(df["position"] == "FWD", 0)
-
-    summary_df = (
-        df.groupby("team")
-        .agg(
-            total_points=("total_points", "sum"),
-            gk_points=("gk_points", "sum"),
-            def_points=("def_points", "sum"),
-            mid_points=("mid_points", "sum"),
-            fwd_points=("fwd_points", "sum"),
-            goals_scored=("goals_scored", "sum"),
-            assists=("assists", "sum"),
-            clean_sheets=("clean_sheets", "sum"),
-            yellow_cards=("yellow_cards", "sum"),
-            red_cards=("red_cards", "sum"),
-            goals_conceded=("goals_conceded", "sum"),
-            own_goals=("own_goals", "sum"),
-            penalties_missed=("penalties_missed", "sum"),
-            penalties_saved=("penalties_saved", "sum"),
-            saves=("saves", "sum"),
-            bonus_points=("bonus", "sum"),
+        if column == "total_points":
+            position_gw_points = _bincount(
+                team_gw_position_codes, n_team_gws * len(POSITIONS), values
+            ).reshape(n_team_gws, len(POSITIONS))
+            for i, position in enumerate(POSITIONS):
+                team_gw_sums[f"{position.lower()}_points"] = position_gw_points[
+                    :, i
+                ].astype(dtype)
+            position_points = _bincount(
+                group_team_positions, len(teams) * len(POSITIONS), group_sums
+            ).reshape(len(teams), len(POSITIONS))
+            for i, position in enumerate(POSITIONS):
+                team_sums[f"{position.lower()}_points"] = position_points[:, i].astype(
+                    dtype
+                )
+
+    team_sums = pd.DataFrame(team_sums)[
+        ["team", "total_points", "gk_points", "def_points", "mid_points", "fwd_points"]
+        + list(STAT_COLUMNS)
+    ]
+    player_sums = pd.DataFrame(player_sums)
+    team_gw_sums = pd.DataFrame(team_gw_sums)[["team", "GW", *HISTORY_METRICS]]
+
+    # The latest rows keep plain dtypes whatever the input, so the output does
+    # not depend on how the rows were read
+    max_gw = df["GW"].max()
+    df_max_gw = df.loc[df["GW"] == max_gw, ["team", "value"]]
+    df_max_gw = df_max_gw.astype(
+        {
+            "team": object,
+            "value": np.int64 if df_max_gw["value"].dtype.kind in "iub" else np.float64,
+        }
+    )
+
+    return {
+        "team": team_sums,
+        "player": player_sums,
+        "player_teams": aggregate_player_stints(df),
+        "team_gw": team_gw_sums,
+        "latest_gw": df_max_gw.reset_index(drop=True),
+        "gameweek": int(max_gw),
+        "cube_cells": aggregate_cube_cells(df),
+    }
+
+
+def combine_fpl_aggregates(aggregates, new_aggregates):
+    """
+    Combine partial aggregates computed from two disjoint sets of rows.
+
+    The result is identical to aggregating all of the rows at once. The rows of
+    `new_aggregates` must come after those of `aggregates` in the source data.
+
+    Parameters
+    ----------
+    aggregates : dict
+        The partial aggregates of the earlier rows.
+    new_aggregates : dict
+        The partial aggregates of the later rows.
+
+    Returns
+    -------
+    combined : dict
+        The partial aggregates of all rows.
+    """
+    combined = {}
+    for key, group_columns in [
+        ("team", ["team"]),
+        ("player", ["element"]),
+        ("team_gw", ["team", "GW"]),
+    ]:
+        combined[key] = (
+            pd.concat([aggregates[key], new_aggregates[key]], ignore_index=True)
+            .groupby(group_columns)
+            .sum()
+            .reset_index()
         )
-        .reset_index()
+
+    combined["player_teams"] = combine_player_stints(
+        aggregates["player_teams"], new_aggregates["player_teams"]
+    )
+    combined["cube_cells"] = combine_cube_cells(
+        aggregates["cube_cells"], new_aggregates["cube_cells"]
     )
 
-    max_gw = df["GW"].max()
-    df_max_gw = df[df["GW"] == max_gw]
+    # Only the rows of the latest gameweek seen so far are kept
+    if new_aggregates["gameweek"] > aggregates["gameweek"]:
+        combined["latest_gw"] = new_aggregates["latest_gw"]
+    elif new_aggregates["gameweek"] == aggregates["gameweek"]:
+        combined["latest_gw"] = pd.concat(
+            [aggregates["latest_gw"], new_aggregates["latest_gw"]], ignore_index=True
+        )
+    else:
+        combined["latest_gw"] = aggregates["latest_gw"]
+    combined["gameweek"] = max(aggregates["gameweek"], new_aggregates["gameweek"])
+
+    return combined
+
+
+def finalise_fpl_data(aggregates):
+    """
+    Build the FPL team table and player table from aggregated totals.
+
+    Parameters
+    ----------
+    aggregates : dict
+        The partial aggregates of all of a season's rows.
+
+    Returns
+    -------
+    summary_df : pd.DataFrame
+        A DataFrame containing the aggregated FPL team data.
+    player_df : pd.DataFrame
+        A DataFrame containing the aggregated FPL player data.
+    """
+    df_max_gw = aggregates["latest_gw"]
+
+    summary_df = aggregates["team"]
     value_max_gw_sum = df_max_gw.groupby("team")["value"].sum().reset_index()
     summary_df = summary_df.merge(value_max_gw_sum, on="team", how="left")
     summary_df.rename(columns={"value": "value_latest_gw"}, inplace=True)
@@ -99,32 +464,18 @@ def process_fpl_data(df, season_year):
         drop=True
     )
 
-    player_df = (
-        df.groupby("name")
-        .agg(
-            total_points=("total_points", "sum"),
-            goals_scored=("goals_scored", "sum"),
-            assists=("assists", "sum"),
-            clean_sheets=("clean_sheets", "sum"),
-            yellow_cards=("yellow_cards", "sum"),
-            red_cards=("red_cards", "sum"),
-            goals_conceded=("goals_conceded", "sum"),
-            own_goals=("own_goals", "sum"),
-            penalties_missed=("penalties_missed", "sum"),
-            penalties_saved=("penalties_saved", "sum"),
-            saves=("saves", "sum"),
-            bonus_points=("bonus", "sum"),
-        )
-        .reset_index()
-    )
-
-    player_df = player_df.sort_values(by="total_points", ascending=False).reset_index(
-        drop=True
-    )
+    player_df = aggregates["player"]
+    player_df = player_df.sort_values(
+        by=["total_points", "element"], ascending=[False, True], kind="stable"
+    ).reset_index(drop=True)
 
-    # Perform the left join with player_df on 'name'
+    # Players are summed by element ID, and their display name, latest team
+    # and position are attached from the player dimension last
     player_df = player_df.merge(
-        df_max_gw[["name", "position", "team"]], on="name", how="left"
+        build_player_dimension(aggregates["player_teams"]),
+        on="element",
+        how="left",
+        validate="one_to_one",
     )
 
     column_order = [
@@ -143,21 +494,13 @@ def process_fpl_data(df, season_year):
         "penalties_saved",
         "saves",
         "bonus_points",
+        "teams",
+        "element",
     ]
 
     # Reorder the DataFrame columns
     player_df = player_df[column_order]
 
-    # Create a copy of the DataFrame with the "team" column set to "All Teams"
-    player_df_all_teams = player_df.copy()
-    player_df_all_teams["team"] = "All Teams"
-
-    # Stack the original and the modified DataFrame on top of each other
-    player_df = pd.concat([player_df, player_df_all_teams], ignore_index=True)
-
-    # Remove _ from names
-    player_df["name"] = player_df["name"].str.replace("_", " ")
-
     # Rename columns
     column_name_mapping = {
         "name": "Player Name",
@@ -175,96 +518,548 @@ def process_fpl_data(df, season_year):
         "penalties_saved": "Penalties Saved",
         "saves": "Saves",
         "bonus_points": "Bonus Points",
+        "teams": "Teams",
     }
 
     # Rename the columns using the mapping
     player_df.rename(columns=column_name_mapping, inplace=True)
 
-    return summary_df, player_df
+    return (
+        apply_schema(summary_df, "fpl_premier_league_tables"),
+        apply_schema(player_df, "fpl_premier_league_player_data"),
+    )
 
 
-def get_fpl_player_data_aggregated(season_year):
+def process_fpl_data(df, season_year, immutable=False, session=None):
     """
-    Fetch and process FPL player data for the given season year.
+    Process the FPL data by merging and calculating columns.
+
+    The refresh does not call this; it streams the season's CSV through
+    read_fpl_aggregates or read_fpl_aggregates_incremental instead. This
+    in-memory version builds the same tables from a whole season and is the
+    reference the tests and the synthetic benchmark data use.
 
     Parameters
     ----------
+    df : pd.DataFrame
+        The DataFrame containing raw FPL data.
     season_year : str
         The season year in the format "YYYY-YY".
+    immutable : bool, optional
+        Whether the season is completed, so its source files never change
+        (default is False).
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between stages.
 
     Returns
     -------
     summary_df : pd.DataFrame
-        A DataFrame containing the aggregated FPL player data.
+        A DataFrame containing the processed and aggregated FPL data.
+    """
+    with span("process_fpl_data", season=season_year) as process_span:
+        process_span.add(rows=len(df))
+        df = add_player_positions(df, season_year, immutable=immutable, session=session)
+        summary_df, player_df = finalise_fpl_data(aggregate_fpl_data(df))
+        memory_report(
+            {"merged_gw": df, "summary_df": summary_df, "player_df": player_df}
+        )
+        return summary_df, player_df
+
+
+def save_fpl_aggregates(aggregates, directory):
+    """
+    Save partial aggregates, so later refreshes can fold in new gameweeks only.
+
+    Parameters
+    ----------
+    aggregates : dict
+        The partial aggregates of all rows processed so far.
+    directory : str
+        The directory to save the aggregates to.
+
+    Returns
+    -------
+    None
+    """
+    os.makedirs(directory, exist_ok=True)
+    for key in AGGREGATE_KEYS:
+        aggregates[key].to_csv(os.path.join(directory, f"{key}.csv"), index=False)
+
+    # Written last, so an interrupted save is never picked up as complete
+    with open(os.path.join(directory, "state.json"), "w") as file:
+        json.dump({"last_gameweek": aggregates["gameweek"]}, file)
+
+
+def load_fpl_aggregates(directory):
+    """
+    Load partial aggregates saved by save_fpl_aggregates.
+
+    Parameters
+    ----------
+    directory : str
+        The directory the aggregates were saved to.
+
+    Returns
+    -------
+    aggregates : dict or None
+        The saved partial aggregates, or None if none have been saved, or if
+        they were saved before some of the aggregates were added, in which
+        case the season is recomputed in full.
+    """
+    try:
+        with open(os.path.join(directory, "state.json"), "r") as file:
+            state = json.load(file)
+    except FileNotFoundError:
+        return None
+
+    aggregates = {"gameweek": state["last_gameweek"]}
+    for key in AGGREGATE_KEYS:
+        # Only empty fields are missing values, so no player or team name is
+        # mistaken for one
+        try:
+            aggregates[key] = pd.read_csv(
+                os.path.join(directory, f"{key}.csv"),
+                keep_default_na=False,
+                na_values=[""],
+            )
+        except FileNotFoundError:
+            return None
+    return aggregates
+
+
+def get_merged_gw_source(season_year):
+    """
+    Get the URL and encoding of the merged gameweek data for a season.
+
+    Parameters
+    ----------
+    season_year : str
+        The season year in the format "YYYY-YY".
+
+    Returns
+    -------
+    url : str
+        The URL of the season's merged_gw.csv.
+    encoding : str
+        The encoding of the file.
     """
-    vaastav_url = f"https://raw.githubusercontent.com/vaastav/Fantasy-Premier-League/master/data/{season_year}/gws/merged_gw.csv"
+    vaastav_url = f"{VAASTAV_DATA_URL}/{season_year}/gws/merged_gw.csv"
     if int(season_year[:4]) <= 2018:
         encoding = "latin-1"
     else:
         encoding = "utf-8"
+    return vaastav_url, encoding
+
+
+def get_players_raw_url(season_year):
+    """
+    Get the URL of the player list of a season, with each player's team and
+    position.
+
+    Parameters
+    ----------
+    season_year : str
+        The season year in the format "YYYY-YY".
+
+    Returns
+    -------
+    url : str
+        The URL of the season's players_raw.csv.
+    """
+    return f"{VAASTAV_DATA_URL}/{season_year}/players_raw.csv"
+
+
+def prefetch_season_files(season_starts, immutable=False):
+    """
+    Download the source files of several seasons into the HTTP cache at once.
+
+    Fetches every season's merged_gw.csv and players_raw.csv in one concurrent
+    batch, so later reads of the files are served from disk. Failures are only
+    reported, and surface again when a file is read.
 
-    df = fetch_data_from_url(vaastav_url, encoding=encoding)
-    summary_df, player_df = process_fpl_data(df, season_year)
+    Parameters
+    ----------
+    season_starts : iterable of int
+        The start years of the seasons.
+    immutable : bool, optional
+        Whether the seasons are completed, so their source files never change
+        (default is False).
+
+    Returns
+    -------
+    errors : dict
+        A dictionary mapping each URL that failed to its exception.
+    """
+    urls = []
+    for season_start in season_starts:
+        season_year = get_season_string(season_start)
+        urls += [get_merged_gw_source(season_year)[0], get_players_raw_url(season_year)]
 
-    return summary_df, player_df
+    with span("prefetch_season_files", files=len(urls)):
+        _, errors = fetch_urls_to_files(urls, immutable=immutable)
+    return errors
 
 
-def save_season_data(season_start, file_path_team, file_path_player):
+def fetch_merged_gw(season_year, immutable=False, session=None, columns=None):
     """
-    Fetch and save FPL data for a given season.
+    Fetch the merged gameweek data for the given season year.
+
+    Only the columns the FPL tables use are read, with compact dtypes.
+
+    Parameters
+    ----------
+    season_year : str
+        The season year in the format "YYYY-YY".
+    immutable : bool, optional
+        Whether the season is completed, so its source files never change
+        (default is False).
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between stages.
+    columns : list of str, optional
+        The columns to read, by default those in MERGED_GW_DTYPES.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        A DataFrame with one row per player per fixture.
+    """
+    vaastav_url, encoding = get_merged_gw_source(season_year)
+    columns = set(columns or MERGED_GW_DTYPES)
+
+    def read_data():
+        path = fetch_file_from_url(vaastav_url, immutable=immutable, session=session)
+        return pd.read_csv(
+            path,
+            encoding=encoding,
+            usecols=lambda column: column in columns,
+            dtype=MERGED_GW_DTYPES,
+        )
+
+    if session is None:
+        return read_data()
+    return session.get_or_create(
+        ("merged_gw", season_year, tuple(sorted(columns))), read_data
+    )
+
+
+def read_merged_gw_chunks(
+    season_year, immutable=False, session=None, chunksize=MERGED_GW_CHUNKSIZE
+):
+    """
+    Read the merged gameweek data for the given season year in chunks.
+
+    Only the columns the FPL tables use are read, with compact dtypes.
+
+    Parameters
+    ----------
+    season_year : str
+        The season year in the format "YYYY-YY".
+    immutable : bool, optional
+        Whether the season is completed, so its source files never change
+        (default is False).
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between stages.
+    chunksize : int, optional
+        The number of rows per chunk (default is MERGED_GW_CHUNKSIZE, 100,000).
+
+    Returns
+    -------
+    chunks : pd.io.parsers.TextFileReader
+        An iterator of DataFrames, each with one row per player per fixture.
+    """
+    vaastav_url, encoding = get_merged_gw_source(season_year)
+    path = fetch_file_from_url(vaastav_url, immutable=immutable, session=session)
+    return pd.read_csv(
+        path,
+        encoding=encoding,
+        usecols=lambda column: column in MERGED_GW_DTYPES,
+        dtype=MERGED_GW_DTYPES,
+        chunksize=chunksize,
+    )
+
+
+def aggregate_fpl_chunks(chunks, season_year, immutable=False, session=None):
+    """
+    Fold chunks of merged gameweek data into running aggregates.
+
+    Only one chunk is held in memory at a time.
+
+    Parameters
+    ----------
+    chunks : iterable of pd.DataFrame
+        The merged gameweek data, in source order.
+    season_year : str
+        The season year in the format "YYYY-YY".
+    immutable : bool, optional
+        Whether the season is completed, so its source files never change
+        (default is False).
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between stages.
+
+    Returns
+    -------
+    aggregates : dict or None
+        The partial aggregates of all rows, or None if there were no rows.
+    """
+    aggregates = None
+    positions = None
+    with span("aggregate_fpl_chunks", season=season_year) as aggregate_span:
+        for chunk in chunks:
+            aggregate_span.add(rows=len(chunk))
+            if len(chunk) == 0:
+                continue
+
+            # The player lists are fetched once per season, not per chunk
+            if "position" not in chunk.columns and positions is None:
+                positions = get_player_positions(
+                    season_year, immutable=immutable, session=session
+                )
+            chunk = add_player_positions(chunk, season_year, positions=positions)
+            chunk_aggregates = aggregate_fpl_data(chunk)
+            if aggregates is None:
+                aggregates = chunk_aggregates
+            else:
+                aggregates = combine_fpl_aggregates(aggregates, chunk_aggregates)
+
+        if aggregates is not None:
+            memory_report({key: aggregates[key] for key in AGGREGATE_KEYS})
+
+    return aggregates
+
+
+def aggregate_fpl_gameweeks(chunks, season_year, after_gameweek=None, session=None):
+    """
+    Fold chunks of merged gameweek data into partial aggregates per gameweek.
+
+    Only one chunk is held in memory at a time.
+
+    Parameters
+    ----------
+    chunks : iterable of pd.DataFrame
+        The merged gameweek data, in source order.
+    season_year : str
+        The season year in the format "YYYY-YY".
+    after_gameweek : int, optional
+        Only rows after this gameweek are aggregated (default is every row).
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between stages.
+
+    Returns
+    -------
+    aggregates : dict
+        A dictionary mapping each gameweek with rows, in ascending order, to
+        the partial aggregates of its rows.
+    """
+    gameweek_aggregates = {}
+    positions = None
+    with span("aggregate_fpl_gameweeks", season=season_year) as aggregate_span:
+        for chunk in chunks:
+            aggregate_span.add(rows=len(chunk))
+            if after_gameweek is not None:
+                chunk = chunk[chunk["GW"] > after_gameweek]
+            if len(chunk) == 0:
+                continue
+
+            # The player lists are fetched once per season, not per chunk
+            if "position" not in chunk.columns and positions is None:
+                positions = get_player_positions(season_year, session=session)
+            chunk = add_player_positions(chunk, season_year, positions=positions)
+            for gameweek, rows in chunk.groupby("GW", sort=True):
+                rows_aggregates = aggregate_fpl_data(rows)
+                gameweek = int(gameweek)
+                if gameweek in gameweek_aggregates:
+                    rows_aggregates = combine_fpl_aggregates(
+                        gameweek_aggregates[gameweek], rows_aggregates
+                    )
+                gameweek_aggregates[gameweek] = rows_aggregates
+
+    return dict(sorted(gameweek_aggregates.items()))
+
+
+def read_fpl_aggregates(season_year, immutable=False, session=None):
+    """
+    Stream a season's merged gameweek data into partial aggregates.
+
+    Parameters
+    ----------
+    season_year : str
+        The season year in the format "YYYY-YY".
+    immutable : bool, optional
+        Whether the season is completed, so its source files never change
+        (default is False).
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between stages.
+
+    Returns
+    -------
+    aggregates : dict
+        The partial aggregates of all of the season's rows.
+    """
+    with read_merged_gw_chunks(
+        season_year, immutable=immutable, session=session
+    ) as chunks:
+        return aggregate_fpl_chunks(
+            chunks, season_year, immutable=immutable, session=session
+        )
+
+
+def read_fpl_aggregates_incremental(
+    season_year, aggregates_dir, session=None, trailing_gameweeks=TRAILING_GAMEWEEKS
+):
+    """
+    Update a season's saved partial aggregates with its new gameweeks.
+
+    The partial aggregates saved in `aggregates_dir` are keyed by the last
+    gameweek they hold. Only rows with a later gameweek are aggregated and
+    combined with them, which gives the same aggregates as processing the
+    whole season. The latest `trailing_gameweeks` gameweeks are left out of
+    the saved aggregates and aggregated again on every refresh, so rows added
+    late to them are picked up. Corrections made upstream to earlier gameweeks
+    are not; remove `aggregates_dir` to force a full recompute.
+
+    Parameters
+    ----------
+    season_year : str
+        The season year in the format "YYYY-YY".
+    aggregates_dir : str
+        The directory holding the saved partial aggregates for the season.
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between stages.
+    trailing_gameweeks : int, optional
+        The number of latest gameweeks aggregated again on every refresh
+        (default is TRAILING_GAMEWEEKS).
+
+    Returns
+    -------
+    aggregates : dict
+        The partial aggregates of all of the season's rows.
+    """
+    aggregates = load_fpl_aggregates(aggregates_dir)
+    with read_merged_gw_chunks(season_year, session=session) as chunks:
+        gameweek_aggregates = aggregate_fpl_gameweeks(
+            chunks,
+            season_year,
+            after_gameweek=None if aggregates is None else aggregates["gameweek"],
+            session=session,
+        )
+
+    # Fold in the new gameweeks in order, saving the aggregates once every
+    # gameweek before the trailing ones is in
+    last_gameweek = max(gameweek_aggregates, default=0)
+    settled = [
+        gameweek
+        for gameweek in gameweek_aggregates
+        if gameweek <= last_gameweek - trailing_gameweeks
+    ]
+    for gameweek, new_aggregates in gameweek_aggregates.items():
+        if aggregates is None:
+            aggregates = new_aggregates
+        else:
+            aggregates = combine_fpl_aggregates(aggregates, new_aggregates)
+        if settled and gameweek == settled[-1]:
+            save_fpl_aggregates(aggregates, aggregates_dir)
+
+    if aggregates is not None:
+        memory_report({key: aggregates[key] for key in AGGREGATE_KEYS})
+    return aggregates
+
+
+def save_season_data(season_start, immutable=False, session=None, aggregates_dir=None):
+    """
+    Fetch and save FPL data and the player cube for a given season.
+
+    The tables and the cube are built from the same partial aggregates, so
+    the season's merged gameweek data is read once, in chunks.
 
     Parameters
     ----------
     season_start : int
         The start year of the season.
-    file_path : str
-        The file path where the CSV should be saved.
+    immutable : bool, optional
+        Whether the season is completed, so its source files never change
+        (default is False).
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between stages.
+    aggregates_dir : str, optional
+        If given, the season is processed incrementally using the partial
+        aggregates saved in this directory.
 
     Returns
     -------
     None
     """
     season_string = get_season_string(season_start)
-    season_df, player_df = get_fpl_player_data_aggregated(season_year=season_string)
-    season_df.to_csv(file_path_team, index=False)
-    if season_start <= 2018:
-        encoding = "latin-1"
+    if aggregates_dir is None:
+        aggregates = read_fpl_aggregates(
+            season_string, immutable=immutable, session=session
+        )
     else:
-        encoding = "utf-8"
+        aggregates = read_fpl_aggregates_incremental(
+            season_string, aggregates_dir, session=session
+        )
+    season_df, player_df = finalise_fpl_data(aggregates)
+    player_df = add_player_codes(
+        player_df, season_string, immutable=immutable, session=session
+    )
+    write_season_data(
+        season_start, season_df, player_df, build_team_history(aggregates["team_gw"])
+    )
+    save_player_cube(season_string, aggregates["cube_cells"])
 
-    player_df.to_csv(file_path_player, index=False, encoding=encoding)
 
+def save_player_cube(season_year, cube_cells):
+    """
+    Build and save the player cube of a season from its aggregated cells.
 
-def get_completed_seasons_fpl(first_season_start, latest_season_start):
+    Parameters
+    ----------
+    season_year : str
+        The season year in the format "YYYY-YY".
+    cube_cells : pd.DataFrame
+        The cube cells of all of the season's rows, see aggregate_cube_cells.
+
+    Returns
+    -------
+    None
+    """
+    with span("save_player_cube", season=season_year) as cube_span:
+        cube_span.add(rows=len(cube_cells))
+        memory_report({"cube_cells": cube_cells})
+        write_player_cube(cube_cells, season_year)
+
+
+def write_season_data(season_start, season_df, player_df, history_df=None):
     """
-    Fetch and save FPL data for a range of seasons.
+    Save the FPL team table, player table and team history for a given season.
 
     Parameters
     ----------
-    first_season_start : int
-        The start year of the first season in the range.
-    latest_season_start : int
-        The start year of the latest season in the range.
+    season_start : int
+        The start year of the season.
+    season_df : pd.DataFrame
+        The aggregated FPL team data.
+    player_df : pd.DataFrame
+        The aggregated FPL player data.
+    history_df : pd.DataFrame, optional
+        The cumulative team totals after each gameweek. Not saved if None.
 
     Returns
     -------
     None
     """
-    for season_start in range(first_season_start, latest_season_start + 1):
-        file_path_team = (
-            f"data/fpl_premier_league_tables/{get_season_string(season_start)}.csv"
-        )
-        file_path_player = (
-            f"data/fpl_premier_league_player_data/{get_season_string(season_start)}.csv"
-        )
-        save_season_data(
-            season_start=season_start,
-            file_path_team=file_path_team,
-            file_path_player=file_path_player,
-        )
+    season_string = get_season_string(season_start)
+    memory_report(
+        {"season_df": season_df, "player_df": player_df}
+        if history_df is None
+        else {"season_df": season_df, "player_df": player_df, "history_df": history_df}
+    )
+    save_table(season_df, "fpl_premier_league_tables", season_string)
+    save_table(player_df, "fpl_premier_league_player_data", season_string)
+    if history_df is not None:
+        save_table(history_df, HISTORY_TABLE, season_string)
 
 
-def get_current_season_fpl(season_start):
+def get_current_season_fpl(season_start, session=None, incremental=False):
     """
     Fetch and save FPL data for the current season.
 
@@ -272,19 +1067,22 @@ def get_current_season_fpl(season_start):
     ----------
     season_start : int
         The start year of the current season.
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between stages.
+    incremental : bool, optional
+        Whether to fold in only the gameweeks added since the last refresh
+        (default is False).
 
     Returns
     -------
     None
     """
-    file_path_team = (
-        f"data/fpl_premier_league_tables/{get_season_string(season_start)}.csv"
-    )
-    file_path_player = (
-        f"data/fpl_premier_league_player_data/{get_season_string(season_start)}.csv"
-    )
     save_season_data(
         season_start=season_start,
-        file_path_team=file_path_team,
-        file_path_player=file_path_player,
+        session=session,
+        aggregates_dir=(
+            f"data/fpl_aggregates/{get_season_string(season_start)}"
+            if incremental
+            else None
+        ),
     )
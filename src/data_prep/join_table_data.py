@@ -1,6 +1,24 @@
+import hashlib
+import json
 import os
-import numpy as np
 import pandas as pd
+from src.data_prep.ranking import RANKING_METRICS, rank_table
+from src.data_prep.schema import apply_schema
+from src.data_prep.storage import (
+    DATA_DIR,
+    find_table_file,
+    list_seasons,
+    load_table,
+    save_table,
+)
+from src.tools.profiling import memory_report, span
+
+JOINED_TABLE = "fpl_premier_league_tables_joined"
+JOIN_INPUT_TABLES = ["fpl_premier_league_tables", "actual_premier_league_tables"]
+JOIN_MANIFEST_PATH = os.path.join(DATA_DIR, JOINED_TABLE, "manifest.json")
+
+# Bump when the join logic changes, so every season is rebuilt
+JOIN_VERSION = 2
 
 
 def load_table_data(season):
@@ -19,8 +37,8 @@ def load_table_data(season):
     actual_pl_table : pd.DataFrame
         Actual Premier League data for the specified season.
     """
-    fpl_pl_table = pd.read_csv(f"data/fpl_premier_league_tables/{season}.csv")
-    actual_pl_table = pd.read_csv(f"data/actual_premier_league_tables/{season}.csv")
+    fpl_pl_table = load_table("fpl_premier_league_tables", season)
+    actual_pl_table = load_table("actual_premier_league_tables", season)
     return fpl_pl_table, actual_pl_table
 
 
@@ -71,6 +89,8 @@ def sort_and_rank(fpl_pl_table):
     """
     Sort the FPL table by ranking metrics and assign positions.
 
+    Teams level on every metric are ordered by name, in reverse.
+
     Parameters
     ----------
     fpl_pl_table : pd.DataFrame
@@ -81,33 +101,17 @@ def sort_and_rank(fpl_pl_table):
     fpl_pl_table_sorted : pd.DataFrame
         DataFrame with assigned ranks based on sorting by specified metrics.
     """
-    ranking_columns = [
-        "total_points",
-        "goals_scored",
-        "assists",
-        "clean_sheets",
-        "yellow_cards",
-        "red_cards",
-        "goals_conceded",
-        "own_goals",
-        "penalties_missed",
-        "penalties_saved",
-        "saves",
-        "bonus_points",
-        "team",
-    ]
-
-    fpl_pl_table_sorted = fpl_pl_table.sort_values(
-        by=ranking_columns, ascending=[False] * len(ranking_columns)
-    )
-    fpl_pl_table_sorted["Pos"] = range(1, len(fpl_pl_table_sorted) + 1)
-    return fpl_pl_table_sorted.reset_index(drop=True)
+    return rank_table(fpl_pl_table, RANKING_METRICS, tiebreak=["team"])
 
 
 def calculate_rank_difference(fpl_pl_table):
     """
     Calculate the difference between FPL and actual positions.
 
+    The difference is kept as a number, positive when a team finished higher
+    in the FPL table than in the actual table. It is formatted for display by
+    the dashboard.
+
     Parameters
     ----------
     fpl_pl_table : pd.DataFrame
@@ -119,15 +123,6 @@ def calculate_rank_difference(fpl_pl_table):
         DataFrame with the calculated rank difference added as a new column.
     """
     fpl_pl_table["Difference"] = fpl_pl_table["Actual Pos"] - fpl_pl_table["Pos"]
-    fpl_pl_table["Difference"] = np.where(
-        fpl_pl_table["Difference"] > 0,
-        fpl_pl_table["Difference"].apply(lambda x: f"⬆️ +{x}"),
-        np.where(
-            fpl_pl_table["Difference"] < 0,
-            fpl_pl_table["Difference"].apply(lambda x: f"⬇️ {x}"),
-            " ",
-        ),
-    )
     return fpl_pl_table
 
 
@@ -229,41 +224,209 @@ def join_table_data(season, team_name_mapping):
     ranked_table = calculate_rank_difference(ranked_table)
 
     # Reorder and rename columns
-    final_table = reorder_and_rename_columns(ranked_table)
+    final_table = apply_schema(reorder_and_rename_columns(ranked_table), JOINED_TABLE)
+    memory_report(
+        {
+            "fpl_pl_table": fpl_pl_table,
+            "actual_pl_table": actual_pl_table,
+            "final_table": final_table,
+        }
+    )
 
     return final_table
 
 
 def get_list_of_seasons():
     """
-    Retrieve a list of seasons based on the available CSV files in the FPL data folder.
+    Retrieve a list of seasons based on the available files in the FPL data folder.
 
     Returns
     -------
     seasons : list of str
-        A list of season identifiers (e.g., '2023-24') derived from CSV file names.
+        A list of season identifiers (e.g., '2023-24') derived from file names.
     """
-    folder_path = "data/fpl_premier_league_tables"
-    seasons = [season.replace(".csv", "") for season in os.listdir(folder_path)]
+    seasons = list_seasons("fpl_premier_league_tables")
     return seasons
 
 
-def join_all_seasons(team_name_mapping):
+def hash_file(file_path):
     """
-    Process and join FPL data with actual Premier League data for all available seasons.
+    Get the SHA-256 hash of a file's content.
 
     Parameters
     ----------
+    file_path : str
+        The file path.
+
+    Returns
+    -------
+    digest : str
+        The hex digest of the file's content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_season_input_hashes(season, team_name_mapping):
+    """
+    Get content hashes of everything a season's joined table is built from.
+
+    Parameters
+    ----------
+    season : str
+        The season to process, formatted as 'YYYY-YY'.
     team_name_mapping : dict
         A dictionary mapping FPL team names to actual Premier League team names.
 
+    Returns
+    -------
+    input_hashes : dict
+        The hash of each input table's file (None if the table is missing), of
+        the team name mapping, and the join version.
+    """
+    input_hashes = {}
+    for table in JOIN_INPUT_TABLES:
+        path = find_table_file(table, season)
+        input_hashes[table] = None if path is None else hash_file(path)
+
+    mapping = json.dumps(team_name_mapping, sort_keys=True).encode()
+    input_hashes["team_name_mapping"] = hashlib.sha256(mapping).hexdigest()
+    input_hashes["join_version"] = JOIN_VERSION
+    return input_hashes
+
+
+def load_join_manifest(file_path=JOIN_MANIFEST_PATH):
+    """
+    Load the manifest of the input hashes each joined table was built from.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        The path to the manifest file.
+
+    Returns
+    -------
+    manifest : dict
+        A dictionary mapping each season to its input hashes. Empty if there
+        is no manifest yet.
+    """
+    try:
+        with open(file_path, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_join_manifest(manifest, file_path=JOIN_MANIFEST_PATH):
+    """
+    Save the manifest of the input hashes each joined table was built from.
+
+    Parameters
+    ----------
+    manifest : dict
+        A dictionary mapping each season to its input hashes.
+    file_path : str, optional
+        The path to the manifest file.
+
     Returns
     -------
     None
     """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+
+
+def is_season_up_to_date(season, input_hashes, manifest):
+    """
+    Check whether a season's joined table was built from the given inputs.
+
+    Parameters
+    ----------
+    season : str
+        The season, formatted as 'YYYY-YY'.
+    input_hashes : dict
+        The season's current input hashes, see get_season_input_hashes.
+    manifest : dict
+        The join manifest, see load_join_manifest.
+
+    Returns
+    -------
+    up_to_date : bool
+        Whether the joined table exists and its inputs are unchanged.
+    """
+    return (
+        manifest.get(season) == input_hashes
+        and find_table_file(JOINED_TABLE, season) is not None
+    )
+
+
+def get_stale_seasons(team_name_mapping):
+    """
+    List the seasons whose joined table needs to be rebuilt.
+
+    Parameters
+    ----------
+    team_name_mapping : dict
+        A dictionary mapping FPL team names to actual Premier League team names.
+
+    Returns
+    -------
+    seasons : list of str
+        The seasons whose inputs changed since they were last joined, or whose
+        joined table is missing.
+    """
+    manifest = load_join_manifest()
+    return [
+        season
+        for season in get_list_of_seasons()
+        if not is_season_up_to_date(
+            season, get_season_input_hashes(season, team_name_mapping), manifest
+        )
+    ]
+
+
+def join_all_seasons(team_name_mapping, force=False):
+    """
+    Process and join FPL data with actual Premier League data for all available seasons.
+
+    A season is only rebuilt if its input tables, the team name mapping or the
+    join logic changed since it was last built, or its joined table is
+    missing. The input hashes of each build are kept in a manifest next to the
+    joined tables.
+
+    Parameters
+    ----------
+    team_name_mapping : dict
+        A dictionary mapping FPL team names to actual Premier League team names.
+    force : bool, optional
+        Whether to rebuild every season regardless of the manifest (default is
+        False).
+
+    Returns
+    -------
+    rebuilt_seasons : list of str
+        The seasons whose joined tables were rebuilt.
+    """
+    manifest = load_join_manifest()
+    rebuilt_seasons = []
+
     seasons = get_list_of_seasons()
     for season in seasons:
-        final_table = join_table_data(season, team_name_mapping)
-        final_table.to_csv(
-            f"data/fpl_premier_league_tables_joined/{season}.csv", index=False
-        )
+        input_hashes = get_season_input_hashes(season, team_name_mapping)
+        if not force and is_season_up_to_date(season, input_hashes, manifest):
+            continue
+
+        with span("join_table_data", season=season) as join_span:
+            final_table = join_table_data(season, team_name_mapping)
+            save_table(final_table, JOINED_TABLE, season)
+            join_span.add(rows=len(final_table))
+
+        manifest[season] = input_hashes
+        save_join_manifest(manifest)
+        rebuilt_seasons.append(season)
+
+    return rebuilt_seasons
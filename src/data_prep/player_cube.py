@@ -0,0 +1,434 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from src.data_prep.storage import DATA_DIR
+
+CUBE_DIR_NAME = "fpl_player_cube"
+CUBE_FILE = "cube.npy"
+ROWS_FILE = "rows.parquet"
+META_FILE = "meta.json"
+CUBE_DTYPE = "int16"
+
+# The statistics in the cube, keyed by cube metric with the merged_gw source
+# column. Values are the player's value in the gameweek, the rest are summed
+# over the gameweek's fixtures.
+CUBE_METRICS = {
+    "total_points": "total_points",
+    "minutes": "minutes",
+    "goals_scored": "goals_scored",
+    "assists": "assists",
+    "clean_sheets": "clean_sheets",
+    "yellow_cards": "yellow_cards",
+    "red_cards": "red_cards",
+    "goals_conceded": "goals_conceded",
+    "own_goals": "own_goals",
+    "penalties_missed": "penalties_missed",
+    "penalties_saved": "penalties_saved",
+    "saves": "saves",
+    "bonus_points": "bonus",
+    "value": "value",
+}
+MAX_METRICS = {"value"}
+
+# The keys of a cube cell, one player at a team in a gameweek
+CELL_KEYS = ["element", "team", "position", "GW"]
+
+
+def cube_dir(season, data_dir=DATA_DIR):
+    """
+    Get the directory holding a season's player cube.
+
+    Parameters
+    ----------
+    season : str
+        The season string in the format "YYYY-YY".
+    data_dir : str, optional
+        The data directory (default is 'data').
+
+    Returns
+    -------
+    path : str
+        The cube directory of the season.
+    """
+    return os.path.join(data_dir, CUBE_DIR_NAME, season)
+
+
+def player_cube_exists(season, data_dir=DATA_DIR):
+    """
+    Check whether a season's player cube has been written.
+
+    Parameters
+    ----------
+    season : str
+        The season string in the format "YYYY-YY".
+    data_dir : str, optional
+        The data directory (default is 'data').
+
+    Returns
+    -------
+    exists : bool
+        Whether the cube is complete.
+    """
+    return os.path.exists(os.path.join(cube_dir(season, data_dir), META_FILE))
+
+
+def aggregate_cube_cells(df):
+    """
+    Aggregate merged gameweek rows into the cells of the player cube.
+
+    Cells of disjoint sets of rows can be merged with combine_cube_cells and
+    turned into the cube with build_player_cube, so the cube is built from
+    chunks of the data, or from saved cells and the new gameweeks only.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The merged gameweek data with 'element', 'name', 'team', 'position',
+        'GW' and the source columns of CUBE_METRICS. Missing statistics are
+        left as zeros. Rows without a team are left out, as in the team table.
+
+    Returns
+    -------
+    cells : pd.DataFrame
+        One row per player, team, position and gameweek, with the columns of
+        CELL_KEYS, the player's name in the cell's last row ('name') and the
+        metrics of CUBE_METRICS.
+    """
+    df = df[df["team"].notna()]
+    cells = pd.DataFrame(
+        {
+            "element": df["element"].to_numpy(dtype=np.int64),
+            "team": df["team"].to_numpy(dtype=object),
+            "position": np.where(
+                df["position"].isna(), "Unknown", df["position"].to_numpy(dtype=object)
+            ),
+            "GW": df["GW"].to_numpy(dtype=np.int64),
+            "name": df["name"].to_numpy(dtype=object),
+        }
+    )
+    for metric, source_column in CUBE_METRICS.items():
+        if source_column in df:
+            cells[metric] = np.nan_to_num(df[source_column].to_numpy(dtype=np.float64))
+        else:
+            cells[metric] = 0.0
+    return _reduce_cube_cells(cells)
+
+
+def combine_cube_cells(cells, new_cells):
+    """
+    Combine the cube cells of two disjoint sets of rows.
+
+    Parameters
+    ----------
+    cells : pd.DataFrame
+        The cells of the earlier rows, see aggregate_cube_cells.
+    new_cells : pd.DataFrame
+        The cells of the later rows.
+
+    Returns
+    -------
+    combined : pd.DataFrame
+        The cells of all rows.
+    """
+    return _reduce_cube_cells(pd.concat([cells, new_cells], ignore_index=True))
+
+
+def _reduce_cube_cells(cells):
+    """
+    Merge cells with the same keys, keeping the name of the last one.
+    """
+    return (
+        cells.groupby(CELL_KEYS, sort=False)
+        .agg(
+            {
+                "name": "last",
+                **{
+                    metric: "max" if metric in MAX_METRICS else "sum"
+                    for metric in CUBE_METRICS
+                },
+            }
+        )
+        .reset_index()
+    )
+
+
+def build_player_cube(cells):
+    """
+    Build the player x gameweek x metric cube of a season.
+
+    Each row of the cube is a player at a team, keyed by the player's element
+    ID, so a player who moved club mid-season has one row per club. Rows are
+    sorted by team, then position, then element ID, so each team and each
+    position within a team is a contiguous block of rows.
+
+    Parameters
+    ----------
+    cells : pd.DataFrame
+        The cube cells of all of a season's rows, see aggregate_cube_cells.
+
+    Returns
+    -------
+    cube : np.ndarray
+        The cube, of shape (rows, gameweeks, metrics), where gameweek g is at
+        index g - 1. Gameweeks a player did not play are zeros.
+    rows : pd.DataFrame
+        The player of each cube row: 'element', 'name', 'team' and 'position'.
+        The name is the player's name in their latest row.
+    """
+    gameweeks = cells["GW"].to_numpy(dtype=np.int64)
+    n_gameweeks = int(gameweeks.max()) if len(cells) else 0
+
+    keys = cells[["team", "position", "element"]]
+    row_codes, unique_keys = pd.factorize(pd.MultiIndex.from_frame(keys), sort=True)
+    rows = pd.DataFrame(list(unique_keys), columns=keys.columns)[
+        ["element", "team", "position"]
+    ]
+
+    # The latest name of each row, as names can change within a season
+    latest = np.lexsort([gameweeks, row_codes])
+    last_of_row = np.r_[row_codes[latest][1:] != row_codes[latest][:-1], True]
+    rows.insert(
+        1,
+        "name",
+        cells["name"].to_numpy(dtype=object)[latest[last_of_row]],
+    )
+
+    # Each cell is one (row, gameweek), and values start from zero
+    values = cells[list(CUBE_METRICS)].to_numpy(dtype=np.float64)
+    cube = np.zeros((len(rows), n_gameweeks, len(CUBE_METRICS)), dtype=CUBE_DTYPE)
+    cube[row_codes, gameweeks - 1] = np.where(
+        [metric in MAX_METRICS for metric in CUBE_METRICS],
+        np.maximum(values, 0),
+        values,
+    )
+    return cube, rows
+
+
+def write_player_cube(cells, season, data_dir=DATA_DIR):
+    """
+    Build and save a season's player cube, for PlayerCube.open to map.
+
+    The cube is saved as a .npy file, the player of each row as Parquet and
+    the shape and metrics as JSON. The JSON is written last, so an interrupted
+    write is never picked up as complete.
+
+    Parameters
+    ----------
+    cells : pd.DataFrame
+        The cube cells of all of a season's rows, see aggregate_cube_cells.
+    season : str
+        The season string in the format "YYYY-YY".
+    data_dir : str, optional
+        The data directory (default is 'data').
+
+    Returns
+    -------
+    None
+    """
+    cube, rows = build_player_cube(cells)
+    directory = cube_dir(season, data_dir)
+    os.makedirs(directory, exist_ok=True)
+
+    # Each file is replaced, not rewritten in place, so a reader that has the
+    # old cube mapped keeps reading the old file
+    meta_path = os.path.join(directory, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    for file_name, write in [
+        (CUBE_FILE, lambda file: np.save(file, cube)),
+        (ROWS_FILE, lambda file: rows.to_parquet(file, index=False)),
+    ]:
+        tmp_path = os.path.join(directory, f".{file_name}.tmp")
+        with open(tmp_path, "wb") as file:
+            write(file)
+        os.replace(tmp_path, os.path.join(directory, file_name))
+
+    with open(meta_path, "w") as file:
+        json.dump(
+            {
+                "metrics": list(CUBE_METRICS),
+                "shape": list(cube.shape),
+                "dtype": CUBE_DTYPE,
+            },
+            file,
+        )
+
+
+class PlayerCube:
+    """
+    A season's player x gameweek x metric cube, memory-mapped read-only.
+
+    Opening the cube only reads its small index files, and the operating
+    system shares the mapped pages between every process that opens it.
+    Slices of a metric are views of the mapped file, and team and position
+    roll-ups are reductions over contiguous blocks of rows.
+    """
+
+    def __init__(self, cube, rows, metrics):
+        """
+        Parameters
+        ----------
+        cube : np.ndarray
+            The cube, of shape (rows, gameweeks, metrics).
+        rows : pd.DataFrame
+            The player of each cube row, sorted by team and position.
+        metrics : list of str
+            The metric names, in the order of the last axis of `cube`.
+        """
+        self.cube = cube
+        self.rows = rows
+        self.metrics = list(metrics)
+
+        # Rows are sorted by team, so each team's rows start at one offset
+        team_codes, self.teams = pd.factorize(rows["team"], sort=True)
+        self._team_starts = np.searchsorted(team_codes, np.arange(len(self.teams)))
+
+    @classmethod
+    def open(cls, season, data_dir=DATA_DIR):
+        """
+        Memory-map a season's cube saved by write_player_cube.
+
+        Parameters
+        ----------
+        season : str
+            The season string in the format "YYYY-YY".
+        data_dir : str, optional
+            The data directory (default is 'data').
+
+        Returns
+        -------
+        cube : PlayerCube
+            The mapped cube.
+
+        Raises
+        ------
+        FileNotFoundError
+            If the season has no complete cube.
+        """
+        directory = cube_dir(season, data_dir)
+        with open(os.path.join(directory, META_FILE), "r") as file:
+            meta = json.load(file)
+        cube = np.load(os.path.join(directory, CUBE_FILE), mmap_mode="r")
+        rows = pd.read_parquet(os.path.join(directory, ROWS_FILE))
+        return cls(cube, rows, meta["metrics"])
+
+    @property
+    def n_gameweeks(self):
+        """
+        The number of gameweeks in the cube.
+        """
+        return self.cube.shape[1]
+
+    def metric(self, metric, first_gameweek=1, last_gameweek=None):
+        """
+        Get a metric of every row over a range of gameweeks.
+
+        Parameters
+        ----------
+        metric : str
+            The metric, one of CUBE_METRICS.
+        first_gameweek : int, optional
+            The first gameweek of the range (default is 1).
+        last_gameweek : int, optional
+            The last gameweek of the range (default is the latest gameweek).
+
+        Returns
+        -------
+        values : np.ndarray
+            A read-only view of shape (rows, gameweeks in range).
+
+        Raises
+        ------
+        ValueError
+            If the metric is not in the cube.
+        """
+        if last_gameweek is None:
+            last_gameweek = self.n_gameweeks
+        return self.cube[
+            :, first_gameweek - 1 : last_gameweek, self.metrics.index(metric)
+        ]
+
+    def player_totals(self, metric, first_gameweek=1, last_gameweek=None):
+        """
+        Sum a metric over a range of gameweeks for every row.
+
+        Parameters
+        ----------
+        metric : str
+            The metric, one of CUBE_METRICS.
+        first_gameweek : int, optional
+            The first gameweek of the range (default is 1).
+        last_gameweek : int, optional
+            The last gameweek of the range (default is the latest gameweek).
+
+        Returns
+        -------
+        totals : pd.DataFrame
+            The rows with the metric's total over the range.
+        """
+        values = self.metric(metric, first_gameweek, last_gameweek)
+        return self.rows.assign(**{metric: values.sum(axis=1, dtype=np.int64)})
+
+    def team_totals(self, metric, first_gameweek=1, last_gameweek=None):
+        """
+        Sum a metric over each team's players, gameweek by gameweek.
+
+        Parameters
+        ----------
+        metric : str
+            The metric, one of CUBE_METRICS.
+        first_gameweek : int, optional
+            The first gameweek of the range (default is 1).
+        last_gameweek : int, optional
+            The last gameweek of the range (default is the latest gameweek).
+
+        Returns
+        -------
+        totals : pd.DataFrame
+            One row per team, in alphabetical order, and one column per
+            gameweek in the range.
+        """
+        values = self.metric(metric, first_gameweek, last_gameweek)
+        if last_gameweek is None:
+            last_gameweek = self.n_gameweeks
+        totals = np.add.reduceat(values, self._team_starts, axis=0, dtype=np.int64)
+        return pd.DataFrame(
+            totals,
+            index=pd.Index(self.teams, name="team"),
+            columns=pd.RangeIndex(first_gameweek, last_gameweek + 1, name="GW"),
+        )
+
+    def position_totals(self, metric, first_gameweek=1, last_gameweek=None):
+        """
+        Sum a metric over each team's players in each position.
+
+        Parameters
+        ----------
+        metric : str
+            The metric, one of CUBE_METRICS.
+        first_gameweek : int, optional
+            The first gameweek of the range (default is 1).
+        last_gameweek : int, optional
+            The last gameweek of the range (default is the latest gameweek).
+
+        Returns
+        -------
+        totals : pd.Series
+            The total over the range, indexed by team and position.
+        """
+        values = self.metric(metric, first_gameweek, last_gameweek)
+        keys = self.rows[["team", "position"]]
+        starts = np.flatnonzero(
+            np.r_[
+                True,
+                (keys.iloc[1:].to_numpy() != keys.iloc[:-1].to_numpy()).any(axis=1),
+            ]
+        )
+        totals = np.add.reduceat(values, starts, axis=0, dtype=np.int64).sum(axis=1)
+        return pd.Series(
+            totals,
+            index=pd.MultiIndex.from_frame(keys.iloc[starts]),
+            name=metric,
+        )
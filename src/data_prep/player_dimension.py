@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+# The columns of a player's stint at a team, one row per element ID and team
+STINT_COLUMNS = ["element", "team", "name", "position", "first_gw", "last_gw"]
+
+
+def display_name(names):
+    """
+    Convert merged_gw player names to display names.
+
+    Older seasons suffix names with the element ID and join words with
+    underscores, e.g. 'Aaron_Cresswell_402'.
+
+    Parameters
+    ----------
+    names : pd.Series
+        The player names as read from merged_gw.csv.
+
+    Returns
+    -------
+    names : pd.Series
+        The display names, e.g. 'Aaron Cresswell'.
+    """
+    names = names.astype(object)
+    return names.str.replace(r"_\d+$", "", regex=True).str.replace("_", " ")
+
+
+def _reduce_stints(df, first_gameweeks, last_gameweeks):
+    """
+    Reduce rows to one row per element ID and team.
+
+    The name and position of a stint are those of its latest row, the last
+    one in source order among rows of the same gameweek.
+    """
+    team_codes, teams = pd.factorize(df["team"], sort=True)
+    elements = df["element"].to_numpy(dtype=np.int64)
+
+    # Stably sort rows by stint, then gameweek, so the last row of each stint
+    # is its latest
+    order = np.lexsort([last_gameweeks, team_codes, elements])
+    stint_keys = elements[order] * (len(teams) + 1) + team_codes[order] + 1
+    is_last = np.r_[stint_keys[1:] != stint_keys[:-1], True]
+    stint_codes = np.cumsum(np.r_[True, is_last[:-1]]) - 1
+    last = order[is_last]
+
+    first_gw = np.full(len(last), np.iinfo(np.int64).max)
+    np.minimum.at(first_gw, stint_codes, first_gameweeks[order])
+
+    stints = (
+        df.iloc[last][["element", "team", "name", "position"]]
+        .astype(
+            {"element": np.int64, "team": object, "name": object, "position": object}
+        )
+        .reset_index(drop=True)
+    )
+    stints["first_gw"] = first_gw
+    stints["last_gw"] = last_gameweeks[last]
+    return stints[STINT_COLUMNS]
+
+
+def aggregate_player_stints(df):
+    """
+    Aggregate player gameweek rows into each player's stints at a team.
+
+    Players are keyed by their element ID, so players sharing a name are kept
+    apart, and a player who moved club mid-season has one stint per club.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The merged gameweek data with 'element', 'name', 'team', 'position'
+        and 'GW' columns.
+
+    Returns
+    -------
+    stints : pd.DataFrame
+        One row per element ID and team, with the latest name and position
+        and the first and latest gameweek of the stint.
+    """
+    gameweeks = df["GW"].to_numpy(dtype=np.int64)
+    return _reduce_stints(df, gameweeks, gameweeks)
+
+
+def combine_player_stints(stints, new_stints):
+    """
+    Combine player stints aggregated from two disjoint sets of rows.
+
+    Parameters
+    ----------
+    stints : pd.DataFrame
+        The stints of the earlier rows.
+    new_stints : pd.DataFrame
+        The stints of the later rows.
+
+    Returns
+    -------
+    combined : pd.DataFrame
+        The stints of all rows.
+    """
+    combined = pd.concat([stints, new_stints], ignore_index=True)
+    return _reduce_stints(
+        combined,
+        combined["first_gw"].to_numpy(dtype=np.int64),
+        combined["last_gw"].to_numpy(dtype=np.int64),
+    )
+
+
+def build_player_dimension(stints):
+    """
+    Build the player dimension of a season from the players' stints.
+
+    Parameters
+    ----------
+    stints : pd.DataFrame
+        The stints of every player, see aggregate_player_stints.
+
+    Returns
+    -------
+    players : pd.DataFrame
+        One row per element ID, in element ID order, with the display 'name',
+        and the 'team' and 'position' of the player's latest stint. 'teams'
+        lists the player's teams in the order they played for them.
+    """
+    latest = stints.sort_values(["element", "last_gw"], kind="stable")
+    players = latest.drop_duplicates("element", keep="last")[
+        ["element", "name", "team", "position"]
+    ].reset_index(drop=True)
+
+    # Display names are cleaned once per player, not once per gameweek row
+    players["name"] = display_name(players["name"])
+
+    history = stints[stints["team"].notna()].sort_values(
+        ["element", "first_gw"], kind="stable"
+    )
+    teams = history.groupby("element", sort=True)["team"].agg(", ".join)
+    players["teams"] = players["element"].map(teams)
+    return players
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+ORDINAL = "ordinal"
+COMPETITION = "competition"
+
+# The metrics FPL tables are ranked on, most important first
+RANKING_METRICS = [
+    "total_points",
+    "goals_scored",
+    "assists",
+    "clean_sheets",
+    "yellow_cards",
+    "red_cards",
+    "goals_conceded",
+    "own_goals",
+    "penalties_missed",
+    "penalties_saved",
+    "saves",
+    "bonus_points",
+]
+
+
+def sort_key(values, ascending=False):
+    """
+    Convert a column to an integer or float key that sorts in ascending order.
+
+    Strings and categories are replaced by the rank of their value in
+    lexicographic order, so no string comparisons are needed when sorting.
+
+    Parameters
+    ----------
+    values : pd.Series
+        The column to sort by.
+    ascending : bool, optional
+        Whether the column is ranked in ascending order (default is False).
+
+    Returns
+    -------
+    key : np.ndarray
+        The sort key, negated for a descending column.
+    """
+    if pd.api.types.is_numeric_dtype(values) and not isinstance(
+        values.dtype, pd.CategoricalDtype
+    ):
+        key = values.to_numpy()
+        if key.dtype.kind in "biu":
+            key = key.astype(np.int64)
+    else:
+        key, _ = pd.factorize(values.to_numpy(dtype=object), sort=True)
+    return key if ascending else -key
+
+
+def rank_order(df, metrics, tiebreak=(), group_by=None, ascending=False):
+    """
+    Get the order of the rows of one or many tables, ranked with one lexsort.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The rows to rank.
+    metrics : list of str
+        The columns to rank on, most important first.
+    tiebreak : list of str, optional
+        Further columns that only order rows tied on every metric, e.g. the
+        team name.
+    group_by : str, optional
+        A column holding the table of each row, e.g. the season. Each table is
+        ranked on its own, and the tables are ordered by this column.
+    ascending : bool, optional
+        Whether lower values rank higher (default is False).
+
+    Returns
+    -------
+    order : np.ndarray
+        The row positions of `df` in ranked order. Rows tied on every column
+        keep their order in `df`.
+    """
+    keys = [sort_key(df[column], ascending) for column in [*metrics, *tiebreak]]
+    if group_by is not None:
+        keys.insert(0, sort_key(df[group_by], ascending=True))
+    if not keys:
+        return np.arange(len(df))
+    # np.lexsort sorts by the last key first
+    return np.lexsort(keys[::-1])
+
+
+def rank_table(
+    df,
+    metrics,
+    tiebreak=(),
+    group_by=None,
+    ascending=False,
+    method=ORDINAL,
+    rank_column="Pos",
+):
+    """
+    Sort one or many tables by their ranking and assign positions.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The rows to rank.
+    metrics : list of str
+        The columns to rank on, most important first.
+    tiebreak : list of str, optional
+        Further columns that only order rows tied on every metric. They do not
+        split competition ranks.
+    group_by : str, optional
+        A column holding the table of each row, e.g. the season, to rank many
+        tables at once. Positions start from 1 in each table.
+    ascending : bool, optional
+        Whether lower values rank higher (default is False).
+    method : str, optional
+        'ordinal' gives every row its own position (1, 2, 3, 4), 'competition'
+        gives rows tied on every metric the same position, and skips the
+        positions after them (1, 2, 2, 4). The default is 'ordinal'.
+    rank_column : str, optional
+        The column the positions are assigned to (default is 'Pos').
+
+    Returns
+    -------
+    ranked : pd.DataFrame
+        The rows in ranked order, with a new index and the positions in
+        `rank_column`.
+
+    Raises
+    ------
+    ValueError
+        If `method` is not 'ordinal' or 'competition'.
+    """
+    if method not in (ORDINAL, COMPETITION):
+        raise ValueError(f"Unknown ranking method: {method}")
+
+    order = rank_order(
+        df, metrics, tiebreak=tiebreak, group_by=group_by, ascending=ascending
+    )
+    ranked = df.iloc[order].reset_index(drop=True)
+    n_rows = len(ranked)
+    positions = np.arange(n_rows)
+
+    # A new table, or a new position for competition ranks, starts wherever
+    # the grouping or metric columns change from the row before
+    starts_table = np.zeros(n_rows, dtype=bool)
+    starts_table[:1] = True
+    if group_by is not None:
+        groups = ranked[group_by].to_numpy()
+        starts_table[1:] = groups[1:] != groups[:-1]
+    table_start = np.maximum.accumulate(np.where(starts_table, positions, 0))
+
+    if method == COMPETITION:
+        starts_rank = starts_table.copy()
+        for column in metrics:
+            values = ranked[column].to_numpy()
+            starts_rank[1:] |= values[1:] != values[:-1]
+        rank_start = np.maximum.accumulate(np.where(starts_rank, positions, 0))
+    else:
+        rank_start = positions
+
+    ranked[rank_column] = rank_start - table_start + 1
+    return ranked
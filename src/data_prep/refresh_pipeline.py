@@ -0,0 +1,324 @@
+from functools import partial
+from src.dashboard.manifest import (
+    build_dashboard_manifest,
+    dashboard_manifest_is_up_to_date,
+    save_dashboard_manifest,
+)
+from src.data_prep import actual_pl_table, fpl_pl_table_players
+from src.data_prep.join_table_data import get_stale_seasons, join_all_seasons
+from src.data_prep.reload_data import (
+    fetch_current_gameweek,
+    get_scoring_gameweek,
+    save_scoring_meta,
+)
+from src.data_prep.player_cube import player_cube_exists
+from src.data_prep.storage import find_table_file
+from src.tools.http_cache import hold_cached_files
+from src.tools.profiling import merge_worker_span, run_profiled, worker_profile_settings
+from src.tools.season_string import get_season_string
+from src.tools.task_graph import Task
+
+STAGES = ["current_gameweek", "fpl", "actual", "join", "metadata", "manifest"]
+
+FPL_TABLES = [
+    "fpl_premier_league_tables",
+    "fpl_premier_league_player_data",
+    "fpl_team_history",
+]
+ACTUAL_TABLES = ["actual_premier_league_tables"]
+
+
+def tables_exist(tables, season):
+    """
+    Check whether a season's tables have all been saved.
+
+    Parameters
+    ----------
+    tables : list of str
+        The table names, i.e. their folders under data/.
+    season : str
+        The season string in the format "YYYY-YY".
+
+    Returns
+    -------
+    exist : bool
+        Whether every table is saved for the season, in either format.
+    """
+    return all(find_table_file(table, season) is not None for table in tables)
+
+
+def _run_in_worker(function, profile_settings):
+    """
+    Run a function in a worker, keeping the files it fetches in the HTTP cache
+    until it returns, as fetches in other worker processes may evict them, and
+    recording its spans for the parent's profiler.
+    """
+    with hold_cached_files():
+        return run_profiled(function, profile_settings)
+
+
+def run_in_executor(executor, function):
+    """
+    Run a function in an executor and wait for its result.
+
+    Files the function fetches through the HTTP cache are kept on disk until
+    it returns. The spans it records, e.g. in a worker process, are attached to
+    the calling thread's open span.
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor
+        The executor, e.g. a process pool.
+    function : callable
+        The function to run, taking no arguments. It must be picklable for a
+        process pool.
+
+    Returns
+    -------
+    result : object
+        The function's return value.
+    """
+    result, recorded = executor.submit(
+        partial(_run_in_worker, function, worker_profile_settings())
+    ).result()
+    merge_worker_span(recorded)
+    return result
+
+
+def build_refresh_tasks(
+    first_season_start,
+    latest_season_start,
+    current_season_start,
+    team_name_mapping,
+    stages=STAGES,
+    session=None,
+    force=False,
+    executor=None,
+):
+    """
+    Build the task graph of a refresh.
+
+    The tasks are:
+    - 'current_gameweek': fetch the latest gameweek of the current season.
+    - 'prefetch_fpl': download the source files of every completed season
+      to be refreshed in one concurrent batch.
+    - 'fpl:<season>': fetch and aggregate a season's FPL data.
+    - 'actual:<season>': fetch a season's league table from Wikipedia.
+    - 'join': join the FPL and actual tables of every season.
+    - 'metadata': log the scored gameweek in data/scoring_meta.json.
+    - 'manifest': save the seasons, scored gameweek and file hashes the
+      dashboard starts from in data/dashboard_manifest.json.
+
+    A completed season is up to date once its tables, and for the FPL task its
+    player cube, are saved. The current season is up to date once its latest
+    gameweek has been scored, the join once no season's inputs have changed,
+    and the manifest once it matches the saved data. Before the current
+    season's first gameweek its data is not published, so its tasks are up to
+    date. The FPL and Wikipedia tasks do not depend on each other, so they can
+    run concurrently.
+
+    Parameters
+    ----------
+    first_season_start : int
+        The start year of the first season in the range.
+    latest_season_start : int
+        The start year of the latest season in the range.
+    current_season_start : int
+        The start year of the current season. It is refreshed incrementally and
+        is the only season whose data is still changing.
+    team_name_mapping : dict
+        A dictionary mapping FPL team names to actual Premier League team names.
+    stages : list of str, optional
+        The stages to build tasks for, out of STAGES (default is all stages).
+        Dependencies on stages left out are treated as satisfied.
+    session : ArtifactSession, optional
+        A per-run session used to share downloaded files between tasks.
+    force : bool, optional
+        Whether the join rebuilds every season (default is False).
+    executor : concurrent.futures.Executor, optional
+        An executor, e.g. a process pool, that completed seasons' FPL data are
+        aggregated in, so CPU-bound seasons run in parallel. Its workers read
+        the source files from the HTTP cache rather than the session. By
+        default they are aggregated in the task's thread.
+
+    Returns
+    -------
+    tasks : list of Task
+        The tasks of the refresh.
+
+    Raises
+    ------
+    ValueError
+        If a stage is not one of STAGES.
+    """
+    unknown_stages = set(stages) - set(STAGES)
+    if unknown_stages:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown_stages))}")
+
+    state = {}
+    current_season = get_season_string(current_season_start)
+    season_starts = range(first_season_start, latest_season_start + 1)
+    includes_current = current_season_start in season_starts
+
+    def fetch_gameweek():
+        state["gameweek"] = fetch_current_gameweek(current_season, session=session)
+        if state["gameweek"] is None:
+            print(
+                f"Current data up to date: {current_season} first gameweek data not "
+                "yet available."
+            )
+
+    def season_not_started():
+        return "gameweek" in state and state["gameweek"] is None
+
+    def gameweek_scored():
+        # Unknown without the current_gameweek task, so the task runs. Before
+        # the first gameweek there is nothing to score.
+        return season_not_started() or (
+            "gameweek" in state and get_scoring_gameweek() == state["gameweek"]
+        )
+
+    def season_is_up_to_date(tables, season, is_current):
+        if is_current and season_not_started():
+            return True
+        if not tables_exist(tables, season):
+            return False
+        return gameweek_scored() if is_current else True
+
+    def fpl_is_up_to_date(season, is_current):
+        if is_current and season_not_started():
+            return True
+        if not player_cube_exists(season):
+            return False
+        return season_is_up_to_date(FPL_TABLES, season, is_current)
+
+    completed_season_starts = [
+        season_start
+        for season_start in season_starts
+        if season_start != current_season_start
+    ]
+
+    def stale_completed_seasons():
+        return [
+            season_start
+            for season_start in completed_season_starts
+            if not fpl_is_up_to_date(get_season_string(season_start), False)
+        ]
+
+    tasks = []
+    if "current_gameweek" in stages and includes_current:
+        tasks.append(Task("current_gameweek", fetch_gameweek))
+
+    # The completed seasons' FPL tasks then read their files from the cache
+    prefetch = "fpl" in stages and completed_season_starts
+    if prefetch:
+        tasks.append(
+            Task(
+                "prefetch_fpl",
+                lambda: fpl_pl_table_players.prefetch_season_files(
+                    stale_completed_seasons(), immutable=True
+                ),
+                is_up_to_date=lambda: not stale_completed_seasons(),
+            )
+        )
+
+    for season_start in season_starts:
+        season = get_season_string(season_start)
+        is_current = season_start == current_season_start
+        deps = ["current_gameweek"] if is_current else []
+        fpl_deps = deps if is_current or not prefetch else ["prefetch_fpl"]
+
+        if "fpl" in stages:
+            if is_current:
+                # Only the gameweeks added since the last refresh are aggregated
+                action = partial(
+                    fpl_pl_table_players.get_current_season_fpl,
+                    season_start,
+                    session=session,
+                    incremental=True,
+                )
+            elif executor is not None:
+                action = partial(
+                    run_in_executor,
+                    executor,
+                    partial(
+                        fpl_pl_table_players.save_season_data,
+                        season_start,
+                        immutable=True,
+                    ),
+                )
+            else:
+                action = partial(
+                    fpl_pl_table_players.save_season_data,
+                    season_start,
+                    immutable=True,
+                    session=session,
+                )
+            tasks.append(
+                Task(
+                    f"fpl:{season}",
+                    action,
+                    deps=fpl_deps,
+                    is_up_to_date=partial(fpl_is_up_to_date, season, is_current),
+                )
+            )
+
+        if "actual" in stages:
+            tasks.append(
+                Task(
+                    f"actual:{season}",
+                    partial(actual_pl_table.save_season_data, season_start),
+                    deps=deps,
+                    is_up_to_date=partial(
+                        season_is_up_to_date, ACTUAL_TABLES, season, is_current
+                    ),
+                )
+            )
+
+    season_tasks = [task.name for task in tasks if ":" in task.name]
+    if "join" in stages:
+        tasks.append(
+            Task(
+                "join",
+                lambda: join_all_seasons(team_name_mapping, force=force),
+                deps=season_tasks,
+                is_up_to_date=lambda: not get_stale_seasons(team_name_mapping),
+            )
+        )
+
+    if "metadata" in stages and includes_current:
+
+        def update_metadata():
+            if state.get("gameweek") is None:
+                raise ValueError(
+                    "The current gameweek is unknown, run the current_gameweek "
+                    "stage after the first gameweek to update the metadata."
+                )
+            save_scoring_meta(state["gameweek"])
+
+        tasks.append(
+            Task(
+                "metadata",
+                update_metadata,
+                deps=[
+                    "current_gameweek",
+                    f"fpl:{current_season}",
+                    f"actual:{current_season}",
+                    "join",
+                ],
+                is_up_to_date=gameweek_scored,
+            )
+        )
+
+    if "manifest" in stages:
+        tasks.append(
+            Task(
+                "manifest",
+                lambda: save_dashboard_manifest(build_dashboard_manifest()),
+                # Written last, so it describes the data of the whole run
+                deps=[task.name for task in tasks],
+                is_up_to_date=dashboard_manifest_is_up_to_date,
+            )
+        )
+
+    return tasks
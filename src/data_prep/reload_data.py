@@ -1,17 +1,8 @@
-import pandas as pd
-from src.tools.yaml_loader import load_yaml_file
-from src.data_prep.fpl_pl_table_players import (
-    get_completed_seasons_fpl,
-    get_current_season_fpl,
-)
-from src.data_prep.actual_pl_table import (
-    get_completed_seasons_actual,
-    get_current_season_actual,
-)
+import requests
+from src.data_prep.fpl_pl_table_players import fetch_merged_gw
+from src.data_prep.storage import SCORING_META_PATH
 from datetime import datetime
-import sys
 import json
-from src.tools.season_string import get_season_string
 
 
 def get_current_season_start_year():
@@ -33,64 +24,76 @@ def get_current_season_start_year():
         return current_year - 1
 
 
-def get_current_gameweek(season_string):
+def fetch_current_gameweek(season_string, session=None):
     """
-    Fetch the latest scored gameweek from the Fantasy Premier League data source.
+    Fetch the latest gameweek in the Fantasy Premier League data source.
 
     Parameters
     ----------
     season_string : str
         The season string in the format 'YYYY-YY'.
+    session : ArtifactSession, optional
+        A per-run session. Passing the same session to get_current_season_fpl
+        reuses the downloaded merged gameweek data instead of fetching it again.
 
     Returns
     -------
-    current_gameweek : int
-        The latest gameweek number.
+    current_gameweek : int or None
+        The latest gameweek number, or None if the season's data has not been
+        published yet, i.e. before the first gameweek is played.
+
+    Raises
+    ------
+    requests.exceptions.RequestException
+        If the season's data cannot be fetched for any other reason.
     """
     try:
-        df = pd.read_csv(
-            f"https://raw.githubusercontent.com/vaastav/Fantasy-Premier-League/master/data/{season_string}/gws/merged_gw.csv",
-            encoding="utf-8",
-        )
-        return int(df["GW"].max())
-    except Exception as e:
-        print(
-            f"Current data up to date: First Gameweek data not yet available. Error: {e}"
-        )
-        sys.exit()  # Exit the script
-
-
-def check_and_update_metadata(current_gameweek):
-    """
-    Check if the current gameweek has been scored.
+        df = fetch_merged_gw(season_string, session=session, columns=["GW"])
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return None
+        raise
+    if df.empty:
+        return None
+    return int(df["GW"].max())
 
-    This is logged in the data/scoring_meta.json each time the data is scored. The latest
-    gameweek in the source data is compared with this. If they match (i.e. the latest
-    game week has been scored), the script is stopped running, otherwise, the script
-    continues.
+
+def get_scoring_gameweek(file_path=SCORING_META_PATH):
+    """
+    Get the gameweek the data was last scored for.
 
     Parameters
     ----------
-    current_gameweek : int
-        The latest gameweek number to compare against the metadata.
+    file_path : str, optional
+        The path to the metadata file (default is 'data/scoring_meta.json').
 
     Returns
     -------
-    None
+    scoring_gameweek : int or None
+        The gameweek logged in the metadata, or None if there is none.
     """
-    # File path to the metadata
-    file_path = "data/scoring_meta.json"
+    try:
+        with open(file_path, "r") as file:
+            return json.load(file).get("scoring_data_gameweek")
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
 
-    # Read the JSON data from the file
-    with open(file_path, "r") as file:
-        scoring_meta = json.load(file)
+def save_scoring_meta(current_gameweek, file_path=SCORING_META_PATH):
+    """
+    Log the gameweek the data has been scored for.
 
-    # Check if the metadata is up to date
-    if scoring_meta.get("scoring_data_gameweek") == current_gameweek:
-        print("Model training up to date.")
-        sys.exit()  # Exit the script
+    Parameters
+    ----------
+    current_gameweek : int
+        The latest scored gameweek.
+    file_path : str, optional
+        The path to the metadata file (default is 'data/scoring_meta.json').
 
-    # Store metadata for the latest scoring
+    Returns
+    -------
+    None
+    """
     scoring_meta = {"scoring_data_gameweek": current_gameweek}
     with open(file_path, "w") as file:
         json.dump(scoring_meta, file)
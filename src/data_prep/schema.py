@@ -0,0 +1,187 @@
+import pandas as pd
+
+COUNT_COLUMNS = [
+    "goals_scored",
+    "assists",
+    "clean_sheets",
+    "yellow_cards",
+    "red_cards",
+    "goals_conceded",
+    "own_goals",
+    "penalties_missed",
+    "penalties_saved",
+    "saves",
+    "bonus_points",
+]
+
+COUNT_DISPLAY_COLUMNS = [
+    "Goals Scored",
+    "Assists",
+    "Clean Sheets",
+    "Yellow Cards",
+    "Red Cards",
+    "Goals Conceded",
+    "Own Goals",
+    "Penalties Missed",
+    "Penalties Saved",
+    "Saves",
+    "Bonus Points",
+]
+
+# Compact dtypes shared by the tables. Season totals of a count fit in int16,
+# points totals of a team may not, and league positions and gameweeks fit in
+# int8.
+COUNT_DTYPE = "int16"
+POINTS_DTYPE = "int32"
+POSITION_DTYPE = "int8"
+GAMEWEEK_DTYPE = "int8"
+
+# The merged_gw.csv columns used by the FPL tables and the player cube, with
+# the dtypes they are read as. Older seasons have no 'team' or 'position'
+# column, these are added from the players_raw.csv of the season.
+MERGED_GW_DTYPES = {
+    "name": "category",
+    "team": "category",
+    "position": "category",
+    "element": "int32",
+    "GW": GAMEWEEK_DTYPE,
+    "minutes": "int16",
+    "value": "int16",
+    "total_points": "int16",
+    "goals_scored": "int8",
+    "assists": "int8",
+    "clean_sheets": "int8",
+    "yellow_cards": "int8",
+    "red_cards": "int8",
+    "goals_conceded": "int8",
+    "own_goals": "int8",
+    "penalties_missed": "int8",
+    "penalties_saved": "int8",
+    "saves": "int16",
+    "bonus": "int8",
+}
+
+# Column dtypes of each table, keyed by the table's folder under data/. The
+# pipeline applies them to the frames it builds, not only to saved files, so
+# every stage and every dashboard session holds the compact columns.
+TABLE_SCHEMAS = {
+    "fpl_premier_league_tables": {
+        "team": "category",
+        "total_points": POINTS_DTYPE,
+        "gk_points": POINTS_DTYPE,
+        "def_points": POINTS_DTYPE,
+        "mid_points": POINTS_DTYPE,
+        "fwd_points": POINTS_DTYPE,
+        **{column: COUNT_DTYPE for column in COUNT_COLUMNS},
+        "value_latest_gw": POINTS_DTYPE,
+    },
+    "fpl_team_history": {
+        "team": "category",
+        "GW": GAMEWEEK_DTYPE,
+        "total_points": POINTS_DTYPE,
+        "gk_points": POINTS_DTYPE,
+        "def_points": POINTS_DTYPE,
+        "mid_points": POINTS_DTYPE,
+        "fwd_points": POINTS_DTYPE,
+        **{column: COUNT_DTYPE for column in COUNT_COLUMNS},
+    },
+    "fpl_premier_league_player_data": {
+        "Player Name": "object",
+        "Team": "category",
+        "Total Points": COUNT_DTYPE,
+        "Position": "category",
+        **{column: COUNT_DTYPE for column in COUNT_DISPLAY_COLUMNS},
+        "Teams": "object",
+        "element": "int32",
+        "code": "Int32",
+    },
+    "actual_premier_league_tables": {
+        "Pos": POSITION_DTYPE,
+        "Team": "category",
+        "Pts": "int16",
+    },
+    "fpl_premier_league_tables_joined": {
+        "Pos": POSITION_DTYPE,
+        "Team": "category",
+        "Points": POINTS_DTYPE,
+        "Actual Pos": POSITION_DTYPE,
+        "Difference": POSITION_DTYPE,
+        "GK Points": POINTS_DTYPE,
+        "DEF Points": POINTS_DTYPE,
+        "MID Points": POINTS_DTYPE,
+        "FWD Points": POINTS_DTYPE,
+        **{column: COUNT_DTYPE for column in COUNT_DISPLAY_COLUMNS},
+    },
+}
+
+
+def parse_rank_difference(difference):
+    """
+    Parse rank differences saved as display strings, e.g. '⬆️ +2' or ' '.
+
+    Joined tables written before the difference was stored as a number hold
+    these strings.
+
+    Parameters
+    ----------
+    difference : pd.Series
+        The display strings.
+
+    Returns
+    -------
+    difference : pd.Series
+        The differences as numbers, 0 for a blank string.
+    """
+    numbers = difference.astype(str).str.extract(r"([+-]?\d+)", expand=False)
+    return pd.to_numeric(numbers).fillna(0)
+
+
+# Parsers of columns saved in an older format, applied to columns read as strings
+LEGACY_PARSERS = {
+    "fpl_premier_league_tables_joined": {"Difference": parse_rank_difference},
+}
+
+
+def apply_schema(df, table):
+    """
+    Cast the columns of a DataFrame to the dtypes in the table's schema.
+
+    Columns that are not in the schema are left unchanged. Columns saved in an
+    older format are parsed first, see LEGACY_PARSERS.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The DataFrame to cast.
+    table : str
+        The table name, i.e. its folder under data/.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The DataFrame with the schema's dtypes.
+
+    Raises
+    ------
+    KeyError
+        If the table has no schema.
+    """
+    schema = TABLE_SCHEMAS[table]
+    legacy_columns = {
+        column: parse
+        for column, parse in LEGACY_PARSERS.get(table, {}).items()
+        if column in df.columns and df[column].dtype == object
+    }
+    if legacy_columns:
+        df = df.assign(
+            **{column: parse(df[column]) for column, parse in legacy_columns.items()}
+        )
+
+    dtypes = {
+        column: dtype
+        for column, dtype in schema.items()
+        if column in df.columns and df[column].dtype != dtype
+    }
+    if not dtypes:
+        return df
+    return df.astype(dtypes)
@@ -0,0 +1,196 @@
+import os
+
+import pandas as pd
+
+from src.data_prep.schema import apply_schema
+
+DATA_DIR = "data"
+DEFAULT_FORMAT = "parquet"
+FILE_EXTENSIONS = {"parquet": ".parquet", "csv": ".csv"}
+# The gameweek the data was last scored for, logged by the refresh
+SCORING_META_PATH = "data/scoring_meta.json"
+
+
+def table_path(table, season, fmt=DEFAULT_FORMAT, data_dir=DATA_DIR):
+    """
+    Get the file path of a season's table.
+
+    Parameters
+    ----------
+    table : str
+        The table name, i.e. its folder under data/.
+    season : str
+        The season string in the format "YYYY-YY".
+    fmt : str, optional
+        The file format, 'parquet' or 'csv' (default is 'parquet').
+    data_dir : str, optional
+        The data directory (default is 'data').
+
+    Returns
+    -------
+    path : str
+        The file path of the table.
+    """
+    return os.path.join(data_dir, table, f"{season}{FILE_EXTENSIONS[fmt]}")
+
+
+def find_table_file(table, season, data_dir=DATA_DIR):
+    """
+    Get the path of the file a season's table is loaded from.
+
+    Parameters
+    ----------
+    table : str
+        The table name, i.e. its folder under data/.
+    season : str
+        The season string in the format "YYYY-YY".
+    data_dir : str, optional
+        The data directory (default is 'data').
+
+    Returns
+    -------
+    path : str or None
+        The Parquet file if it exists, otherwise the CSV file if it exists,
+        otherwise None.
+    """
+    for fmt in ["parquet", "csv"]:
+        path = table_path(table, season, fmt, data_dir)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def csv_encoding(table, season):
+    """
+    Get the encoding of a table's CSV file.
+
+    Player names in seasons up to 2018-19 are stored as latin-1.
+
+    Parameters
+    ----------
+    table : str
+        The table name, i.e. its folder under data/.
+    season : str
+        The season string in the format "YYYY-YY".
+
+    Returns
+    -------
+    encoding : str
+        The encoding of the CSV file.
+    """
+    if table == "fpl_premier_league_player_data" and int(season[:4]) <= 2018:
+        return "latin-1"
+    return "utf-8"
+
+
+def save_table(
+    df, table, season, fmt=DEFAULT_FORMAT, export_csv=False, data_dir=DATA_DIR
+):
+    """
+    Save a season's table with the table's schema applied.
+
+    Saving as Parquet removes any CSV copy of the table, unless `export_csv` is
+    set, so a stale CSV is never left next to the current data.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The table to save.
+    table : str
+        The table name, i.e. its folder under data/.
+    season : str
+        The season string in the format "YYYY-YY".
+    fmt : str, optional
+        The file format, 'parquet' or 'csv' (default is 'parquet').
+    export_csv : bool, optional
+        Whether to also save a CSV copy alongside the Parquet file (default is
+        False).
+    data_dir : str, optional
+        The data directory (default is 'data').
+
+    Returns
+    -------
+    None
+    """
+    df = apply_schema(df, table)
+    os.makedirs(os.path.join(data_dir, table), exist_ok=True)
+
+    if fmt == "parquet":
+        df.to_parquet(table_path(table, season, "parquet", data_dir), index=False)
+        csv_path = table_path(table, season, "csv", data_dir)
+        if not export_csv and os.path.exists(csv_path):
+            os.remove(csv_path)
+
+    if fmt == "csv" or export_csv:
+        df.to_csv(
+            table_path(table, season, "csv", data_dir),
+            index=False,
+            encoding=csv_encoding(table, season),
+        )
+
+
+def load_table(table, season, columns=None, data_dir=DATA_DIR):
+    """
+    Load a season's table, preferring Parquet over CSV.
+
+    Parameters
+    ----------
+    table : str
+        The table name, i.e. its folder under data/.
+    season : str
+        The season string in the format "YYYY-YY".
+    columns : list of str, optional
+        The columns to load. All columns are loaded by default.
+    data_dir : str, optional
+        The data directory (default is 'data').
+
+    Returns
+    -------
+    df : pd.DataFrame
+        The table with the table's schema applied.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the table is not saved in either format.
+    """
+    path = find_table_file(table, season, data_dir)
+    if path is not None and path.endswith(FILE_EXTENSIONS["parquet"]):
+        # Files saved with an older schema are converted, otherwise a no-op
+        return apply_schema(pd.read_parquet(path, columns=columns), table)
+
+    df = pd.read_csv(
+        table_path(table, season, "csv", data_dir),
+        usecols=columns,
+        encoding=csv_encoding(table, season),
+    )
+    return apply_schema(df, table)
+
+
+def list_seasons(table, data_dir=DATA_DIR):
+    """
+    List the seasons saved for a table, in either format.
+
+    Parameters
+    ----------
+    table : str
+        The table name, i.e. its folder under data/.
+    data_dir : str, optional
+        The data directory (default is 'data').
+
+    Returns
+    -------
+    seasons : list of str
+        The season strings, in directory listing order without duplicates.
+        Empty if nothing has been saved for the table yet.
+    """
+    folder = os.path.join(data_dir, table)
+    if not os.path.isdir(folder):
+        return []
+
+    seasons = {}
+    for file_name in os.listdir(folder):
+        season, extension = os.path.splitext(file_name)
+        if extension in FILE_EXTENSIONS.values():
+            seasons[season] = None
+    return list(seasons)
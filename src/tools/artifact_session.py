@@ -0,0 +1,48 @@
+import threading
+
+
+class ArtifactSession:
+    """
+    Per-run store of fetched and parsed artifacts.
+
+    A refresh creates one session and passes it to every stage, so an artifact
+    needed by several stages (e.g. the current season's merged_gw.csv) is only
+    fetched and parsed once. Artifacts are shared between callers and must be
+    treated as read-only.
+    """
+
+    def __init__(self):
+        self._artifacts = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        """
+        Return the artifact stored under key, creating it on first use.
+
+        Parameters
+        ----------
+        key : hashable
+            The key identifying the artifact.
+        factory : callable
+            A zero-argument callable that creates the artifact.
+
+        Returns
+        -------
+        artifact : object
+            The stored artifact.
+        """
+        # Lock per key, so different artifacts can be created concurrently
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            if key not in self._artifacts:
+                self._artifacts[key] = factory()
+            return self._artifacts[key]
+
+    def __contains__(self, key):
+        return key in self._artifacts
+
+    def __len__(self):
+        return len(self._artifacts)
@@ -0,0 +1,492 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+
+from src.tools.http_client import get_default_client
+from src.tools.profiling import span
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows, no locks between processes
+    fcntl = None
+
+DEFAULT_CACHE_DIR = ".cache/http"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+INDEX_FILE_NAME = "index.json"
+LOCK_FILE_NAME = "index.lock"
+
+# Guards read-modify-write cycles on the index when fetching from several
+# threads, and the pins below. Other processes sharing the cache are kept out
+# by a file lock, see _locked_index.
+_index_lock = threading.Lock()
+
+# The digests of blobs that must not be evicted: those of fetches in flight,
+# counted per fetch, and those fetched while a hold_cached_files block is open.
+# Blobs in use are also opened with a shared file lock, which evictions in
+# other processes check, see _share_blob.
+_pins = Counter()
+_holds = {"count": 0, "digests": set(), "files": []}
+
+
+def _index_path(cache_dir):
+    return os.path.join(cache_dir, INDEX_FILE_NAME)
+
+
+def _blob_path(cache_dir, digest):
+    return os.path.join(cache_dir, "blobs", digest[:2], digest)
+
+
+def load_index(cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Load the cache index mapping URLs to cached entries.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        The directory holding the cache (default is '.cache/http').
+
+    Returns
+    -------
+    index : dict
+        A dictionary keyed by URL. Each entry holds the content digest, size,
+        validators (ETag / Last-Modified), last access time and immutable flag.
+    """
+    try:
+        with open(_index_path(cache_dir), "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_index(cache_dir, index):
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{_index_path(cache_dir)}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(index, file)
+    os.replace(tmp_path, _index_path(cache_dir))
+
+
+@contextmanager
+def _locked_index(cache_dir):
+    """
+    Lock the index against fetches from other threads and other processes.
+    """
+    with _index_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(os.path.join(cache_dir, LOCK_FILE_NAME), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+
+def _share_blob(cache_dir, digest):
+    """
+    Open a blob with a shared lock, so no process evicts it until the file is
+    closed. Returns None if the blob is missing. Must be called with the index
+    locked.
+    """
+    try:
+        file = open(_blob_path(cache_dir, digest), "rb")
+    except FileNotFoundError:
+        return None
+    if fcntl is not None:
+        fcntl.flock(file, fcntl.LOCK_SH)
+    return file
+
+
+def _remove_blob(cache_dir, digest):
+    """
+    Delete a blob unless it is in use. Returns whether it is gone. Must be
+    called with the index locked.
+    """
+    path = _blob_path(cache_dir, digest)
+    try:
+        file = open(path, "rb")
+    except FileNotFoundError:
+        return True
+    with file:
+        if fcntl is not None:
+            try:
+                fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+        os.remove(path)
+    return True
+
+
+def _write_blob(cache_dir, chunks, pin):
+    """
+    Stream chunks of content into the cache and return its digest and size.
+
+    The blob is moved into place and pinned with `pin` under the index lock,
+    so it is never seen unreferenced and unpinned by an eviction.
+    """
+    blob_dir = os.path.join(cache_dir, "blobs")
+    os.makedirs(blob_dir, exist_ok=True)
+    tmp_path = os.path.join(blob_dir, f"{os.getpid()}.{threading.get_ident()}.tmp")
+
+    digest = hashlib.sha256()
+    size = 0
+    with open(tmp_path, "wb") as file:
+        for chunk in chunks:
+            digest.update(chunk)
+            size += len(chunk)
+            file.write(chunk)
+
+    digest = digest.hexdigest()
+    path = _blob_path(cache_dir, digest)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _locked_index(cache_dir):
+        os.replace(tmp_path, path)
+        pin(digest)
+    return digest, size
+
+
+def _pinned_digests():
+    # Must be called with _index_lock held
+    return set(_pins) | _holds["digests"]
+
+
+@contextmanager
+def hold_cached_files():
+    """
+    Keep the files fetched in the block from being evicted until it exits.
+
+    Fetches from other threads and processes can evict any entry that is not
+    in use, so a path returned by fetch_url_to_file is only safe to read while
+    no other fetch runs. Files fetched while any block is open, from any thread
+    of the process, stay on disk until the last open block exits. Eviction of
+    them is left to the first fetch after that.
+
+    Yields
+    ------
+    None
+    """
+    with _index_lock:
+        _holds["count"] += 1
+    try:
+        yield
+    finally:
+        with _index_lock:
+            _holds["count"] -= 1
+            if not _holds["count"]:
+                _holds["digests"].clear()
+                for file in _holds["files"]:
+                    file.close()
+                _holds["files"].clear()
+
+
+def evict(
+    index,
+    cache_dir=DEFAULT_CACHE_DIR,
+    max_bytes=DEFAULT_MAX_BYTES,
+    keep=None,
+    pinned=(),
+):
+    """
+    Evict least recently used entries until the cache fits within the size cap.
+
+    Immutable entries are pinned and never evicted. Blobs are content-addressed,
+    so a blob is only deleted once no remaining entry references it. Entries
+    whose blob another process has in use are not evicted. Blobs no entry
+    references, e.g. the old content of a URL that changed, are deleted first,
+    unless they are in use. Must be called with the index locked.
+
+    Parameters
+    ----------
+    index : dict
+        The cache index, modified in place.
+    cache_dir : str, optional
+        The directory holding the cache (default is '.cache/http').
+    max_bytes : int, optional
+        The maximum total size of cached content in bytes.
+    keep : str, optional
+        A URL whose entry must not be evicted, e.g. the one just fetched.
+    pinned : collection of str, optional
+        The digests of blobs in use, e.g. by fetches in flight in other
+        threads. Entries referencing them are not evicted.
+
+    Returns
+    -------
+    evicted : list of str
+        The URLs whose entries were evicted.
+    """
+    sizes = {entry["digest"]: entry["size"] for entry in index.values()}
+    total_bytes = sum(sizes.values())
+
+    blob_dir = os.path.join(cache_dir, "blobs")
+    if os.path.isdir(blob_dir):
+        for prefix in os.scandir(blob_dir):
+            if not prefix.is_dir():
+                continue
+            for blob in os.scandir(prefix.path):
+                if blob.name not in sizes and blob.name not in pinned:
+                    _remove_blob(cache_dir, blob.name)
+
+    evicted = []
+    candidates = sorted(
+        (
+            url
+            for url, entry in index.items()
+            if not entry.get("immutable")
+            and url != keep
+            and entry["digest"] not in pinned
+        ),
+        key=lambda url: index[url]["last_access"],
+    )
+    for url in candidates:
+        if total_bytes <= max_bytes:
+            break
+        digest = index[url]["digest"]
+        if all(
+            entry["digest"] != digest
+            for other_url, entry in index.items()
+            if other_url != url
+        ):
+            if not _remove_blob(cache_dir, digest):
+                continue
+            total_bytes -= sizes[digest]
+        del index[url]
+        evicted.append(url)
+
+    return evicted
+
+
+def fetch_url_to_file(
+    url,
+    cache_dir=DEFAULT_CACHE_DIR,
+    max_bytes=DEFAULT_MAX_BYTES,
+    immutable=False,
+    client=None,
+):
+    """
+    Fetch a URL through the on-disk HTTP cache and return the cached file path.
+
+    Cached entries are revalidated with a conditional request (ETag /
+    Last-Modified), so unchanged files cost a 304 response rather than a full
+    download. Entries marked immutable (e.g. completed seasons) are served from
+    disk without any network request and are never evicted. Downloads are
+    streamed to disk, so the response body is never held in memory.
+
+    Parameters
+    ----------
+    url : str
+        The URL to fetch.
+    cache_dir : str, optional
+        The directory holding the cache (default is '.cache/http').
+    max_bytes : int, optional
+        The maximum total size of cached content in bytes.
+    immutable : bool, optional
+        Whether the content at this URL is known never to change (default is False).
+    client : HttpClient, optional
+        The client to send requests through (default is the shared client).
+
+    Returns
+    -------
+    path : str
+        The path of the cached file holding the response body. The file must not
+        be modified. Fetches from other threads and processes may evict it once
+        this returns, unless it was fetched in a hold_cached_files block.
+
+    Raises
+    ------
+    requests.exceptions.RequestException
+        If the HTTP request fails.
+    """
+    with _fetch_pinned(url, cache_dir, max_bytes, immutable, client) as path:
+        return path
+
+
+@contextmanager
+def _fetch_pinned(url, cache_dir, max_bytes, immutable, client):
+    """
+    Fetch a URL through the cache, yielding the cached file path. The blob is
+    pinned against eviction by other threads and processes until the block
+    exits.
+    """
+    # The digest and shared file of each pin of the fetch
+    pinned = []
+
+    def pin(digest):
+        # Must be called with the index locked. Returns False if the blob is
+        # missing.
+        file = _share_blob(cache_dir, digest)
+        if file is None:
+            return False
+        _pins[digest] += 1
+        pinned.append((digest, file))
+        if _holds["count"] and digest not in _holds["digests"]:
+            _holds["digests"].add(digest)
+            _holds["files"].append(_share_blob(cache_dir, digest))
+        return True
+
+    def unpin(digest):
+        # Must be called with _index_lock held
+        for i, (pinned_digest, file) in enumerate(pinned):
+            if pinned_digest == digest:
+                del pinned[i]
+                file.close()
+                _pins[digest] -= 1
+                if not _pins[digest]:
+                    del _pins[digest]
+                return
+
+    try:
+        with span("http_fetch", url=url) as fetch_span:
+            with _locked_index(cache_dir):
+                entry = load_index(cache_dir).get(url)
+                # A cached blob may be reused on a 304 response
+                if entry is not None and not pin(entry["digest"]):
+                    entry = None
+            cached_digest = entry["digest"] if entry is not None else None
+
+            # Immutable hits are never evicted, so the index is left as it is
+            save_entry = entry is None or not entry.get("immutable")
+            if entry is None or not (entry.get("immutable") or immutable):
+                headers = {}
+                if entry is not None:
+                    if entry.get("etag"):
+                        headers["If-None-Match"] = entry["etag"]
+                    if entry.get("last_modified"):
+                        headers["If-Modified-Since"] = entry["last_modified"]
+
+                client = client or get_default_client()
+                with client.stream(url, headers=headers) as response:
+                    if entry is None or response.status_code != 304:
+                        response.raise_for_status()
+                        digest, size = _write_blob(
+                            cache_dir,
+                            response.iter_content(chunk_size=1024 * 1024),
+                            pin,
+                        )
+                        fetch_span.set(status="downloaded")
+                        fetch_span.add(bytes_downloaded=size)
+                        entry = {
+                            "digest": digest,
+                            "size": size,
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                        }
+                    else:
+                        fetch_span.set(status="not modified")
+            else:
+                fetch_span.set(status="cached")
+
+        if save_entry:
+            entry["last_access"] = time.time()
+            entry["immutable"] = bool(entry.get("immutable") or immutable)
+            with _locked_index(cache_dir):
+                # The replaced content is no longer needed by this fetch, so
+                # the eviction below deletes it unless it is in use elsewhere
+                if cached_digest not in (None, entry["digest"]):
+                    unpin(cached_digest)
+                index = load_index(cache_dir)
+                index[url] = entry
+                evict(
+                    index,
+                    cache_dir=cache_dir,
+                    max_bytes=max_bytes,
+                    keep=url,
+                    pinned=_pinned_digests(),
+                )
+                _save_index(cache_dir, index)
+
+        yield _blob_path(cache_dir, entry["digest"])
+    finally:
+        with _index_lock:
+            for digest, _ in list(pinned):
+                unpin(digest)
+
+
+def fetch_url(
+    url,
+    cache_dir=DEFAULT_CACHE_DIR,
+    max_bytes=DEFAULT_MAX_BYTES,
+    immutable=False,
+    client=None,
+):
+    """
+    Fetch the content of a URL through the on-disk HTTP cache.
+
+    See fetch_url_to_file for the caching behaviour.
+
+    Parameters
+    ----------
+    url : str
+        The URL to fetch.
+    cache_dir : str, optional
+        The directory holding the cache (default is '.cache/http').
+    max_bytes : int, optional
+        The maximum total size of cached content in bytes.
+    immutable : bool, optional
+        Whether the content at this URL is known never to change (default is False).
+    client : HttpClient, optional
+        The client to send requests through (default is the shared client).
+
+    Returns
+    -------
+    content : bytes
+        The response body.
+
+    Raises
+    ------
+    requests.exceptions.RequestException
+        If the HTTP request fails.
+    """
+    with _fetch_pinned(url, cache_dir, max_bytes, immutable, client) as path:
+        with open(path, "rb") as file:
+            return file.read()
+
+
+def fetch_urls_to_files(
+    urls,
+    cache_dir=DEFAULT_CACHE_DIR,
+    max_bytes=DEFAULT_MAX_BYTES,
+    immutable=False,
+    client=None,
+):
+    """
+    Fetch a batch of URLs through the on-disk HTTP cache concurrently.
+
+    The downloads run at once, up to the client's limit of requests per host.
+    See fetch_url_to_file for the caching behaviour.
+
+    Parameters
+    ----------
+    urls : iterable of str
+        The URLs to fetch.
+    cache_dir : str, optional
+        The directory holding the cache (default is '.cache/http').
+    max_bytes : int, optional
+        The maximum total size of cached content in bytes.
+    immutable : bool, optional
+        Whether the content at these URLs is known never to change (default is
+        False).
+    client : HttpClient, optional
+        The client to send requests through (default is the shared client).
+
+    Returns
+    -------
+    paths : dict
+        A dictionary mapping each URL fetched to the path of its cached file.
+    errors : dict
+        A dictionary mapping each URL that failed to its exception.
+    """
+    client = client or get_default_client()
+    # The batch's downloads must not evict each other before they are returned
+    fetch = partial(
+        fetch_url_to_file,
+        cache_dir=cache_dir,
+        max_bytes=max_bytes,
+        immutable=immutable,
+        client=client,
+    )
+    with hold_cached_files():
+        return client.fetch_all(urls, fetch=fetch)
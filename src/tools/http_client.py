@@ -0,0 +1,319 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Connect and read timeouts in seconds
+DEFAULT_TIMEOUT = (10, 60)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+MAX_BACKOFF = 30
+DEFAULT_HOST_LIMIT = 4
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# The client shared by every fetch in the process. Created on first use.
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+class RequestsTransport:
+    """
+    Sends HTTP requests over a pooled requests.Session, so connections to the
+    same host are kept alive and reused.
+
+    Any object with the same send() and close() methods can be given to
+    HttpClient as its transport, e.g. to record requests in tests.
+    """
+
+    def __init__(self, pool_maxsize=DEFAULT_HOST_LIMIT):
+        """
+        Parameters
+        ----------
+        pool_maxsize : int, optional
+            The number of connections kept alive per host (default is 4).
+        """
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def send(self, method, url, **kwargs):
+        """
+        Send a request.
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method, e.g. 'GET'.
+        url : str
+            The URL to request.
+        **kwargs
+            Passed to requests.Session.request, e.g. 'headers', 'params',
+            'stream' and 'timeout'.
+
+        Returns
+        -------
+        response : requests.Response
+            The response.
+        """
+        return self.session.request(method, url, **kwargs)
+
+    def close(self):
+        """
+        Close the pooled connections.
+
+        Returns
+        -------
+        None
+        """
+        self.session.close()
+
+
+class HttpClient:
+    """
+    The fetch layer shared by every external request of the pipeline.
+
+    Requests are sent through a pluggable transport, with a timeout, retries
+    with exponential backoff on connection errors and on 429 and 5xx
+    responses, and a limit on the number of requests in flight per host. The
+    client is thread-safe, and fetch_all() runs a batch of fetches
+    concurrently from asyncio.
+    """
+
+    def __init__(
+        self,
+        transport=None,
+        timeout=DEFAULT_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        host_limit=DEFAULT_HOST_LIMIT,
+    ):
+        """
+        Parameters
+        ----------
+        transport : object, optional
+            The transport requests are sent through, with send(method, url,
+            **kwargs) and close() methods (default is a RequestsTransport).
+        timeout : float or tuple, optional
+            The connect and read timeouts in seconds (default is (10, 60)).
+        retries : int, optional
+            The number of times a failed request is retried (default is 3).
+        backoff : float, optional
+            The delay before the first retry in seconds, doubled on each
+            further retry (default is 0.5). A Retry-After header, if given in
+            seconds, takes precedence.
+        host_limit : int, optional
+            The maximum number of requests in flight per host (default is 4).
+        """
+        self.transport = transport or RequestsTransport(pool_maxsize=host_limit)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.host_limit = host_limit
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.host_limit)
+            return self._host_slots[host]
+
+    def _retry_delay(self, attempt, response=None):
+        # A Response is falsy for error statuses, so compare against None
+        retry_after = (
+            response.headers.get("Retry-After") if response is not None else None
+        )
+        if retry_after is not None and retry_after.isdigit():
+            return min(int(retry_after), MAX_BACKOFF)
+        return min(self.backoff * 2**attempt, MAX_BACKOFF)
+
+    def _send(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            is_last = attempt == self.retries
+            try:
+                response = self.transport.send(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if is_last:
+                    raise
+                time.sleep(self._retry_delay(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or is_last:
+                return response
+            response.close()
+            time.sleep(self._retry_delay(attempt, response))
+
+    def get(self, url, params=None, headers=None):
+        """
+        Send a GET request and read the whole response body.
+
+        Parameters
+        ----------
+        url : str
+            The URL to request.
+        params : dict, optional
+            The query parameters.
+        headers : dict, optional
+            The request headers.
+
+        Returns
+        -------
+        response : requests.Response
+            The response, after any retries. Its status is not checked.
+
+        Raises
+        ------
+        requests.exceptions.RequestException
+            If the request still fails to connect or times out after retrying.
+        """
+        with self._host_slot(url):
+            response = self._send("GET", url, params=params, headers=headers)
+            response.content  # Read the body while holding the host slot
+        return response
+
+    @contextmanager
+    def stream(self, url, params=None, headers=None):
+        """
+        Send a GET request and stream the response body.
+
+        The host slot is held until the enclosed code finishes reading the body.
+
+        Parameters
+        ----------
+        url : str
+            The URL to request.
+        params : dict, optional
+            The query parameters.
+        headers : dict, optional
+            The request headers.
+
+        Yields
+        ------
+        response : requests.Response
+            The response, after any retries, with its body not yet read. Its
+            status is not checked.
+
+        Raises
+        ------
+        requests.exceptions.RequestException
+            If the request still fails to connect or times out after retrying.
+        """
+        with self._host_slot(url):
+            response = self._send(
+                "GET", url, params=params, headers=headers, stream=True
+            )
+            with response:
+                yield response
+
+    async def fetch_all_async(self, urls, fetch=None):
+        """
+        Fetch a batch of URLs concurrently.
+
+        Each fetch runs in a worker thread, and the host limit bounds how many
+        requests to one host are in flight at once.
+
+        Parameters
+        ----------
+        urls : iterable of str
+            The URLs to fetch.
+        fetch : callable, optional
+            Called with each URL to fetch it (default is get). It should send
+            its requests through this client for the host limit to apply.
+
+        Returns
+        -------
+        results : dict
+            A dictionary mapping each URL to the result of its fetch.
+        errors : dict
+            A dictionary mapping each URL whose fetch failed to its exception.
+        """
+        urls = list(dict.fromkeys(urls))
+        fetch = fetch or self.get
+        outcomes = await asyncio.gather(
+            *(asyncio.to_thread(fetch, url) for url in urls), return_exceptions=True
+        )
+
+        results = {}
+        errors = {}
+        for url, outcome in zip(urls, outcomes):
+            if isinstance(outcome, Exception):
+                errors[url] = outcome
+            else:
+                results[url] = outcome
+        return results, errors
+
+    def fetch_all(self, urls, fetch=None):
+        """
+        Fetch a batch of URLs concurrently, from synchronous code.
+
+        See fetch_all_async, which this runs in a new event loop.
+
+        Parameters
+        ----------
+        urls : iterable of str
+            The URLs to fetch.
+        fetch : callable, optional
+            Called with each URL to fetch it (default is get).
+
+        Returns
+        -------
+        results : dict
+            A dictionary mapping each URL to the result of its fetch.
+        errors : dict
+            A dictionary mapping each URL whose fetch failed to its exception.
+        """
+        return asyncio.run(self.fetch_all_async(urls, fetch=fetch))
+
+    def close(self):
+        """
+        Close the transport.
+
+        Returns
+        -------
+        None
+        """
+        self.transport.close()
+
+
+def get_default_client():
+    """
+    Get the client shared by every fetch in the process, creating it if needed.
+
+    Returns
+    -------
+    client : HttpClient
+        The shared client.
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
+
+
+def set_default_client(client):
+    """
+    Replace the client shared by every fetch in the process.
+
+    Parameters
+    ----------
+    client : HttpClient or None
+        The new shared client. If None, a default client is created on next use.
+
+    Returns
+    -------
+    previous : HttpClient or None
+        The client that was shared before, which is not closed.
+    """
+    global _default_client
+    with _default_client_lock:
+        previous = _default_client
+        _default_client = client
+        return previous
@@ -0,0 +1,525 @@
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+DEFAULT_PROFILE_DIR = ".cache/profiles"
+
+# The profiler spans are recorded to, if any. Set with Profiler.activate.
+_active_profiler = None
+
+
+class Span:
+    """
+    One timed stage or network call of a run.
+
+    Wall time is measured by the profiler. Bytes downloaded and rows processed
+    are counted by the code inside the span with add().
+    """
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.seconds = None
+        self.bytes_downloaded = 0
+        self.rows = 0
+        self.peak_bytes = None
+        self.frames = {}
+        self.children = []
+
+    def add(self, bytes_downloaded=0, rows=0):
+        """
+        Add to the bytes downloaded and rows processed within the span.
+
+        Parameters
+        ----------
+        bytes_downloaded : int, optional
+            The number of bytes downloaded.
+        rows : int, optional
+            The number of rows processed.
+
+        Returns
+        -------
+        None
+        """
+        self.bytes_downloaded += bytes_downloaded
+        self.rows += rows
+
+    def add_frame(self, name, rows, nbytes):
+        """
+        Record the size of a DataFrame held within the span.
+
+        Parameters
+        ----------
+        name : str
+            The name of the frame, e.g. 'summary_df'.
+        rows : int
+            The number of rows of the frame.
+        nbytes : int
+            The deep memory use of the frame in bytes.
+
+        Returns
+        -------
+        None
+        """
+        self.frames[name] = {"rows": rows, "bytes": nbytes}
+
+    def set(self, **attributes):
+        """
+        Set details of the span, e.g. whether a download was served from cache.
+
+        Parameters
+        ----------
+        **attributes
+            JSON-serialisable details of the span.
+
+        Returns
+        -------
+        None
+        """
+        self.attributes.update(attributes)
+
+    def to_dict(self):
+        """
+        Convert the span and its children to a JSON-serialisable dictionary.
+
+        Returns
+        -------
+        span : dict
+            The span's name, attributes and measurements, with its children
+            under 'children'.
+        """
+        return {
+            "name": self.name,
+            "attributes": self.attributes,
+            "seconds": self.seconds,
+            "bytes_downloaded": self.bytes_downloaded,
+            "rows": self.rows,
+            "peak_bytes": self.peak_bytes,
+            "frames": self.frames,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuild a span and its children from a dictionary made by to_dict.
+
+        Parameters
+        ----------
+        data : dict
+            The span, as returned by to_dict.
+
+        Returns
+        -------
+        span : Span
+            The span.
+        """
+        span = cls(data["name"], dict(data["attributes"]))
+        span.seconds = data["seconds"]
+        span.bytes_downloaded = data["bytes_downloaded"]
+        span.rows = data["rows"]
+        span.peak_bytes = data["peak_bytes"]
+        span.frames = dict(data["frames"])
+        span.children = [cls.from_dict(child) for child in data["children"]]
+        return span
+
+
+class _NullSpan:
+    # Stands in for a span when no profiler is active
+    def add(self, bytes_downloaded=0, rows=0):
+        pass
+
+    def add_frame(self, name, rows, nbytes):
+        pass
+
+    def set(self, **attributes):
+        pass
+
+
+class Profiler:
+    """
+    Records a tree of spans with wall time, bytes downloaded, rows processed
+    and, optionally, peak traced memory.
+
+    Spans opened in worker threads are attached to the innermost open span of
+    the thread that activated the profiler, so the downloads of a thread pool
+    appear under the stage that started them. Work sent to a worker process is
+    recorded there with run_profiled and attached with merge_worker_span.
+    """
+
+    def __init__(
+        self, trace_memory=False, profile_stages=(), profile_dir=DEFAULT_PROFILE_DIR
+    ):
+        """
+        Parameters
+        ----------
+        trace_memory : bool, optional
+            Whether to record the peak traced memory of each span with
+            tracemalloc (default is False). Tracing slows the run down. The
+            peak covers every thread, so spans running in parallel share it.
+        profile_stages : iterable of str, optional
+            The names of spans to run under cProfile. The stats of each are
+            dumped to '<profile_dir>/<name>.prof'.
+        profile_dir : str, optional
+            The directory cProfile stats are dumped to (default is
+            '.cache/profiles').
+        """
+        self.trace_memory = trace_memory
+        self.profile_stages = set(profile_stages)
+        self.profile_dir = profile_dir
+        self.spans = []
+        self.started = None
+        self.seconds = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._root_stack = None
+        self._open = []
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def current_span(self):
+        """
+        Get the innermost open span of the calling thread.
+
+        Returns
+        -------
+        span : Span or None
+            The span, or the innermost open span of the thread that activated
+            the profiler for a thread without open spans, or None if no span
+            is open.
+        """
+        stack = self._stack() or self._root_stack or []
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def activate(self):
+        """
+        Make this the profiler that span() records to, for the enclosed code.
+
+        Yields
+        ------
+        profiler : Profiler
+            This profiler.
+        """
+        global _active_profiler
+        previous = _active_profiler
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+
+        self._root_stack = self._stack()
+        self.started = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        _active_profiler = self
+        try:
+            yield self
+        finally:
+            _active_profiler = previous
+            self.seconds = time.perf_counter() - start
+            if started_tracing:
+                tracemalloc.stop()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Record a span around the enclosed code.
+
+        Parameters
+        ----------
+        name : str
+            The name of the stage or call, e.g. 'join_all_seasons'.
+        **attributes
+            JSON-serialisable details of the span, e.g. the season or URL.
+
+        Yields
+        ------
+        span : Span
+            The span, for counting bytes downloaded and rows processed.
+        """
+        span = Span(name, attributes)
+        stack = self._stack()
+        parent_stack = stack or self._root_stack or []
+        with self._lock:
+            (parent_stack[-1].children if parent_stack else self.spans).append(span)
+            tracing = self.trace_memory and tracemalloc.is_tracing()
+            if tracing:
+                # Credit the peak so far to the open spans, then measure anew
+                _, peak = tracemalloc.get_traced_memory()
+                for open_span in self._open:
+                    open_span.peak_bytes = max(open_span.peak_bytes, peak)
+                tracemalloc.reset_peak()
+                span.peak_bytes = 0
+            self._open.append(span)
+
+        profile = None
+        if name in self.profile_stages:
+            profile = cProfile.Profile()
+
+        stack.append(span)
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=repr(e))
+            raise
+        finally:
+            if profile is not None:
+                profile.disable()
+            span.seconds = time.perf_counter() - start
+            stack.pop()
+
+            with self._lock:
+                if tracing:
+                    _, peak = tracemalloc.get_traced_memory()
+                    for open_span in self._open:
+                        open_span.peak_bytes = max(open_span.peak_bytes, peak)
+                self._open.remove(span)
+
+            # A span whose work ran in a worker process was profiled there
+            if profile is not None and "profile" not in span.attributes:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                profile_path = os.path.join(self.profile_dir, f"{name}.prof")
+                profile.dump_stats(profile_path)
+                span.set(profile=profile_path)
+
+    def to_dict(self):
+        """
+        Convert the recorded spans to a JSON-serialisable report.
+
+        Returns
+        -------
+        report : dict
+            The start time and total wall time of the run, and the tree of
+            spans under 'spans'.
+        """
+        return {
+            "started": self.started.isoformat() if self.started else None,
+            "seconds": self.seconds,
+            "trace_memory": self.trace_memory,
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+    def save_report(self, file_path):
+        """
+        Write the report of the run as JSON.
+
+        Parameters
+        ----------
+        file_path : str
+            The path of the report file.
+
+        Returns
+        -------
+        None
+        """
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        with open(file_path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def format_report(self):
+        """
+        Format the recorded spans as a text table, one line per span.
+
+        Returns
+        -------
+        report : str
+            The indented span tree with the time, download size, rows and peak
+            memory of each span.
+        """
+        lines = [
+            f"{'span':<40} {'ms':>10} {'MiB down':>9} {'rows':>10} {'MiB peak':>9}"
+        ]
+
+        def add_lines(span, depth):
+            peak = (
+                f"{span.peak_bytes / 1024 ** 2:9.1f}"
+                if span.peak_bytes is not None
+                else f"{'':>9}"
+            )
+            seconds = span.seconds if span.seconds is not None else float("nan")
+            lines.append(
+                f"{'  ' * depth + span.name:<40} {seconds * 1000:10.1f}"
+                f" {span.bytes_downloaded / 1024 ** 2:9.2f} {span.rows:10,d} {peak}"
+            )
+            for child in span.children:
+                add_lines(child, depth + 1)
+
+        frame_lines = []
+
+        def add_frame_lines(span, path):
+            path = f"{path}/{span.name}" if path else span.name
+            for name, frame in span.frames.items():
+                frame_lines.append(
+                    f"{path + ':' + name:<50} {frame['rows']:10,d}"
+                    f" {frame['bytes'] / 1024 ** 2:9.2f}"
+                )
+            for child in span.children:
+                add_frame_lines(child, path)
+
+        for span in self.spans:
+            add_lines(span, 0)
+            add_frame_lines(span, "")
+        if frame_lines:
+            lines += ["", f"{'frame':<50} {'rows':>10} {'MiB deep':>9}", *frame_lines]
+        return "\n".join(lines)
+
+
+@contextmanager
+def span(name, **attributes):
+    """
+    Record a span on the active profiler, or do nothing if none is active.
+
+    Parameters
+    ----------
+    name : str
+        The name of the stage or call.
+    **attributes
+        JSON-serialisable details of the span, e.g. the season or URL.
+
+    Yields
+    ------
+    span : Span
+        The span, for counting bytes downloaded and rows processed. Its add()
+        and set() methods are no-ops when no profiler is active.
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        yield _NullSpan()
+        return
+    with profiler.span(name, **attributes) as recorded:
+        yield recorded
+
+
+def worker_profile_settings():
+    """
+    Get the settings a worker process records spans with for the active profiler.
+
+    Returns
+    -------
+    settings : dict or None
+        The picklable settings to pass to run_profiled in the worker, or None
+        if no profiler is active. The worker's spans are recorded under a span
+        named after the innermost open span of the calling thread.
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        return None
+    current = profiler.current_span()
+    return {
+        "name": current.name if current is not None else "worker",
+        "trace_memory": profiler.trace_memory,
+        "profile_stages": sorted(profiler.profile_stages),
+        "profile_dir": profiler.profile_dir,
+    }
+
+
+def run_profiled(function, settings):
+    """
+    Run a function in a worker process, recording its spans.
+
+    In a process where a profiler is already active, e.g. a thread pool of the
+    parent, the function's spans are recorded by that profiler instead.
+
+    Parameters
+    ----------
+    function : callable
+        The function to run, taking no arguments.
+    settings : dict or None
+        The settings from worker_profile_settings in the parent process, or
+        None to run the function without a profiler.
+
+    Returns
+    -------
+    result : object
+        The function's return value.
+    recorded : dict or None
+        The span of the run, with the function's spans as its children, as
+        returned by Span.to_dict, or None if it was not recorded here. Pass it
+        to merge_worker_span in the parent process.
+    """
+    if settings is None or _active_profiler is not None:
+        return function(), None
+    settings = dict(settings)
+    name = settings.pop("name")
+    profiler = Profiler(**settings)
+    with profiler.activate(), profiler.span(name) as recorded:
+        result = function()
+    return result, recorded.to_dict()
+
+
+def merge_worker_span(recorded):
+    """
+    Attach the span of a worker process run to the innermost open span.
+
+    The worker's spans become children of the open span, and its downloads,
+    rows, frames, peak memory and cProfile dump are credited to it.
+
+    Parameters
+    ----------
+    recorded : dict or None
+        The span returned by run_profiled, or None if nothing was recorded.
+
+    Returns
+    -------
+    None
+    """
+    profiler = _active_profiler
+    if profiler is None or recorded is None:
+        return
+    worker_span = Span.from_dict(recorded)
+    parent = profiler.current_span()
+    with profiler._lock:
+        if parent is None:
+            profiler.spans.append(worker_span)
+            return
+        parent.children.extend(worker_span.children)
+        parent.add(worker_span.bytes_downloaded, worker_span.rows)
+        parent.frames.update(worker_span.frames)
+        parent.attributes.update(worker_span.attributes)
+        if worker_span.peak_bytes is not None:
+            parent.peak_bytes = max(parent.peak_bytes or 0, worker_span.peak_bytes)
+
+
+def memory_report(frames):
+    """
+    Record the deep memory use of DataFrames on the innermost open span.
+
+    Object and category columns are measured with their strings, as with
+    DataFrame.memory_usage(deep=True). Nothing is measured when no profiler is
+    active, as measuring string columns takes a pass over them.
+
+    Parameters
+    ----------
+    frames : dict of str to pd.DataFrame
+        The frames held at this stage, keyed by name.
+
+    Returns
+    -------
+    report : dict of str to int
+        The deep memory use of each frame in bytes, empty when no profiler is
+        active.
+    """
+    profiler = _active_profiler
+    if profiler is None:
+        return {}
+
+    report = {
+        name: int(df.memory_usage(index=True, deep=True).sum())
+        for name, df in frames.items()
+    }
+    recorded = profiler.current_span()
+    if recorded is None:
+        return report
+    for name, df in frames.items():
+        recorded.add_frame(name, len(df), report[name])
+    return report
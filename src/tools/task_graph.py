@@ -0,0 +1,204 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from src.tools.profiling import span
+
+# Statuses of a task after a run
+RAN = "ran"
+UP_TO_DATE = "up to date"
+FAILED = "failed"
+BLOCKED = "blocked"
+WOULD_RUN = "would run"
+
+
+class Task:
+    """
+    A unit of work in a task graph, with its dependencies and outputs.
+
+    A task is up to date if its `is_up_to_date` callable returns True. Without
+    one, it is up to date if all its outputs exist and none is older than any
+    of its inputs, like a make rule. A task without outputs always runs.
+    """
+
+    def __init__(
+        self, name, action, deps=(), inputs=(), outputs=(), is_up_to_date=None
+    ):
+        """
+        Parameters
+        ----------
+        name : str
+            The unique name of the task, e.g. 'fpl:2024-25'.
+        action : callable
+            A zero-argument callable doing the work.
+        deps : iterable of str, optional
+            The names of the tasks that must finish first.
+        inputs : iterable of str, optional
+            The files the task reads.
+        outputs : iterable of str, optional
+            The files the task writes.
+        is_up_to_date : callable, optional
+            A zero-argument callable returning whether the task's outputs are
+            up to date. It is called once the task's dependencies have run.
+        """
+        self.name = name
+        self.action = action
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self._is_up_to_date = is_up_to_date
+
+    def is_up_to_date(self):
+        """
+        Check whether the task's outputs are up to date.
+
+        Returns
+        -------
+        up_to_date : bool
+            Whether the task can be skipped.
+        """
+        if self._is_up_to_date is not None:
+            return bool(self._is_up_to_date())
+        if not self.outputs or not all(map(os.path.exists, self.outputs)):
+            return False
+        if not self.inputs:
+            return True
+        oldest_output = min(os.path.getmtime(path) for path in self.outputs)
+        return all(
+            os.path.exists(path) and os.path.getmtime(path) <= oldest_output
+            for path in self.inputs
+        )
+
+    def __repr__(self):
+        return f"Task({self.name!r}, deps={self.deps!r})"
+
+
+def topological_order(tasks):
+    """
+    Order tasks so that every task comes after its dependencies.
+
+    Dependencies on tasks outside `tasks` are ignored, so a subset of a graph
+    can be run on its own. Otherwise the order of `tasks` is kept.
+
+    Parameters
+    ----------
+    tasks : list of Task
+        The tasks to order.
+
+    Returns
+    -------
+    ordered : list of Task
+        The tasks in dependency order.
+
+    Raises
+    ------
+    ValueError
+        If two tasks have the same name or the dependencies form a cycle.
+    """
+    by_name = {}
+    for task in tasks:
+        if task.name in by_name:
+            raise ValueError(f"Duplicate task name: {task.name}")
+        by_name[task.name] = task
+
+    ordered = []
+    state = {}  # name -> 'visiting' or 'done'
+
+    def visit(task, path):
+        if state.get(task.name) == "done":
+            return
+        if state.get(task.name) == "visiting":
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + [task.name])}")
+        state[task.name] = "visiting"
+        for dep in task.deps:
+            if dep in by_name:
+                visit(by_name[dep], path + [task.name])
+        state[task.name] = "done"
+        ordered.append(task)
+
+    for task in tasks:
+        visit(task, [])
+    return ordered
+
+
+def _run_task(task, force):
+    if not force and task.is_up_to_date():
+        return UP_TO_DATE
+    with span(task.name):
+        task.action()
+    return RAN
+
+
+def run_task_graph(tasks, jobs=1, force=False, dry_run=False):
+    """
+    Run a graph of tasks, running independent tasks concurrently.
+
+    Each task starts once all its dependencies have finished. Tasks that are
+    up to date are skipped, and their dependents still run if they are not up
+    to date themselves. A task that fails blocks its dependents, but does not
+    stop the tasks that do not depend on it.
+
+    Parameters
+    ----------
+    tasks : list of Task
+        The tasks to run.
+    jobs : int, optional
+        The maximum number of tasks run at once (default is 1).
+    force : bool, optional
+        Whether to run every task, even if it is up to date (default is False).
+    dry_run : bool, optional
+        Whether to only report which tasks would run, without running any
+        (default is False). Up-to-date checks that depend on the results of
+        earlier tasks may not be able to tell, in which case the task is
+        reported as one that would run.
+
+    Returns
+    -------
+    statuses : dict
+        A dictionary mapping each task name, in dependency order, to 'ran',
+        'up to date', 'failed' or 'blocked' ('would run' in a dry run).
+    errors : dict
+        A dictionary mapping the name of each failed task to its exception.
+    """
+    ordered = topological_order(tasks)
+    names = {task.name for task in ordered}
+    statuses = {}
+    errors = {}
+
+    if dry_run:
+        for task in ordered:
+            try:
+                up_to_date = not force and task.is_up_to_date()
+            except Exception:
+                up_to_date = False
+            statuses[task.name] = UP_TO_DATE if up_to_date else WOULD_RUN
+        return statuses, errors
+
+    pending = list(ordered)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+
+        def submit_ready():
+            # Tasks are in dependency order, so one pass settles any chain of
+            # blocked tasks
+            for task in list(pending):
+                deps = [dep for dep in task.deps if dep in names]
+                if any(statuses.get(dep) in (FAILED, BLOCKED) for dep in deps):
+                    statuses[task.name] = BLOCKED
+                    pending.remove(task)
+                elif all(dep in statuses for dep in deps):
+                    running[pool.submit(_run_task, task, force)] = task
+                    pending.remove(task)
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                try:
+                    statuses[task.name] = future.result()
+                except Exception as e:
+                    statuses[task.name] = FAILED
+                    errors[task.name] = e
+            submit_ready()
+
+    return {task.name: statuses[task.name] for task in ordered}, errors
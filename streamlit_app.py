@@ -1,80 +1,225 @@
 import streamlit as st
-import base64
-import altair as alt
-import pandas as pd
-from src.data_prep.join_table_data import get_list_of_seasons
-import json
-from src.tools.season_string import get_season_string
+from src.dashboard.data_loader import (
+    ALL_TEAMS,
+    get_file_fingerprint,
+    build_team_index,
+    format_league_table,
+    load_logo_data_uri,
+    load_season_tables,
+    load_team_history,
+    rank_history_chart_spec,
+)
+from src.dashboard.manifest import (
+    MANIFEST_PATH,
+    get_manifest_snapshot,
+    load_dashboard_manifest,
+)
 
 # Set the page configuration to wide mode
 st.set_page_config(layout="wide")
 
-# Get most recent available data
-seasons = get_list_of_seasons()
-latest_season = max(seasons)
-latest_season = int(latest_season[:4])
+
+# Cached data is keyed on the file hashes in the manifest, so it is reloaded as
+# soon as the refresh job saves new files. Cached frames are shared by every session and
+# must not be modified.
+@st.cache_resource(show_spinner=False)
+def get_cached_manifest(file_fingerprint):
+    return load_dashboard_manifest()
+
+
+@st.cache_resource(show_spinner=False)
+def get_cached_season_tables(season, snapshot):
+    return load_season_tables(season)
+
+
+@st.cache_resource(show_spinner=False)
+def get_cached_league_table_display(season, snapshot):
+    league_table, _ = get_cached_season_tables(season, snapshot)
+    return format_league_table(league_table)
+
+
+@st.cache_resource(show_spinner=False)
+def get_cached_team_index(season, snapshot):
+    _, player_stats = get_cached_season_tables(season, snapshot)
+    return build_team_index(player_stats)
+
+
+@st.cache_resource(show_spinner=False)
+def get_cached_team_history(season, snapshot):
+    return load_team_history(season)
+
+
+@st.cache_resource(show_spinner=False)
+def get_cached_rank_history(season, snapshot):
+    history = get_cached_team_history(season, snapshot)
+    return history.rank_history() if history is not None else None
+
+
+@st.cache_resource(show_spinner=False)
+def get_cached_season_store(snapshots):
+    # Only imported once the all-time statistics are asked for
+    from src.dashboard.season_store import SeasonStore
+
+    return SeasonStore.load(seasons=[season for season, _ in snapshots])
+
+
+@st.cache_resource(show_spinner=False)
+def get_cached_logo():
+    return load_logo_data_uri()
+
+
+# The refresh job saves the seasons, the scored gameweek and the file hashes in
+# one manifest, so a rerun only stats that file instead of listing and
+# fingerprinting the data directory
+manifest = get_cached_manifest(get_file_fingerprint(MANIFEST_PATH))
+
+# Get available seasons, most recent first
+seasons = manifest["seasons"]
 
 # Get gameweek data correct up to
-file_path = "data/scoring_meta.json"
+scoring_data_gameweek = manifest["scoring_data_gameweek"]
 
-# Read the JSON data from the file
-with open(file_path, "r") as file:
-    scoring_meta = json.load(file)
-scoring_data_gameweek = scoring_meta.get("scoring_data_gameweek")
 
+# Reruns on a team change only re-render this panel, not the whole page
+@st.fragment
+def show_player_statistics(season):
+    snapshot = get_manifest_snapshot(manifest, season)
+    _, player_stats = get_cached_season_tables(season, snapshot)
+    sorted_stats, team_index = get_cached_team_index(season, snapshot)
 
-def generate_streamlit_tables(season_index):
-    season_start = latest_season - season_index
-    season = get_season_string(season_start)
-    # Load data
-    try:
-        league_table = pd.read_csv(
-            f"data/fpl_premier_league_tables_joined/{season}.csv"
+    # Teams in alphabetical order, with "All Teams" at the front
+    teams = [ALL_TEAMS, *team_index]
+
+    selected_team = st.selectbox(
+        label="Select Team", options=teams, index=0, key=f"team_{season}"
+    )
+
+    # "All Teams" is the unfiltered table
+    if selected_team == ALL_TEAMS:
+        player_stats_filtered = player_stats
+    else:
+        player_stats_filtered = sorted_stats.iloc[team_index[selected_team]]
+    # The element ID and FPL code only key players apart, so they are not shown
+    player_stats_filtered = player_stats_filtered.drop(
+        columns=["Team", "element", "code"], errors="ignore"
+    )
+
+    st.dataframe(player_stats_filtered, hide_index=True)
+
+
+# Reruns on a gameweek range change only re-render this panel
+@st.fragment
+def show_rank_over_time(season):
+    snapshot = get_manifest_snapshot(manifest, season)
+    history = get_cached_team_history(season, snapshot)
+    if history is None:
+        st.markdown("_No gameweek history is available for this season yet._")
+        return
+
+    rank_history = get_cached_rank_history(season, snapshot)
+    st.vega_lite_chart(
+        rank_history,
+        rank_history_chart_spec(len(history.teams)),
+        use_container_width=True,
+    )
+
+    # Any range is a difference of two cumulative slices, so no data is reloaded
+    if history.last_gameweek > 1:
+        first_gameweek, last_gameweek = st.slider(
+            "Gameweeks",
+            min_value=1,
+            max_value=history.last_gameweek,
+            value=(1, history.last_gameweek),
+            key=f"gameweeks_{season}",
+        )
+    else:
+        first_gameweek = last_gameweek = history.last_gameweek
+    st.dataframe(history.table(first_gameweek, last_gameweek), hide_index=True)
+
+
+# Every query runs on the store in memory, so reruns do not touch disk
+@st.fragment
+def show_all_seasons():
+    from src.dashboard.season_store import PLAYER_METRICS, TEAM_METRICS
+
+    store = get_cached_season_store(
+        tuple((season, get_manifest_snapshot(manifest, season)) for season in seasons)
+    )
+
+    leaders_tab, career_tab, team_tab = st.tabs(
+        ["🏆 All-Time Leaders", "👤 Player Careers", "📈 Team Trends"]
+    )
+
+    with leaders_tab:
+        metric_column, position_column, seasons_column = st.columns(3)
+        metric = metric_column.selectbox(
+            "Statistic", PLAYER_METRICS, key="leaders_metric"
+        )
+        position = position_column.selectbox(
+            "Position", ["All Positions", *store.positions], key="leaders_position"
         )
-        if season_start <= 2018:
-            encoding = "latin-1"
+        if len(store.seasons) > 1:
+            first_season, last_season = seasons_column.select_slider(
+                "Seasons",
+                options=store.seasons,
+                value=(store.seasons[0], store.seasons[-1]),
+                key="leaders_seasons",
+            )
         else:
-            encoding = "utf-8"
-        player_stats = pd.read_csv(
-            f"data/fpl_premier_league_player_data/{season}.csv", encoding=encoding
+            first_season = last_season = store.seasons[0]
+        leaders = store.top_players(
+            metric,
+            n=20,
+            first_season=first_season,
+            last_season=last_season,
+            position=None if position == "All Positions" else position,
         )
-        # Manual encoding fix due to indexs being added
-        player_stats["Player Name"] = player_stats["Player Name"].str.replace(
-            r"\s\d+$", "", regex=True
+        st.dataframe(leaders, hide_index=True)
+
+    with career_tab:
+        player = st.selectbox("Player", store.player_names, key="career_player")
+        st.dataframe(
+            store.career_totals(player).to_frame("Career").T, hide_index=True
         )
+        st.dataframe(store.player_career(player), hide_index=True)
+
+    with team_tab:
+        team_column, metric_column = st.columns(2)
+        team = team_column.selectbox("Team", store.team_names, key="trend_team")
+        metric = metric_column.selectbox("Statistic", TEAM_METRICS, key="trend_metric")
+        trend = store.team_trend(team)
+        st.line_chart(
+            trend.astype({"season": str}).set_index("season")[[metric]],
+            use_container_width=True,
+        )
+        st.dataframe(trend, hide_index=True)
+
+
+def generate_streamlit_tables(season, is_latest_season=False):
+    # Load data
+    league_table = get_cached_league_table_display(
+        season, get_manifest_snapshot(manifest, season)
+    )
 
-    except:
-        return
     # Display the output tables
     league_name = f"{season}"
     st.write("")
 
     st.subheader(league_name, divider="grey")
 
-    league_table_tab, player_statistics_tab = st.tabs(
-        ["📃League Table", "📈 Player Statistics"]
+    league_table_tab, player_statistics_tab, rank_over_time_tab = st.tabs(
+        ["📃League Table", "📈 Player Statistics", "📉 Rank Over Time"]
     )
 
     with league_table_tab:
         st.dataframe(league_table, hide_index=True)
 
     with player_statistics_tab:
-        # Get distinct values using set, convert to list and sort alphabetically
-        teams = sorted(
-            [team for team in player_stats["Team"].unique() if isinstance(team, str)]
-        )
+        show_player_statistics(season)
 
-        # Move "All Teams" to the front
-        teams.remove("All Teams")
-        teams.insert(0, "All Teams")
-
-        selected_team = st.selectbox(label="Select Team", options=teams, index=0)
-
-        player_stats_filtered = player_stats[player_stats["Team"] == selected_team]
-        player_stats_filtered = player_stats_filtered.drop(columns=["Team"])
-
-        st.dataframe(player_stats_filtered, hide_index=True)
-    if season_index == 0:
+    with rank_over_time_tab:
+        show_rank_over_time(season)
+    if is_latest_season:
         st.markdown(f"_Data up to end of gameweek {scoring_data_gameweek}._")
 
     st.write("")
@@ -89,8 +234,6 @@ def main():
     )
 
     # Add github link and logo
-    LOGO_IMAGE = "assets//pwt.png"
-
     st.markdown(
         """
         <style>
@@ -118,91 +261,30 @@ def main():
     st.markdown(
         f"""
         <div class="container">
-            <img class="logo-img" src="data:assets//pwt.png;base64,{base64.b64encode(open(LOGO_IMAGE, "rb").read()).decode()}">
+            <img class="logo-img" src="{get_cached_logo()}">
             <p class="logo-text"><a href="https://github.com/EdwardAnalytics/fpl-pl-table">GitHub Repo</a></p>
         </div>
         """,
         unsafe_allow_html=True,
     )
 
-    # Run function for individual seasons
-    season_index = 0
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
+    # Only the latest season is loaded up front, earlier seasons are loaded
+    # when selected
+    latest_season, *earlier_seasons = seasons
+    generate_streamlit_tables(season=latest_season, is_latest_season=True)
 
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
+    if earlier_seasons:
+        st.write("")
+        st.subheader("Earlier Seasons", divider="grey")
+        for season in earlier_seasons:
+            if st.toggle(f"Show {season}", key=f"show_{season}"):
+                generate_streamlit_tables(season=season)
 
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
-
-    season_index += 1
-    generate_streamlit_tables(season_index=season_index)
+    # Every season is loaded for these, so only once asked for
+    st.write("")
+    st.subheader("All Seasons", divider="grey")
+    if st.toggle("Show all-time statistics", key="show_all_seasons"):
+        show_all_seasons()
 
     # Display the data sources and mention Wikipedia as the actual table source
     st.write("")
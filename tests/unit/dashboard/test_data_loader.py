@@ -0,0 +1,129 @@
+import base64
+import os
+
+import pandas as pd
+from src.dashboard.data_loader import (
+    ENCODED_LOGO_PATH,
+    LOGO_PATH,
+    build_team_index,
+    format_league_table,
+    get_file_fingerprint,
+    load_logo_data_uri,
+    load_season_tables,
+)
+from src.data_prep.storage import save_table
+
+
+def save_season(data_dir, player_names):
+    league_table = pd.DataFrame({"Pos": [1], "Team": ["Arsenal"], "Points": [100]})
+    player_stats = pd.DataFrame(
+        {"Player Name": player_names, "Team": ["Arsenal"] * len(player_names)}
+    )
+    save_table(
+        league_table, "fpl_premier_league_tables_joined", "2023-24", data_dir=data_dir
+    )
+    save_table(
+        player_stats, "fpl_premier_league_player_data", "2023-24", data_dir=data_dir
+    )
+
+
+def test_get_file_fingerprint(tmp_path):
+    path = tmp_path / "scoring_meta.json"
+    assert get_file_fingerprint(path) is None
+
+    path.write_text('{"scoring_data_gameweek": 7}')
+    assert get_file_fingerprint(path) == (
+        os.stat(path).st_mtime_ns,
+        os.stat(path).st_size,
+    )
+
+
+def test_load_season_tables_removes_name_indexes(tmp_path):
+    save_season(tmp_path, ["Bukayo Saka 12", "Ben White"])
+
+    league_table, player_stats = load_season_tables("2023-24", data_dir=tmp_path)
+
+    assert list(league_table["Team"]) == ["Arsenal"]
+    assert list(player_stats["Player Name"]) == ["Bukayo Saka", "Ben White"]
+
+
+def test_load_season_tables_keeps_display_names_of_keyed_players(tmp_path):
+    save_season(tmp_path, ["Bukayo Saka"])
+    # Files keyed by element ID already hold display names
+    player_stats = pd.DataFrame(
+        {"Player Name": ["Player 456"], "Team": ["Arsenal"], "element": [7]}
+    )
+    save_table(
+        player_stats, "fpl_premier_league_player_data", "2023-24", data_dir=tmp_path
+    )
+
+    _, player_stats = load_season_tables("2023-24", data_dir=tmp_path)
+
+    assert list(player_stats["Player Name"]) == ["Player 456"]
+
+
+def test_encoded_logo_matches_logo():
+    # Regenerate the encoded logo when the logo changes
+    root = os.path.join(os.path.dirname(__file__), "..", "..", "..")
+    with open(os.path.join(root, LOGO_PATH), "rb") as file:
+        expected = base64.b64encode(file.read()).decode()
+
+    data_uri = load_logo_data_uri(os.path.join(root, ENCODED_LOGO_PATH))
+
+    assert data_uri == f"data:image/png;base64,{expected}"
+
+
+def test_build_team_index():
+    player_stats = pd.DataFrame(
+        {
+            "Player Name": ["Saka", "Palmer", "Rice", "Unknown", "Jackson"],
+            "Team": ["Arsenal", "Chelsea", "Arsenal", None, "Chelsea"],
+            "Total Points": [200, 190, 150, 100, 90],
+        }
+    )
+
+    sorted_stats, team_index = build_team_index(player_stats)
+
+    assert list(team_index) == ["Arsenal", "Chelsea"]
+    assert list(sorted_stats.iloc[team_index["Arsenal"]]["Player Name"]) == [
+        "Saka",
+        "Rice",
+    ]
+    assert list(sorted_stats.iloc[team_index["Chelsea"]]["Player Name"]) == [
+        "Palmer",
+        "Jackson",
+    ]
+
+
+def test_load_season_tables_drops_legacy_all_teams_rows(tmp_path):
+    player_stats = pd.DataFrame(
+        {
+            "Player Name": ["Bukayo Saka", "Bukayo Saka"],
+            "Team": ["Arsenal", "All Teams"],
+        }
+    )
+    save_table(
+        player_stats, "fpl_premier_league_player_data", "2023-24", data_dir=tmp_path
+    )
+    save_table(
+        pd.DataFrame({"Pos": [1], "Team": ["Arsenal"]}),
+        "fpl_premier_league_tables_joined",
+        "2023-24",
+        data_dir=tmp_path,
+    )
+
+    _, player_stats = load_season_tables("2023-24", data_dir=tmp_path)
+
+    assert list(player_stats["Team"]) == ["Arsenal"]
+
+
+def test_format_league_table():
+    league_table = pd.DataFrame(
+        {"Team": ["A", "B", "C"], "Difference": pd.Series([2, 0, -11], dtype="int16")}
+    )
+
+    result = format_league_table(league_table)
+
+    assert list(result["Difference"]) == ["⬆️ +2", " ", "⬇️ -11"]
+    # The cached table is not modified
+    assert list(league_table["Difference"]) == [2, 0, -11]
@@ -0,0 +1,87 @@
+import ast
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+# Modules the dashboard must not import on start up
+HEAVY_MODULES = [
+    "altair",
+    "bs4",
+    "lxml",
+    "requests",
+    "yaml",
+    "src.dashboard.season_store",
+    "src.data_prep.actual_pl_table",
+    "src.data_prep.fpl_pl_table_players",
+    "src.data_prep.join_table_data",
+    "src.tools.http_client",
+]
+
+# The time budget, in milliseconds, for the app's imports of the repo's own
+# modules once streamlit and pandas are imported, including every module they
+# import in turn. Measured at around 10ms.
+SRC_IMPORT_BUDGET_MS = 200
+
+
+def get_app_imports():
+    # The modules streamlit_app.py imports at the top level
+    with open(os.path.join(ROOT, "streamlit_app.py"), "r") as file:
+        tree = ast.parse(file.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+    return modules
+
+
+def import_app_modules(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout, result.stderr
+
+
+def parse_import_times(stderr):
+    # Lines are 'import time: <self us> | <cumulative us> | <indented module>'.
+    # Only the modules imported directly are kept, with their cumulative time.
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative_us, module = line.removeprefix("import time:").split("|")
+        if not module.startswith("  "):
+            times[module.strip()] = int(cumulative_us)
+    return times
+
+
+def test_app_imports_no_heavy_modules():
+    modules = get_app_imports()
+    assert "altair" not in modules
+
+    stdout, _ = import_app_modules(
+        f"import sys; import {', '.join(modules)}; "
+        f"print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+
+    assert stdout.split() == []
+
+
+def test_app_import_time_budget():
+    modules = get_app_imports()
+    app_modules = [module for module in modules if module.startswith("src.")]
+
+    _, stderr = import_app_modules(
+        f"import streamlit, pandas; import {', '.join(app_modules)}"
+    )
+
+    times = parse_import_times(stderr)
+    src_ms = sum(us for module, us in times.items() if module.startswith("src")) / 1000
+    assert src_ms < SRC_IMPORT_BUDGET_MS
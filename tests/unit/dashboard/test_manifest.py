@@ -0,0 +1,69 @@
+import json
+
+import pandas as pd
+from src.dashboard.manifest import (
+    build_dashboard_manifest,
+    dashboard_manifest_is_up_to_date,
+    get_manifest_snapshot,
+    load_dashboard_manifest,
+    save_dashboard_manifest,
+)
+from src.data_prep.storage import save_table
+
+
+def save_season(data_dir, season, points):
+    league_table = pd.DataFrame({"Pos": [1], "Team": ["Arsenal"], "Points": [points]})
+    save_table(
+        league_table, "fpl_premier_league_tables_joined", season, data_dir=data_dir
+    )
+    save_table(
+        pd.DataFrame({"Player Name": ["Sam Smith"], "Team": ["Arsenal"]}),
+        "fpl_premier_league_player_data",
+        season,
+        data_dir=data_dir,
+    )
+
+
+def test_build_manifest(tmp_path):
+    save_season(tmp_path, "2022-23", 50)
+    save_season(tmp_path, "2023-24", 60)
+    scoring_meta_path = tmp_path / "scoring_meta.json"
+    scoring_meta_path.write_text(json.dumps({"scoring_data_gameweek": 12}))
+
+    manifest = build_dashboard_manifest(tmp_path, scoring_meta_path)
+
+    assert manifest["seasons"] == ["2023-24", "2022-23"]
+    assert manifest["scoring_data_gameweek"] == 12
+    joined, players, history = get_manifest_snapshot(manifest, "2023-24")
+    assert len(joined) == len(players) == 64
+    assert history is None
+    assert get_manifest_snapshot(manifest, "2022-23")[0] != joined
+
+
+def test_saved_manifest_goes_stale(tmp_path):
+    save_season(tmp_path, "2023-24", 60)
+    manifest_path = tmp_path / "dashboard_manifest.json"
+    scoring_meta_path = tmp_path / "scoring_meta.json"
+
+    assert not dashboard_manifest_is_up_to_date(
+        manifest_path, tmp_path, scoring_meta_path
+    )
+    manifest = build_dashboard_manifest(tmp_path, scoring_meta_path)
+    save_dashboard_manifest(manifest, manifest_path)
+    assert load_dashboard_manifest(manifest_path, tmp_path) == manifest
+    assert dashboard_manifest_is_up_to_date(manifest_path, tmp_path, scoring_meta_path)
+
+    # Rewriting a table with new content changes its hash
+    save_season(tmp_path, "2023-24", 61)
+    assert not dashboard_manifest_is_up_to_date(
+        manifest_path, tmp_path, scoring_meta_path
+    )
+
+
+def test_load_builds_missing_manifest(tmp_path):
+    save_season(tmp_path, "2023-24", 60)
+
+    manifest = load_dashboard_manifest(tmp_path / "dashboard_manifest.json", tmp_path)
+
+    assert manifest["seasons"] == ["2023-24"]
+    assert get_manifest_snapshot(manifest, "2024-25") == (None, None, None)
@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.dashboard.season_store import PLAYER_METRICS, TEAM_METRICS, SeasonStore
+from src.data_prep.storage import save_table
+
+SEASONS = ["2021-22", "2022-23", "2023-24"]
+TEAMS = ["Arsenal", "Chelsea", "Everton", "Spurs"]
+
+
+def make_season(season, seed):
+    # Twelve players, some of whom move team or are absent in a season
+    rng = np.random.default_rng(seed)
+    names = [f"Player {chr(65 + i)}" for i in range(12)]
+    players = pd.DataFrame(
+        {
+            "Player Name": names,
+            "Team": [TEAMS[(i + seed) % 4] for i in range(12)],
+            "Position": [["GK", "DEF", "MID", "FWD"][i % 4] for i in range(12)],
+            **{metric: rng.integers(0, 50, 12) for metric in PLAYER_METRICS},
+            "element": range(1, 13),
+        }
+    ).iloc[seed:]
+    league_table = pd.DataFrame(
+        {
+            "Pos": [1, 2, 3],
+            "Team": [TEAMS[(i + seed) % 4] for i in range(3)],
+            "Actual Pos": [2, 1, 3],
+            **{metric: rng.integers(0, 500, 3) for metric in TEAM_METRICS},
+        }
+    )
+    return league_table, players
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for seed, season in enumerate(SEASONS):
+        league_table, players = make_season(season, seed)
+        save_table(
+            league_table, "fpl_premier_league_tables_joined", season, data_dir=tmp_path
+        )
+        save_table(players, "fpl_premier_league_player_data", season, data_dir=tmp_path)
+    return tmp_path
+
+
+def all_players():
+    return pd.concat(
+        [
+            make_season(season, seed)[1].assign(season=season)
+            for seed, season in enumerate(SEASONS)
+        ],
+        ignore_index=True,
+    )
+
+
+@pytest.mark.parametrize(
+    "first_season, last_season, team, position",
+    [
+        (None, None, None, None),
+        ("2022-23", "2023-24", None, None),
+        ("2022-23", "2022-23", "Chelsea", None),
+        (None, None, None, "MID"),
+    ],
+)
+def test_top_players_matches_groupby(
+    data_dir, first_season, last_season, team, position
+):
+    store = SeasonStore.load(data_dir=data_dir)
+
+    result = store.top_players(
+        "Goals Scored",
+        n=5,
+        first_season=first_season,
+        last_season=last_season,
+        team=team,
+        position=position,
+    )
+
+    players = all_players()
+    players = players[
+        players["season"].between(
+            first_season or SEASONS[0], last_season or SEASONS[-1]
+        )
+    ]
+    if team is not None:
+        players = players[players["Team"] == team]
+    if position is not None:
+        players = players[players["Position"] == position]
+    expected = (
+        players.groupby("Player Name")
+        .agg(**{"Goals Scored": ("Goals Scored", "sum"), "Seasons": ("season", "size")})
+        .reset_index()
+        .sort_values(["Goals Scored", "Player Name"], ascending=[False, True])
+        .head(5)
+        .reset_index(drop=True)
+    )
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_player_career_and_totals(data_dir):
+    store = SeasonStore.load(data_dir=data_dir)
+
+    career = store.player_career("Player B")
+    totals = store.career_totals("Player B")
+
+    players = all_players()
+    expected = players[players["Player Name"] == "Player B"]
+    assert career["season"].tolist() == expected["season"].tolist()
+    assert career["Team"].tolist() == expected["Team"].tolist()
+    assert career["Total Points"].tolist() == expected["Total Points"].tolist()
+    assert totals["Total Points"] == expected["Total Points"].sum()
+    assert totals["Seasons"] == 2
+
+
+def test_team_trend_and_totals(data_dir):
+    store = SeasonStore.load(data_dir=data_dir)
+
+    trend = store.team_trend("Everton")
+    totals = store.team_totals("Points", first_season="2022-23")
+
+    assert trend["season"].tolist() == SEASONS
+    assert trend["Pos"].tolist() == [3, 2, 1]
+    assert totals.index.tolist() == ["2022-23", "2023-24"]
+    assert totals.loc["2023-24", "Everton"] == trend.loc[2, "Points"]
+    assert np.isnan(totals.loc["2023-24", "Chelsea"])
+
+
+def test_unknown_queries(data_dir):
+    store = SeasonStore.load(data_dir=data_dir)
+
+    with pytest.raises(ValueError):
+        store.top_players("Points")
+    with pytest.raises(ValueError):
+        store.top_players("Total Points", first_season="2023-24", last_season="2021-22")
+    with pytest.raises(KeyError):
+        store.player_career("Nobody")
+
+
+def save_players(data_dir, players):
+    # Each season's players, as (Player Name, Team, Total Points[, code])
+    for seed, (season, rows) in enumerate(players.items()):
+        columns = ["Player Name", "Team", "Total Points", "code"][: len(rows[0])]
+        save_table(
+            make_season(season, seed)[0],
+            "fpl_premier_league_tables_joined",
+            season,
+            data_dir=data_dir,
+        )
+        save_table(
+            pd.DataFrame(rows, columns=columns).assign(Position="DEF"),
+            "fpl_premier_league_player_data",
+            season,
+            data_dir=data_dir,
+        )
+
+
+def test_players_sharing_a_name_are_kept_apart(tmp_path):
+    # Two players called Ben Davies, and a player renamed between seasons
+    save_players(
+        tmp_path,
+        {
+            "2021-22": [
+                ("Ben Davies", "Spurs", 50, 1),
+                ("Ben Davies", "Liverpool", 10, 2),
+                ("Sam Smith", "Arsenal", 30, 3),
+            ],
+            "2022-23": [
+                ("Ben Davies", "Spurs", 60, 1),
+                ("Ben Davies", "Liverpool", 20, 2),
+                ("Samuel Smith", "Arsenal", 40, 3),
+            ],
+        },
+    )
+
+    store = SeasonStore.load(data_dir=tmp_path)
+
+    assert store.player_names.tolist() == [
+        "Ben Davies (Liverpool)",
+        "Ben Davies (Spurs)",
+        "Samuel Smith",
+    ]
+    totals = store.career_totals("Ben Davies (Spurs)")
+    assert (totals["Total Points"], totals["Seasons"]) == (110, 2)
+    assert store.player_career("Ben Davies (Liverpool)")["Total Points"].tolist() == [
+        10,
+        20,
+    ]
+    assert store.career_totals("Samuel Smith")["Total Points"] == 70
+    leaders = store.top_players("Total Points")
+    assert leaders["Seasons"].tolist() == [2, 2, 2]
+
+
+def test_players_sharing_a_name_in_files_without_codes(tmp_path):
+    save_players(
+        tmp_path,
+        {
+            "2020-21": [("Ben Davies", "Spurs", 40), ("Player A", "Arsenal", 5)],
+            "2021-22": [("Ben Davies", "Spurs", 50), ("Ben Davies", "Liverpool", 10)],
+            "2022-23": [("Ben Davies", "Spurs", 60, 1), ("Player A", "Arsenal", 5, 7)],
+        },
+    )
+
+    store = SeasonStore.load(data_dir=tmp_path)
+
+    # Names shared in a season are told apart by team, and the rows of files
+    # without codes are linked to the player with a code and the same key
+    assert store.player_names.tolist() == [
+        "Ben Davies (Liverpool)",
+        "Ben Davies (Spurs)",
+        "Player A",
+    ]
+    spurs = store.player_career("Ben Davies (Spurs)")
+    assert spurs["season"].tolist() == ["2020-21", "2021-22", "2022-23"]
+    assert spurs["Total Points"].tolist() == [40, 50, 60]
+    assert store.career_totals("Ben Davies (Liverpool)")["Seasons"] == 1
+    assert store.career_totals("Player A")["Seasons"] == 2
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+from benchmarks.synthetic import generate_data_dir
+from src.dashboard.manifest import build_dashboard_manifest, save_dashboard_manifest
+from src.data_prep.join_table_data import join_all_seasons
+from src.data_prep.storage import load_table, save_table
+from streamlit.testing.v1 import AppTest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # A synthetic data directory, with player files that hold the FPL code
+    monkeypatch.chdir(tmp_path)
+    os.symlink(os.path.join(REPO_DIR, "assets"), "assets")
+    seasons, team_name_mapping = generate_data_dir(
+        "data", n_seasons=2, n_players=60, n_gameweeks=4
+    )
+    for season in seasons:
+        players = load_table("fpl_premier_league_player_data", season)
+        save_table(
+            players.assign(code=players["element"] + 1000),
+            "fpl_premier_league_player_data",
+            season,
+        )
+    join_all_seasons(team_name_mapping)
+    save_dashboard_manifest(build_dashboard_manifest())
+    return AppTest.from_file(
+        os.path.join(REPO_DIR, "streamlit_app.py"), default_timeout=60
+    )
+
+
+def test_player_statistics_hide_player_keys(app):
+    app.run()
+
+    assert not app.exception
+    player_tables = [
+        table.value for table in app.dataframe if "Player Name" in table.value
+    ]
+    assert player_tables
+    for table in player_tables:
+        assert "Teams" in table.columns
+        assert not {"element", "code"} & set(table.columns)
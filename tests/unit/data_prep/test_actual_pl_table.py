@@ -0,0 +1,243 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+import pandas as pd
+import pytest
+from src.data_prep.actual_pl_table import (
+    get_actual_premier_league_table,
+    parse_table_from_html,
+)
+from src.data_prep.schema import apply_schema
+from src.data_prep.storage import load_table
+from src.tools.profiling import Profiler
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "wikipedia"
+DATA_DIR = Path(__file__).parents[3] / "data"
+
+# The final 2015-16 table, which has no saved table in data/
+TABLE_2015_16 = pd.DataFrame(
+    {
+        "Pos": range(1, 21),
+        "Team": [
+            "Leicester City",
+            "Arsenal",
+            "Tottenham Hotspur",
+            "Manchester City",
+            "Manchester United",
+            "Southampton",
+            "West Ham United",
+            "Liverpool",
+            "Stoke City",
+            "Chelsea",
+            "Everton",
+            "Swansea City",
+            "Watford",
+            "West Bromwich Albion",
+            "Crystal Palace",
+            "AFC Bournemouth",
+            "Sunderland",
+            "Newcastle United",
+            "Norwich City",
+            "Aston Villa",
+        ],
+        "Pts": [
+            81,
+            71,
+            70,
+            66,
+            66,
+            63,
+            62,
+            60,
+            51,
+            50,
+            47,
+            47,
+            45,
+            43,
+            42,
+            42,
+            39,
+            37,
+            34,
+            17,
+        ],
+    }
+)
+
+
+class WikipediaHandler(BaseHTTPRequestHandler):
+    # Serves the synthetic fixtures, logging the (path, query) of each request
+    served = []
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        self.served.append((url.path, params))
+
+        if url.path == "/w/api.php":
+            section = f".{params['section']}" if "section" in params else ""
+            path = (
+                FIXTURES_DIR
+                / "api"
+                / f"{params['page']}.{params['prop']}{section}.json"
+            )
+            content_type = "application/json; charset=utf-8"
+        else:
+            path = FIXTURES_DIR / f"{url.path.rsplit('/', 1)[-1]}.html"
+            content_type = "text/html; charset=UTF-8"
+
+        if not path.exists():
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = path.read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def wikipedia_server():
+    WikipediaHandler.served = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), WikipediaHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", WikipediaHandler
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize(
+    "season", [f"{y}-{str(y + 1)[-2:]}" for y in range(2016, 2025)]
+)
+def test_parse_table_from_html_matches_saved_table(season):
+    html_content = (FIXTURES_DIR / f"{season}_Premier_League.html").read_bytes()
+
+    df = parse_table_from_html(html_content)
+
+    expected = load_table("actual_premier_league_tables", season, data_dir=DATA_DIR)
+    pd.testing.assert_frame_equal(
+        apply_schema(df, "actual_premier_league_tables"), expected
+    )
+
+
+def test_parse_table_from_html_parses_full_page():
+    # The results matrix and other wikitables come before the league table
+    html_content = (FIXTURES_DIR / "2015-16_Premier_League.html").read_bytes()
+
+    df = parse_table_from_html(html_content)
+
+    pd.testing.assert_frame_equal(df, TABLE_2015_16)
+
+
+def test_parse_table_from_html_parses_section_response():
+    response = json.loads(
+        (FIXTURES_DIR / "api" / "2015-16_Premier_League.text.7.json").read_text()
+    )
+
+    df = parse_table_from_html(response["parse"]["text"])
+
+    pd.testing.assert_frame_equal(df, TABLE_2015_16)
+
+
+def test_parse_table_from_html_cleans_cells():
+    html_content = """
+    <table class="wikitable"><tr><th>Rank</th><th>Club</th></tr></table>
+    <table class="wikitable sortable">
+    <tr><th>Pos</th><th>Team<div class="navbar"><a>v</a><a>t</a><a>e</a></div></th>
+    <th>Pld</th><th>Pts</th><th>Qualification</th></tr>
+    <tr><td>1</td><td><a>Arsenal</a> <b>(C)</b></td><td>38</td><td>90</td>
+    <td rowspan="2">Champions League<sup>[a]</sup></td></tr>
+    <tr><td rowspan="2">2</td><td>Brighton &amp; Hove Albion</td><td>38</td><td>80</td></tr>
+    <tr><td>Everton<sup>[b]</sup> (R)</td><td>38</td><td>70<sup>[c]</sup></td><td></td></tr>
+    </table>
+    """
+
+    df = parse_table_from_html(html_content)
+
+    # Footnotes and markers are removed and a cell spanning two rows is repeated
+    expected = pd.DataFrame(
+        {
+            "Pos": [1, 2, 2],
+            "Team": ["Arsenal", "Brighton & Hove Albion", "Everton"],
+            "Pts": [90, 80, 70],
+        }
+    )
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_parse_table_from_html_raises_without_league_table():
+    html_content = "<table class='wikitable'><tr><th>Pos</th><th>Club</th></tr></table>"
+
+    with pytest.raises(ValueError):
+        parse_table_from_html(html_content)
+
+
+def test_get_actual_premier_league_table_fetches_section(wikipedia_server):
+    base_url, handler = wikipedia_server
+    profiler = Profiler()
+
+    with profiler.activate():
+        df = get_actual_premier_league_table("2023-24", base_url=base_url)
+
+    expected = load_table("actual_premier_league_tables", "2023-24", data_dir=DATA_DIR)
+    pd.testing.assert_frame_equal(
+        apply_schema(df, "actual_premier_league_tables"), expected
+    )
+    # Only the section list and the league table section are requested
+    assert [
+        (path, params.get("prop"), params.get("section"))
+        for path, params in handler.served
+    ] == [
+        ("/w/api.php", "sections", None),
+        ("/w/api.php", "text", "6"),
+    ]
+    (table_span,) = profiler.spans
+    assert table_span.attributes == {"season": "2023-24", "source": "section"}
+
+
+@pytest.mark.parametrize("season", ["2016-17", "2020-21"])
+def test_get_actual_premier_league_table_falls_back_to_full_page(
+    wikipedia_server, capsys, season
+):
+    # 2016-17 has no API responses and 2020-21 an API error
+    base_url, handler = wikipedia_server
+    profiler = Profiler()
+
+    with profiler.activate():
+        df = get_actual_premier_league_table(season, base_url=base_url)
+
+    expected = load_table("actual_premier_league_tables", season, data_dir=DATA_DIR)
+    pd.testing.assert_frame_equal(
+        apply_schema(df, "actual_premier_league_tables"), expected
+    )
+    assert handler.served[-1] == (f"/wiki/{season}_Premier_League", {})
+
+    # The report and the output say the full page was parsed, and why
+    url = f"{base_url}/wiki/{season}_Premier_League"
+    (table_span,) = profiler.spans
+    assert table_span.attributes["source"] == "full_page"
+    assert table_span.attributes["url"] == url
+    assert table_span.attributes["section_error"]
+    assert url in capsys.readouterr().out
+
+
+def test_get_actual_premier_league_table_fetches_other_section(wikipedia_server):
+    # The league table is the seventh section, after the results matrix
+    base_url, handler = wikipedia_server
+
+    df = get_actual_premier_league_table("2015-16", base_url=base_url)
+
+    pd.testing.assert_frame_equal(df, TABLE_2015_16)
+    assert [params.get("section") for _, params in handler.served] == [None, "7"]
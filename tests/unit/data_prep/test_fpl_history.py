@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_prep.fpl_history import (
+    HISTORY_METRICS,
+    HISTORY_TABLE,
+    TeamHistory,
+    build_team_history,
+)
+from src.data_prep.fpl_pl_table_players import (
+    aggregate_fpl_data,
+    combine_fpl_aggregates,
+    process_fpl_data,
+)
+from src.data_prep.join_table_data import sort_and_rank
+from src.data_prep.storage import save_table
+
+SOURCE_COLUMNS = [
+    "total_points",
+    "goals_scored",
+    "assists",
+    "clean_sheets",
+    "yellow_cards",
+    "red_cards",
+    "goals_conceded",
+    "own_goals",
+    "penalties_missed",
+    "penalties_saved",
+    "saves",
+    "bonus",
+]
+
+
+def make_merged_gw(n_gameweeks=8, seed=0):
+    # Sample merged gameweek data for four teams, with gaps in the gameweeks
+    rng = np.random.default_rng(seed)
+    teams = ["Arsenal", "Chelsea", "Everton", "Spurs"]
+    positions = ["GK", "DEF", "MID", "FWD"]
+    players = pd.DataFrame(
+        {
+            "element": range(1, 33),
+            "name": [f"Player_{i}" for i in range(32)],
+            "team": [teams[i % 4] for i in range(32)],
+            "position": [positions[(i // 4) % 4] for i in range(32)],
+        }
+    )
+    df = pd.concat(
+        [players.assign(GW=gw) for gw in range(1, n_gameweeks + 1)],
+        ignore_index=True,
+    )
+    for column in SOURCE_COLUMNS:
+        df[column] = rng.integers(0, 10, len(df))
+    df["value"] = rng.integers(40, 130, len(df))
+
+    # Everton have a blank gameweek 3
+    df = df[~((df["team"] == "Everton") & (df["GW"] == 3))]
+    return df[rng.random(len(df)) > 0.1].reset_index(drop=True)
+
+
+def make_history(df):
+    return TeamHistory.from_table(build_team_history(aggregate_fpl_data(df)["team_gw"]))
+
+
+def expected_table(df):
+    summary_df, _ = process_fpl_data(df, "2024-25")
+    return sort_and_rank(summary_df)[["Pos", "team", *HISTORY_METRICS]]
+
+
+def test_table_as_of_latest_gameweek_matches_season_table():
+    df = make_merged_gw()
+
+    result = make_history(df).table()
+
+    pd.testing.assert_frame_equal(result, expected_table(df))
+
+
+@pytest.mark.parametrize("first, last", [(1, 1), (1, 5), (3, 6), (8, 8)])
+def test_table_over_gameweek_range_matches_recompute(first, last):
+    df = make_merged_gw()
+
+    result = make_history(df).table(first, last)
+
+    expected = expected_table(df[df["GW"].between(first, last)])
+    if len(expected) < 4:
+        # A team without rows in the range has zero totals
+        assert (
+            result.loc[~result["team"].isin(expected["team"]), "total_points"]
+            .eq(0)
+            .all()
+        )
+        result = result[result["team"].isin(expected["team"])].reset_index(drop=True)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_blank_gameweek_repeats_previous_totals():
+    history_df = build_team_history(aggregate_fpl_data(make_merged_gw())["team_gw"])
+
+    everton = history_df[history_df["team"] == "Everton"].set_index("GW")
+
+    assert len(history_df) == 4 * 8
+    assert everton.loc[3, HISTORY_METRICS].equals(everton.loc[2, HISTORY_METRICS])
+
+
+def test_rank_history_matches_tables_as_of_each_gameweek():
+    history = make_history(make_merged_gw())
+
+    ranks = history.rank_history()
+
+    assert list(ranks["GW"].unique()) == list(range(1, 9))
+    for gameweek in [1, 4, 8]:
+        table = history.table(last_gameweek=gameweek)
+        result = ranks[ranks["GW"] == gameweek]
+        assert result["team"].tolist() == table["team"].tolist()
+        assert result["Pos"].tolist() == [1, 2, 3, 4]
+
+
+def test_history_combines_across_refreshes():
+    df = make_merged_gw()
+
+    aggregates = combine_fpl_aggregates(
+        aggregate_fpl_data(df[df["GW"] <= 5]), aggregate_fpl_data(df[df["GW"] > 5])
+    )
+
+    pd.testing.assert_frame_equal(
+        build_team_history(aggregates["team_gw"]),
+        build_team_history(aggregate_fpl_data(df)["team_gw"]),
+    )
+
+
+def test_history_round_trips_through_storage(tmp_path):
+    df = make_merged_gw()
+    history_df = build_team_history(aggregate_fpl_data(df)["team_gw"])
+    save_table(history_df, HISTORY_TABLE, "2024-25", data_dir=tmp_path)
+
+    history = TeamHistory.load("2024-25", data_dir=tmp_path)
+
+    assert history.last_gameweek == 8
+    pd.testing.assert_frame_equal(history.table(2, 7), make_history(df).table(2, 7))
+
+
+def test_totals_rejects_gameweeks_outside_history():
+    history = make_history(make_merged_gw())
+
+    with pytest.raises(ValueError):
+        history.totals(0, 3)
+    with pytest.raises(ValueError):
+        history.totals(5, 4)
+    with pytest.raises(ValueError):
+        history.totals(1, 9)
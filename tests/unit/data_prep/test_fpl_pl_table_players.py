@@ -0,0 +1,352 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_prep.fpl_pl_table_players import (
+    aggregate_fpl_chunks,
+    aggregate_fpl_gameweeks,
+    read_merged_gw_chunks,
+    aggregate_fpl_data,
+    combine_fpl_aggregates,
+    finalise_fpl_data,
+    prefetch_season_files,
+    process_fpl_data,
+    read_fpl_aggregates_incremental,
+    save_season_data,
+)
+from src.data_prep.player_cube import aggregate_cube_cells, build_player_cube
+
+STAT_COLUMNS = [
+    "total_points",
+    "goals_scored",
+    "assists",
+    "clean_sheets",
+    "yellow_cards",
+    "red_cards",
+    "goals_conceded",
+    "own_goals",
+    "penalties_missed",
+    "penalties_saved",
+    "saves",
+    "bonus",
+]
+
+
+def make_merged_gw(n_players=40, n_gameweeks=6, seed=0):
+    # Sample merged gameweek data, one row per player per gameweek
+    rng = np.random.default_rng(seed)
+    teams = ["Arsenal", "Chelsea", "Everton", "Spurs"]
+    positions = ["GK", "DEF", "MID", "FWD"]
+    players = pd.DataFrame(
+        {
+            "element": range(1, n_players + 1),
+            "name": [f"Player_{i % 35}" for i in range(n_players)],
+            "team": [teams[i % len(teams)] for i in range(n_players)],
+            "position": [
+                positions[(i // 4) % len(positions)] for i in range(n_players)
+            ],
+        }
+    )
+    df = pd.concat(
+        [players.assign(GW=gw) for gw in range(1, n_gameweeks + 1)],
+        ignore_index=True,
+    )
+    for column in STAT_COLUMNS:
+        df[column] = rng.integers(0, 10, len(df))
+    df["value"] = rng.integers(40, 130, len(df))
+
+    # Drop some rows, so not every player appears in every gameweek
+    return df[rng.random(len(df)) > 0.1].reset_index(drop=True)
+
+
+def test_process_fpl_data():
+    df = make_merged_gw()
+
+    summary_df, player_df = process_fpl_data(df, "2024-25")
+
+    assert summary_df["total_points"].sum() == df["total_points"].sum()
+    assert summary_df["total_points"].is_monotonic_decreasing
+    assert (
+        summary_df[["gk_points", "def_points", "mid_points", "fwd_points"]]
+        .sum(axis=1)
+        .eq(summary_df["total_points"])
+        .all()
+    )
+    assert summary_df["total_points"].dtype == "int32"
+    assert summary_df["red_cards"].dtype == "int16"
+    assert summary_df["team"].dtype == "category"
+    assert player_df["Position"].dtype == "category"
+    assert set(player_df["Team"].dropna()) == {"Arsenal", "Chelsea", "Everton", "Spurs"}
+    assert player_df.columns[0] == "Player Name"
+
+
+@pytest.mark.parametrize("split_gameweek", [1, 3, 5])
+def test_combine_fpl_aggregates_matches_full_recompute(split_gameweek):
+    df = make_merged_gw()
+
+    aggregates = combine_fpl_aggregates(
+        aggregate_fpl_data(df[df["GW"] <= split_gameweek]),
+        aggregate_fpl_data(df[df["GW"] > split_gameweek]),
+    )
+
+    for expected, result in zip(
+        process_fpl_data(df, "2024-25"), finalise_fpl_data(aggregates)
+    ):
+        assert result.to_csv(index=False) == expected.to_csv(index=False)
+
+
+def test_read_fpl_aggregates_incremental_matches_full_recompute(mocker, tmp_path):
+    df = make_merged_gw()
+    merged_gw_path = tmp_path / "merged_gw.csv"
+    mocker.patch(
+        "src.data_prep.fpl_pl_table_players.fetch_url_to_file",
+        return_value=merged_gw_path,
+    )
+
+    # Refresh after each gameweek, saving the aggregates in between
+    for gameweek in range(1, df["GW"].max() + 1):
+        df[df["GW"] <= gameweek].to_csv(merged_gw_path, index=False)
+        result = finalise_fpl_data(
+            read_fpl_aggregates_incremental("2024-25", tmp_path / "aggregates")
+        )
+
+    # A refresh with no new gameweek leaves the tables unchanged
+    rerun = finalise_fpl_data(
+        read_fpl_aggregates_incremental("2024-25", tmp_path / "aggregates")
+    )
+
+    for expected, incremental, unchanged in zip(
+        process_fpl_data(df, "2024-25"), result, rerun
+    ):
+        assert incremental.to_csv(index=False) == expected.to_csv(index=False)
+        assert unchanged.to_csv(index=False) == expected.to_csv(index=False)
+
+
+@pytest.mark.parametrize("trailing_gameweeks", [0, 1, 2])
+def test_read_fpl_aggregates_incremental_counts_late_rows(
+    mocker, tmp_path, trailing_gameweeks
+):
+    df = make_merged_gw()
+    merged_gw_path = tmp_path / "merged_gw.csv"
+    mocker.patch(
+        "src.data_prep.fpl_pl_table_players.fetch_url_to_file",
+        return_value=merged_gw_path,
+    )
+    late_index = df.index[(df["GW"] == 5) & (df["total_points"] > 0)][0]
+    on_time = df[(df["GW"] <= 5) & (df.index != late_index)]
+    on_time.to_csv(merged_gw_path, index=False)
+    read_fpl_aggregates_incremental(
+        "2024-25", tmp_path / "aggregates", trailing_gameweeks=trailing_gameweeks
+    )
+
+    # A row of gameweek 5 is appended after gameweek 5 was processed
+    late_row = df.loc[[late_index]]
+    pd.concat([on_time, late_row]).to_csv(merged_gw_path, index=False)
+    aggregates = read_fpl_aggregates_incremental(
+        "2024-25", tmp_path / "aggregates", trailing_gameweeks=trailing_gameweeks
+    )
+
+    summary_df, _ = finalise_fpl_data(aggregates)
+    expected = on_time["total_points"].sum() + late_row["total_points"].item()
+    counted = summary_df["total_points"].sum() == expected
+    assert counted == (trailing_gameweeks > 0)
+
+
+def test_aggregate_fpl_chunks_matches_full_recompute(mocker, tmp_path):
+    df = make_merged_gw()
+    # Columns that are not used are not read
+    df["kickoff_time"] = "2024-08-16T19:00:00Z"
+    df.to_csv(tmp_path / "merged_gw.csv", index=False)
+    mocker.patch(
+        "src.data_prep.fpl_pl_table_players.fetch_url_to_file",
+        return_value=tmp_path / "merged_gw.csv",
+    )
+
+    with read_merged_gw_chunks("2024-25", chunksize=17) as chunks:
+        aggregates = aggregate_fpl_chunks(chunks, "2024-25")
+
+    for expected, result in zip(
+        process_fpl_data(df, "2024-25"), finalise_fpl_data(aggregates)
+    ):
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_chunks_without_positions_fetch_player_lists_once(mocker, tmp_path):
+    df = make_merged_gw()
+    # Older seasons have no team or position columns, so they are looked up
+    # in the player list and the team list of every season
+    players = df.drop_duplicates("element")
+    teams = sorted(df["team"].unique())
+    positions = ["GK", "DEF", "MID", "FWD"]
+    pd.DataFrame(
+        {
+            "id": players["element"],
+            "team": players["team"].map(teams.index) + 1,
+            "element_type": players["position"].map(positions.index) + 1,
+        }
+    ).to_csv(tmp_path / "players_raw.csv", index=False)
+    pd.DataFrame(
+        {
+            "season": ["2019-20"] * len(teams) + ["2018-19"],
+            "team": [*range(1, len(teams) + 1), 1],
+            "team_name": [*teams, "Cardiff"],
+        }
+    ).to_csv(tmp_path / "master_team_list.csv", index=False)
+    df.drop(columns=["team", "position"]).to_csv(
+        tmp_path / "merged_gw.csv", index=False
+    )
+    fetch_url_to_file = mocker.patch(
+        "src.data_prep.fpl_pl_table_players.fetch_url_to_file",
+        side_effect=lambda url, **kwargs: tmp_path / url.rsplit("/", 1)[1],
+    )
+
+    with read_merged_gw_chunks("2019-20", chunksize=17) as chunks:
+        aggregates = aggregate_fpl_chunks(chunks, "2019-20")
+    with read_merged_gw_chunks("2019-20", chunksize=17) as chunks:
+        gameweek_aggregates = aggregate_fpl_gameweeks(chunks, "2019-20")
+
+    fetched = [
+        call.args[0].rsplit("/", 1)[1] for call in fetch_url_to_file.call_args_list
+    ]
+    assert fetched.count("players_raw.csv") == 2
+    assert fetched.count("master_team_list.csv") == 2
+    for expected, result in zip(
+        process_fpl_data(df, "2019-20"), finalise_fpl_data(aggregates)
+    ):
+        assert result.to_csv(index=False) == expected.to_csv(index=False)
+    assert sorted(gameweek_aggregates) == list(range(1, df["GW"].max() + 1))
+
+
+def serve_season_files(mocker, tmp_path, df):
+    # Serve merged_gw.csv and a players_raw.csv giving player n the code 1000 + n
+    merged_gw_path = tmp_path / "merged_gw.csv"
+    players_raw_path = tmp_path / "players_raw.csv"
+    elements = df["element"].unique()
+    pd.DataFrame({"id": elements, "code": elements + 1000}).to_csv(
+        players_raw_path, index=False
+    )
+    mocker.patch(
+        "src.data_prep.fpl_pl_table_players.fetch_url_to_file",
+        side_effect=lambda url, **kwargs: (
+            players_raw_path if url.endswith("players_raw.csv") else merged_gw_path
+        ),
+    )
+    return merged_gw_path
+
+
+def test_save_season_data_builds_cube_from_streamed_chunks(mocker, tmp_path):
+    df = make_merged_gw()
+    merged_gw_path = serve_season_files(mocker, tmp_path, df)
+    read_csv = mocker.spy(pd, "read_csv")
+    mocker.patch("src.data_prep.fpl_pl_table_players.write_season_data")
+    write_player_cube = mocker.patch(
+        "src.data_prep.fpl_pl_table_players.write_player_cube"
+    )
+    expected_cube, expected_rows = build_player_cube(aggregate_cube_cells(df))
+
+    # A full recompute, then refreshes folding in one gameweek at a time
+    df.to_csv(merged_gw_path, index=False)
+    save_season_data(2024)
+    for gameweek in range(1, df["GW"].max() + 1):
+        df[df["GW"] <= gameweek].to_csv(merged_gw_path, index=False)
+        save_season_data(2024, aggregates_dir=tmp_path / "aggregates")
+
+    # Every run reads merged_gw.csv once, in chunks
+    merged_gw_reads = [
+        call for call in read_csv.call_args_list if call.args[0] == merged_gw_path
+    ]
+    assert len(merged_gw_reads) == 1 + df["GW"].max()
+    assert all(call.kwargs.get("chunksize") for call in merged_gw_reads)
+    for call in [write_player_cube.call_args_list[0], write_player_cube.call_args]:
+        cube, rows = build_player_cube(call.args[0])
+        np.testing.assert_array_equal(cube, expected_cube)
+        pd.testing.assert_frame_equal(rows, expected_rows)
+
+
+def test_save_season_data_adds_player_codes(mocker, tmp_path):
+    df = make_merged_gw()
+    # Player 40 is missing from the player list
+    merged_gw_path = serve_season_files(mocker, tmp_path, df[df["element"] != 40])
+    df.to_csv(merged_gw_path, index=False)
+    write_season_data = mocker.patch(
+        "src.data_prep.fpl_pl_table_players.write_season_data"
+    )
+    mocker.patch("src.data_prep.fpl_pl_table_players.write_player_cube")
+
+    save_season_data(2024)
+
+    player_df = write_season_data.call_args.args[2].set_index("element")
+    assert player_df["code"].dtype == "Int32"
+    assert player_df["code"].drop(40).eq(player_df.index.drop(40) + 1000).all()
+    assert pd.isna(player_df.loc[40, "code"])
+
+
+def test_aggregate_fpl_data_matches_groupby():
+    df = make_merged_gw()
+    # Rows with a missing team or an unknown position, and a float column
+    df.loc[::7, "team"] = np.nan
+    df.loc[::5, "position"] = "Unknown"
+    df["saves"] = df["saves"].astype(float)
+    df.loc[::3, "saves"] = np.nan
+
+    aggregates = aggregate_fpl_data(df)
+
+    position_points = {
+        f"{position.lower()}_points": df["total_points"].where(
+            df["position"] == position, 0
+        )
+        for position in ["GK", "DEF", "MID", "FWD"]
+    }
+    expected_team = (
+        df.assign(**position_points)
+        .groupby("team")[["total_points", *position_points, *STAT_COLUMNS[1:]]]
+        .sum()
+        .rename(columns={"bonus": "bonus_points"})
+        .reset_index()
+    )
+    expected_player = (
+        df.groupby("element")[STAT_COLUMNS]
+        .sum()
+        .rename(columns={"bonus": "bonus_points"})
+        .reset_index()
+    )
+    pd.testing.assert_frame_equal(aggregates["team"], expected_team)
+    pd.testing.assert_frame_equal(aggregates["player"], expected_player)
+
+
+def test_finalise_fpl_data_keys_players_on_element():
+    df = make_merged_gw()
+    # Players 1 and 36 share a name, older seasons append the element ID to
+    # names, and player 2 misses the latest gameweek
+    df.loc[df["element"] == 1, "name"] = "Sam_Smith"
+    df.loc[df["element"] == 36, "name"] = "Sam_Smith_36"
+    df = df[~((df["element"] == 2) & (df["GW"] == 6))]
+
+    _, player_df = process_fpl_data(df, "2024-25")
+
+    assert len(player_df) == df["element"].nunique()
+    assert player_df["element"].is_unique
+    assert (player_df["Player Name"] == "Sam Smith").sum() == 2
+    player = player_df.set_index("element").loc[2]
+    assert player["Team"] == "Chelsea"
+    assert player["Position"] == "GK"
+    assert player["Total Points"] == df.loc[df["element"] == 2, "total_points"].sum()
+
+
+def test_prefetch_season_files_fetches_one_batch(mocker):
+    fetch_urls_to_files = mocker.patch(
+        "src.data_prep.fpl_pl_table_players.fetch_urls_to_files",
+        return_value=({}, {"players_raw": ValueError("404")}),
+    )
+
+    errors = prefetch_season_files([2022, 2023], immutable=True)
+
+    assert errors is fetch_urls_to_files.return_value[1]
+    fetch_urls_to_files.assert_called_once()
+    urls = fetch_urls_to_files.call_args.args[0]
+    assert [url.rsplit("/data/", 1)[1] for url in urls] == [
+        "2022-23/gws/merged_gw.csv",
+        "2022-23/players_raw.csv",
+        "2023-24/gws/merged_gw.csv",
+        "2023-24/players_raw.csv",
+    ]
+    assert fetch_urls_to_files.call_args.kwargs == {"immutable": True}
@@ -12,6 +12,9 @@ from src.data_prep.join_table_data import (
     join_table_data,
     get_list_of_seasons,
 )
+from src.data_prep.ranking import RANKING_METRICS
+from src.data_prep.schema import TABLE_SCHEMAS, apply_schema
+from src.data_prep.storage import save_table, table_path
 
 
 def test_load_table_data(mocker):
@@ -19,12 +22,17 @@ def test_load_table_data(mocker):
     fpl_data = pd.DataFrame({"Team": ["Team A", "Team B"], "Points": [70, 65]})
     actual_data = pd.DataFrame({"Team": ["Team A", "Team B"], "Points": [68, 64]})
 
-    # Mock the pd.read_csv function to return the sample data
-    mocker.patch("pandas.read_csv", side_effect=[fpl_data, actual_data])
+    # Mock the storage layer to return the sample data
+    load_table = mocker.patch(
+        "src.data_prep.join_table_data.load_table", side_effect=[fpl_data, actual_data]
+    )
 
     # Call the function with a sample season
     fpl_pl_table, actual_pl_table = load_table_data("2023-24")
 
+    load_table.assert_any_call("fpl_premier_league_tables", "2023-24")
+    load_table.assert_any_call("actual_premier_league_tables", "2023-24")
+
     # Assertions to check if the returned data matches the sample data
     pd.testing.assert_frame_equal(fpl_pl_table, fpl_data)
     pd.testing.assert_frame_equal(actual_pl_table, actual_data)
@@ -123,6 +131,19 @@ def test_sort_and_rank():
     pd.testing.assert_frame_equal(result, expected_data)
 
 
+def test_sort_and_rank_breaks_ties_by_team():
+    fpl_data = pd.DataFrame(
+        {column: [50, 50, 50, 60] for column in RANKING_METRICS}
+        | {"team": ["Arsenal", "Wolves", "Chelsea", "Spurs"]}
+    )
+
+    result = sort_and_rank(fpl_data)
+
+    # Level teams are ordered by name in reverse, as before
+    assert result["team"].tolist() == ["Spurs", "Wolves", "Chelsea", "Arsenal"]
+    assert result["Pos"].tolist() == [1, 2, 3, 4]
+
+
 def test_calculate_rank_difference():
     # Sample data to use for testing
     fpl_data = pd.DataFrame(
@@ -137,7 +158,7 @@ def test_calculate_rank_difference():
             "team": ["Team A", "Team B", "Team C"],
             "Pos": [1, 2, 3],
             "Actual Pos": [2, 1, 3],
-            "Difference": ["⬆️ +1", "⬇️ -1", " "],
+            "Difference": [1, -1, 0],
         }
     )
 
@@ -156,7 +177,7 @@ def test_reorder_and_rename_columns():
             "team": ["Team A", "Team B"],
             "total_points": [100, 90],
             "Actual Pos": [1, 2],
-            "Difference": [" ", " "],
+            "Difference": [0, 0],
             "gk_points": [10, 9],
             "def_points": [20, 18],
             "mid_points": [30, 27],
@@ -182,7 +203,7 @@ def test_reorder_and_rename_columns():
             "Team": ["Team A", "Team B"],
             "Points": [100, 90],
             "Actual Pos": [1, 2],
-            "Difference": [" ", " "],
+            "Difference": [0, 0],
             "GK Points": [10, 9],
             "DEF Points": [20, 18],
             "MID Points": [30, 27],
@@ -227,7 +248,7 @@ def test_join_table_data(mocker):
             "Team": ["Team A", "Team B"],
             "Points": [70, 65],
             "Actual Pos": [1, 2],
-            "Difference": [" ", " "],
+            "Difference": [0, 0],
             "GK Points": [10, 9],
             "DEF Points": [20, 18],
             "MID Points": [30, 27],
@@ -266,7 +287,10 @@ def test_join_table_data(mocker):
     result = join_table_data("2023-24", team_name_mapping)
 
     # Assertions to check if the returned data matches the expected data
-    pd.testing.assert_frame_equal(result, expected_data)
+    pd.testing.assert_frame_equal(
+        result, apply_schema(expected_data, "fpl_premier_league_tables_joined")
+    )
+    assert result["Difference"].dtype == "int8"
 
 
 def test_get_list_of_seasons(mocker):
@@ -282,3 +306,51 @@ def test_get_list_of_seasons(mocker):
 
     # Assertions to check if the returned data matches the expected data
     assert result == expected_seasons
+
+
+def save_season_inputs(season, points):
+    # Save FPL and actual tables for a season with two teams
+    fpl_table = pd.DataFrame(
+        {
+            column: [1, 0]
+            for column in TABLE_SCHEMAS["fpl_premier_league_tables"]
+            if column != "team"
+        }
+    )
+    fpl_table.insert(0, "team", ["Team A", "Team B"])
+    fpl_table["total_points"] = points
+    save_table(fpl_table, "fpl_premier_league_tables", season)
+    save_table(
+        pd.DataFrame(
+            {"Pos": [1, 2], "Team": ["Actual Team A", "Actual Team B"], "Pts": [3, 0]}
+        ),
+        "actual_premier_league_tables",
+        season,
+    )
+
+
+def test_join_all_seasons_only_rebuilds_changed_seasons(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    team_name_mapping = {"Team A": "Actual Team A", "Team B": "Actual Team B"}
+    for season in ["2022-23", "2023-24"]:
+        save_season_inputs(season, [70, 65])
+
+    assert sorted(join_all_seasons(team_name_mapping)) == ["2022-23", "2023-24"]
+    assert join_all_seasons(team_name_mapping) == []
+
+    # Changed inputs
+    save_season_inputs("2023-24", [60, 65])
+    assert join_all_seasons(team_name_mapping) == ["2023-24"]
+
+    # A missing joined table
+    (tmp_path / table_path("fpl_premier_league_tables_joined", "2022-23")).unlink()
+    assert join_all_seasons(team_name_mapping) == ["2022-23"]
+
+    # A changed mapping
+    team_name_mapping["Team C"] = "Actual Team C"
+    assert sorted(join_all_seasons(team_name_mapping)) == ["2022-23", "2023-24"]
+
+    assert sorted(join_all_seasons(team_name_mapping, force=True)) == [
+        "2022-23",
+        "2023-24",
+    ]
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_prep.fpl_pl_table_players import process_fpl_data
+from src.data_prep.player_cube import (
+    CUBE_METRICS,
+    PlayerCube,
+    aggregate_cube_cells,
+    build_player_cube,
+    combine_cube_cells,
+    player_cube_exists,
+    write_player_cube,
+)
+
+SOURCE_COLUMNS = [
+    "total_points",
+    "minutes",
+    "goals_scored",
+    "assists",
+    "clean_sheets",
+    "yellow_cards",
+    "red_cards",
+    "goals_conceded",
+    "own_goals",
+    "penalties_missed",
+    "penalties_saved",
+    "saves",
+    "bonus",
+]
+
+
+def make_merged_gw(n_gameweeks=6, seed=0):
+    # Sample merged gameweek data for three teams, with some missed gameweeks
+    rng = np.random.default_rng(seed)
+    teams = ["Arsenal", "Chelsea", "Spurs"]
+    positions = ["GK", "DEF", "MID", "FWD"]
+    players = pd.DataFrame(
+        {
+            "element": range(1, 25),
+            "name": [f"Player_{i}" for i in range(24)],
+            "team": [teams[i % 3] for i in range(24)],
+            "position": [positions[(i // 3) % 4] for i in range(24)],
+        }
+    )
+    df = pd.concat(
+        [players.assign(GW=gw) for gw in range(1, n_gameweeks + 1)],
+        ignore_index=True,
+    )
+    for column in SOURCE_COLUMNS:
+        df[column] = rng.integers(0, 10, len(df))
+    df["value"] = rng.integers(40, 130, len(df))
+    return df[rng.random(len(df)) > 0.1].reset_index(drop=True)
+
+
+def make_cube(df):
+    cube, rows = build_player_cube(aggregate_cube_cells(df))
+    return PlayerCube(cube, rows, CUBE_METRICS)
+
+
+def test_team_totals_match_team_table():
+    df = make_merged_gw()
+    cube = make_cube(df)
+
+    summary_df, _ = process_fpl_data(df, "2024-25")
+
+    totals = cube.team_totals("total_points").sum(axis=1)
+    expected = summary_df.set_index("team")["total_points"].sort_index()
+    assert totals.tolist() == expected.tolist()
+    assert totals.index.tolist() == expected.index.tolist()
+
+
+def test_position_totals_match_position_points():
+    df = make_merged_gw()
+    cube = make_cube(df)
+
+    summary_df, _ = process_fpl_data(df, "2024-25")
+
+    totals = cube.position_totals("total_points")
+    for position in ["GK", "DEF", "MID", "FWD"]:
+        expected = summary_df.set_index("team")[f"{position.lower()}_points"]
+        result = totals.xs(position, level="position")
+        assert result.to_dict() == expected.to_dict()
+
+
+def test_player_totals_over_gameweek_range():
+    df = make_merged_gw()
+    cube = make_cube(df)
+
+    result = cube.player_totals("goals_scored", 2, 4).set_index("element")
+
+    expected = df[df["GW"].between(2, 4)].groupby("element")["goals_scored"].sum()
+    assert result.loc[expected.index, "goals_scored"].tolist() == expected.tolist()
+
+
+def test_transferred_player_has_a_row_per_team():
+    df = make_merged_gw()
+    moved = (df["element"] == 1) & (df["GW"] > 3)
+    df.loc[moved, "team"] = "Spurs"
+    df.loc[moved, "name"] = "Player_0 Renamed"
+
+    _, rows = build_player_cube(aggregate_cube_cells(df))
+
+    player_rows = rows[rows["element"] == 1]
+    assert player_rows["team"].tolist() == ["Arsenal", "Spurs"]
+    assert player_rows["name"].tolist() == ["Player_0", "Player_0 Renamed"]
+
+
+def test_value_is_the_gameweek_maximum():
+    df = make_merged_gw()
+    # A double gameweek, with a price rise between the fixtures
+    double = df[(df["element"] == 2) & (df["GW"] == 1)].assign(value=200)
+    df = pd.concat([df, double], ignore_index=True)
+    cube = make_cube(df)
+
+    row = cube.rows.index[cube.rows["element"] == 2][0]
+    assert cube.metric("value")[row, 0] == 200
+
+
+@pytest.mark.parametrize("chunksize", [1, 17, 100])
+def test_combine_cube_cells_matches_full_recompute(chunksize):
+    df = make_merged_gw()
+    # A player renamed mid-season, and a double gameweek split across chunks
+    df.loc[(df["element"] == 1) & (df["GW"] > 3), "name"] = "Player_0 Renamed"
+    double = df[(df["element"] == 2) & (df["GW"] == 1)].assign(value=200)
+    df = pd.concat([df, double], ignore_index=True)
+
+    cells = aggregate_cube_cells(df.iloc[:chunksize])
+    for start in range(chunksize, len(df), chunksize):
+        cells = combine_cube_cells(
+            cells, aggregate_cube_cells(df.iloc[start : start + chunksize])
+        )
+
+    cube, rows = build_player_cube(cells)
+    expected_cube, expected_rows = build_player_cube(aggregate_cube_cells(df))
+    np.testing.assert_array_equal(cube, expected_cube)
+    pd.testing.assert_frame_equal(rows, expected_rows)
+
+
+def test_open_maps_cube_read_only(tmp_path):
+    df = make_merged_gw()
+    write_player_cube(aggregate_cube_cells(df), "2024-25", data_dir=tmp_path)
+
+    cube = PlayerCube.open("2024-25", data_dir=tmp_path)
+
+    assert player_cube_exists("2024-25", data_dir=tmp_path)
+    assert isinstance(cube.cube, np.memmap)
+    assert not cube.metric("total_points").flags.writeable
+    pd.testing.assert_frame_equal(
+        cube.team_totals("total_points", 2, 5),
+        make_cube(df).team_totals("total_points", 2, 5),
+    )
+
+
+def test_rewrite_keeps_open_cube_readable(tmp_path):
+    df = make_merged_gw()
+    write_player_cube(
+        aggregate_cube_cells(df[df["GW"] <= 3]), "2024-25", data_dir=tmp_path
+    )
+    old_cube = PlayerCube.open("2024-25", data_dir=tmp_path)
+    expected = old_cube.team_totals("total_points")
+
+    write_player_cube(aggregate_cube_cells(df), "2024-25", data_dir=tmp_path)
+
+    pd.testing.assert_frame_equal(old_cube.team_totals("total_points"), expected)
+    assert PlayerCube.open("2024-25", data_dir=tmp_path).n_gameweeks == 6
+
+
+def test_open_missing_cube(tmp_path):
+    assert not player_cube_exists("2024-25", data_dir=tmp_path)
+    with pytest.raises(FileNotFoundError):
+        PlayerCube.open("2024-25", data_dir=tmp_path)
@@ -0,0 +1,81 @@
+import pandas as pd
+from src.data_prep.player_dimension import (
+    aggregate_player_stints,
+    build_player_dimension,
+    combine_player_stints,
+    display_name,
+)
+
+
+def make_rows():
+    # Player 7 moves from Chelsea to Arsenal in gameweek 3 and is renamed, and
+    # players 8 and 9 share a name
+    return pd.DataFrame(
+        {
+            "element": [7, 8, 9, 7, 8, 9, 7, 9],
+            "name": [
+                "Joe_Bloggs_7",
+                "Sam_Smith_8",
+                "Sam_Smith_9",
+                "Joe_Bloggs_7",
+                "Sam_Smith_8",
+                "Sam_Smith_9",
+                "Joseph_Bloggs_7",
+                "Sam_Smith_9",
+            ],
+            "team": [
+                "Chelsea",
+                "Spurs",
+                "Everton",
+                "Chelsea",
+                "Spurs",
+                "Everton",
+                "Arsenal",
+                "Everton",
+            ],
+            "position": ["MID", "GK", "FWD", "MID", "GK", "FWD", "MID", "FWD"],
+            "GW": [1, 1, 1, 2, 2, 2, 3, 3],
+        }
+    )
+
+
+def test_display_name():
+    names = pd.Series(["Aaron_Cresswell_402", "Bukayo Saka", "Jota_Silva"])
+
+    assert display_name(names).tolist() == [
+        "Aaron Cresswell",
+        "Bukayo Saka",
+        "Jota Silva",
+    ]
+
+
+def test_aggregate_player_stints():
+    stints = aggregate_player_stints(make_rows())
+
+    assert stints.values.tolist() == [
+        [7, "Arsenal", "Joseph_Bloggs_7", "MID", 3, 3],
+        [7, "Chelsea", "Joe_Bloggs_7", "MID", 1, 2],
+        [8, "Spurs", "Sam_Smith_8", "GK", 1, 2],
+        [9, "Everton", "Sam_Smith_9", "FWD", 1, 3],
+    ]
+
+
+def test_combine_player_stints_matches_full_aggregate():
+    rows = make_rows()
+
+    combined = combine_player_stints(
+        aggregate_player_stints(rows[rows["GW"] <= 2]),
+        aggregate_player_stints(rows[rows["GW"] > 2]),
+    )
+
+    pd.testing.assert_frame_equal(combined, aggregate_player_stints(rows))
+
+
+def test_build_player_dimension():
+    players = build_player_dimension(aggregate_player_stints(make_rows()))
+
+    assert players.values.tolist() == [
+        [7, "Joseph Bloggs", "Arsenal", "MID", "Chelsea, Arsenal"],
+        [8, "Sam Smith", "Spurs", "GK", "Spurs"],
+        [9, "Sam Smith", "Everton", "FWD", "Everton"],
+    ]
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_prep.ranking import rank_order, rank_table, sort_key
+
+
+def test_sort_key_orders_strings_lexicographically():
+    teams = pd.Series(["Spurs", "Arsenal", "Wolves", "Arsenal"], dtype="category")
+
+    assert sort_key(teams, ascending=True).tolist() == [1, 0, 2, 0]
+    assert sort_key(teams).tolist() == [-1, 0, -2, 0]
+
+
+def test_rank_order_matches_sort_values():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "points": rng.integers(0, 5, 200),
+            "goals": rng.integers(0, 5, 200),
+            "team": rng.choice(["A", "B", "C", "D"], 200),
+        }
+    )
+
+    order = rank_order(df, ["points", "goals"], tiebreak=["team"])
+
+    expected = df.sort_values(
+        ["points", "goals", "team"], ascending=False, kind="stable"
+    )
+    assert order.tolist() == expected.index.tolist()
+
+
+@pytest.mark.parametrize(
+    "method, expected",
+    [("ordinal", [1, 2, 3, 4]), ("competition", [1, 1, 3, 4])],
+)
+def test_rank_table_ties(method, expected):
+    df = pd.DataFrame(
+        {
+            "team": ["A", "B", "C", "D"],
+            "points": [10, 30, 20, 30],
+            "goals": [1, 2, 5, 2],
+        }
+    )
+
+    result = rank_table(df, ["points", "goals"], tiebreak=["team"], method=method)
+
+    assert result["team"].tolist() == ["D", "B", "C", "A"]
+    assert result["Pos"].tolist() == expected
+
+
+def test_rank_table_ranks_many_tables_at_once():
+    df = pd.DataFrame(
+        {
+            "season": ["2024-25", "2023-24", "2024-25", "2023-24", "2023-24"],
+            "team": ["A", "A", "B", "B", "C"],
+            "points": [50, 40, 60, 40, 70],
+        }
+    )
+
+    result = rank_table(df, ["points"], group_by="season", method="competition")
+
+    assert result[["season", "team", "Pos"]].values.tolist() == [
+        ["2023-24", "C", 1],
+        ["2023-24", "A", 2],
+        ["2023-24", "B", 2],
+        ["2024-25", "B", 1],
+        ["2024-25", "A", 2],
+    ]
+
+
+def test_rank_table_ascending_metric():
+    df = pd.DataFrame({"team": ["A", "B", "C"], "goals_conceded": [30, 20, 40]})
+
+    result = rank_table(df, ["goals_conceded"], ascending=True, rank_column="Rank")
+
+    assert result["team"].tolist() == ["B", "A", "C"]
+    assert result["Rank"].tolist() == [1, 2, 3]
+
+
+def test_rank_table_unknown_method():
+    with pytest.raises(ValueError):
+        rank_table(pd.DataFrame({"points": [1]}), ["points"], method="dense")
@@ -0,0 +1,223 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from src.dashboard.manifest import (
+    build_dashboard_manifest,
+    load_dashboard_manifest,
+    save_dashboard_manifest,
+)
+from src.data_prep.player_cube import META_FILE, cube_dir
+from src.data_prep.refresh_pipeline import FPL_TABLES, build_refresh_tasks
+from src.data_prep.storage import table_path
+from src.tools.task_graph import run_task_graph
+
+
+@pytest.fixture
+def refresh(mocker, tmp_path, monkeypatch):
+    # Run in an empty data directory with every fetch and save mocked
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    mocks = {
+        "gameweek": mocker.patch(
+            "src.data_prep.refresh_pipeline.fetch_current_gameweek", return_value=5
+        ),
+        "fpl_current": mocker.patch(
+            "src.data_prep.fpl_pl_table_players.get_current_season_fpl"
+        ),
+        "fpl_completed": mocker.patch(
+            "src.data_prep.fpl_pl_table_players.save_season_data"
+        ),
+        "actual": mocker.patch("src.data_prep.actual_pl_table.save_season_data"),
+        "prefetch": mocker.patch(
+            "src.data_prep.fpl_pl_table_players.prefetch_season_files",
+            return_value={},
+        ),
+        "join": mocker.patch("src.data_prep.refresh_pipeline.join_all_seasons"),
+        "stale": mocker.patch(
+            "src.data_prep.refresh_pipeline.get_stale_seasons", return_value=["2024-25"]
+        ),
+    }
+
+    def run(first=2024, last=2024, **kwargs):
+        tasks = build_refresh_tasks(first, last, 2024, {}, **kwargs)
+        return run_task_graph(tasks, jobs=2)[0]
+
+    return run, mocks
+
+
+def save_tables(season, tables):
+    for table in tables:
+        path = table_path(table, season)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "w").close()
+
+
+def save_player_cube(season):
+    os.makedirs(cube_dir(season))
+    open(os.path.join(cube_dir(season), META_FILE), "w").close()
+
+
+def test_refresh_processes_new_gameweek(refresh):
+    run, mocks = refresh
+
+    statuses = run()
+
+    assert set(statuses.values()) == {"ran"}
+    assert list(statuses) == [
+        "current_gameweek",
+        "fpl:2024-25",
+        "actual:2024-25",
+        "join",
+        "metadata",
+        "manifest",
+    ]
+    mocks["fpl_current"].assert_called_once()
+    with open("data/scoring_meta.json") as file:
+        assert json.load(file) == {"scoring_data_gameweek": 5}
+    assert load_dashboard_manifest()["scoring_data_gameweek"] == 5
+
+
+def test_refresh_skips_scored_gameweek(refresh):
+    run, mocks = refresh
+    save_tables("2024-25", FPL_TABLES)
+    save_player_cube("2024-25")
+    save_tables("2024-25", ["actual_premier_league_tables"])
+    with open("data/scoring_meta.json", "w") as file:
+        json.dump({"scoring_data_gameweek": 5}, file)
+    save_dashboard_manifest(build_dashboard_manifest())
+    mocks["stale"].return_value = []
+
+    statuses = run()
+
+    assert statuses == {
+        "current_gameweek": "ran",
+        "fpl:2024-25": "up to date",
+        "actual:2024-25": "up to date",
+        "join": "up to date",
+        "metadata": "up to date",
+        "manifest": "up to date",
+    }
+    mocks["fpl_current"].assert_not_called()
+    mocks["join"].assert_not_called()
+
+
+def test_refresh_backfills_missing_completed_seasons(refresh, mocker):
+    run, mocks = refresh
+    save_tables("2022-23", FPL_TABLES)
+    save_player_cube("2022-23")
+    save_tables("2022-23", ["actual_premier_league_tables"])
+    # Saved before the player cube was added, so only the cube is missing
+    save_tables("2021-22", FPL_TABLES)
+    save_tables("2021-22", ["actual_premier_league_tables"])
+
+    statuses = run(first=2021, last=2023, stages=["fpl", "actual", "join"])
+
+    assert statuses == {
+        "prefetch_fpl": "ran",
+        "fpl:2021-22": "ran",
+        "actual:2021-22": "up to date",
+        "fpl:2022-23": "up to date",
+        "actual:2022-23": "up to date",
+        "fpl:2023-24": "ran",
+        "actual:2023-24": "ran",
+        "join": "ran",
+    }
+    # The two seasons run in parallel, in either order
+    mocks["fpl_completed"].assert_has_calls(
+        [
+            mocker.call(2021, immutable=True, session=None),
+            mocker.call(2023, immutable=True, session=None),
+        ],
+        any_order=True,
+    )
+    assert mocks["fpl_completed"].call_count == 2
+    mocks["actual"].assert_called_once_with(2023)
+    mocks["gameweek"].assert_not_called()
+    # Only the seasons that are not up to date are downloaded
+    mocks["prefetch"].assert_called_once_with([2021, 2023], immutable=True)
+
+
+def test_refresh_aggregates_completed_seasons_in_executor(refresh, mocker):
+    run, mocks = refresh
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        submit = mocker.spy(executor, "submit")
+
+        statuses = run(first=2022, last=2024, executor=executor)
+
+    assert set(statuses.values()) == {"ran"}
+    # Only completed seasons go to the executor, without the session
+    assert submit.call_count == 2
+    assert mocks["fpl_completed"].call_args_list == [
+        mocker.call(2022, immutable=True),
+        mocker.call(2023, immutable=True),
+    ]
+    mocks["fpl_current"].assert_called_once()
+
+
+def test_refresh_skips_season_before_first_gameweek(refresh):
+    run, mocks = refresh
+    mocks["gameweek"].return_value = None
+    mocks["stale"].return_value = []
+
+    statuses = run()
+
+    assert statuses == {
+        "current_gameweek": "ran",
+        "fpl:2024-25": "up to date",
+        "actual:2024-25": "up to date",
+        "join": "up to date",
+        "metadata": "up to date",
+        "manifest": "ran",
+    }
+    mocks["fpl_current"].assert_not_called()
+    mocks["actual"].assert_not_called()
+    assert not os.path.exists("data/scoring_meta.json")
+
+
+def test_refresh_blocks_current_season_without_gameweek(refresh):
+    run, mocks = refresh
+    mocks["gameweek"].side_effect = ValueError("Season not started")
+
+    statuses = run(first=2023, last=2024)
+
+    assert statuses["current_gameweek"] == "failed"
+    assert statuses["fpl:2024-25"] == statuses["metadata"] == "blocked"
+    assert statuses["manifest"] == "blocked"
+    assert statuses["fpl:2023-24"] == "ran"
+
+
+def test_build_refresh_tasks_rejects_unknown_stage():
+    with pytest.raises(ValueError):
+        build_refresh_tasks(2024, 2024, 2024, {}, stages=["train"])
+
+
+def test_refresh_updates_stale_manifest(refresh):
+    run, mocks = refresh
+    save_dashboard_manifest(build_dashboard_manifest())
+    # A season joined after the manifest was saved
+    save_tables("2023-24", ["fpl_premier_league_tables_joined"])
+
+    statuses = run(stages=["manifest"])
+
+    assert statuses == {"manifest": "ran"}
+    assert load_dashboard_manifest()["seasons"] == ["2023-24"]
+
+
+def test_refresh_prefetches_completed_seasons_in_one_batch(refresh, mocker):
+    run, mocks = refresh
+    mocker.stop(mocks["prefetch"])
+    fetch_urls_to_files = mocker.patch(
+        "src.data_prep.fpl_pl_table_players.fetch_urls_to_files",
+        return_value=({}, {}),
+    )
+
+    statuses = run(first=2021, last=2024, stages=["current_gameweek", "fpl"])
+
+    assert statuses["prefetch_fpl"] == "ran"
+    fetch_urls_to_files.assert_called_once()
+    urls = fetch_urls_to_files.call_args.args[0]
+    assert len(urls) == 6
+    assert all(season in " ".join(urls) for season in ["2021-22", "2022-23", "2023-24"])
+    assert "2024-25" not in " ".join(urls)
@@ -0,0 +1,59 @@
+import pytest
+import requests
+from src.data_prep.fpl_pl_table_players import fetch_merged_gw
+from src.data_prep.reload_data import fetch_current_gameweek
+from src.tools.artifact_session import ArtifactSession
+
+
+def mock_download(mocker, tmp_path, content):
+    # Mock the cached download to return a small merged gameweek file
+    path = tmp_path / "merged_gw.csv"
+    path.write_text(content)
+    return mocker.patch(
+        "src.data_prep.fpl_pl_table_players.fetch_url_to_file", return_value=path
+    )
+
+
+def test_fetch_current_gameweek_shares_download_with_session(mocker, tmp_path):
+    fetch_url_to_file = mock_download(
+        mocker, tmp_path, "name,GW,total_points\nA,1,2\nA,2,6\n"
+    )
+    session = ArtifactSession()
+
+    current_gameweek = fetch_current_gameweek("2024-25", session=session)
+    df = fetch_merged_gw("2024-25", session=session)
+
+    # The file is downloaded once and reused by the second stage
+    assert current_gameweek == 2
+    assert list(df["total_points"]) == [2, 6]
+    assert fetch_url_to_file.call_count == 1
+
+
+def test_fetch_current_gameweek_without_session(mocker, tmp_path):
+    fetch_url_to_file = mock_download(mocker, tmp_path, "name,GW\nA,1\n")
+
+    assert fetch_current_gameweek("2024-25") == 1
+    assert fetch_current_gameweek("2024-25") == 1
+    assert fetch_url_to_file.call_count == 2
+
+
+def mock_http_error(mocker, status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return mocker.patch(
+        "src.data_prep.fpl_pl_table_players.fetch_url_to_file",
+        side_effect=requests.exceptions.HTTPError(response=response),
+    )
+
+
+def test_fetch_current_gameweek_before_first_gameweek(mocker):
+    mock_http_error(mocker, 404)
+
+    assert fetch_current_gameweek("2025-26") is None
+
+
+def test_fetch_current_gameweek_raises_other_errors(mocker):
+    mock_http_error(mocker, 503)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        fetch_current_gameweek("2025-26")
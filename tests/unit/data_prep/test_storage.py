@@ -0,0 +1,153 @@
+import runpy
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from src.data_prep.storage import list_seasons, load_table, save_table, table_path
+
+
+def make_actual_table():
+    return pd.DataFrame(
+        {"Pos": [1, 2], "Team": ["Liverpool", "Arsenal"], "Pts": [84, 89]}
+    )
+
+
+def test_save_table_round_trips_with_schema(tmp_path):
+    save_table(
+        make_actual_table(),
+        "actual_premier_league_tables",
+        "2023-24",
+        data_dir=tmp_path,
+    )
+
+    result = load_table("actual_premier_league_tables", "2023-24", data_dir=tmp_path)
+
+    assert result["Pos"].dtype == "int8"
+    assert result["Team"].dtype == "category"
+    assert list(result["Team"]) == ["Liverpool", "Arsenal"]
+    assert list(result["Pts"]) == [84, 89]
+
+
+def test_save_table_replaces_csv_unless_exported(tmp_path):
+    csv_path = table_path("actual_premier_league_tables", "2023-24", "csv", tmp_path)
+
+    save_table(
+        make_actual_table(),
+        "actual_premier_league_tables",
+        "2023-24",
+        export_csv=True,
+        data_dir=tmp_path,
+    )
+    assert pd.read_csv(csv_path).equals(make_actual_table())
+
+    save_table(
+        make_actual_table(),
+        "actual_premier_league_tables",
+        "2023-24",
+        data_dir=tmp_path,
+    )
+    assert not (tmp_path / "actual_premier_league_tables" / "2023-24.csv").exists()
+
+
+def test_load_table_falls_back_to_csv(tmp_path):
+    # Legacy player CSVs up to 2018-19 are latin-1 encoded
+    folder = tmp_path / "fpl_premier_league_player_data"
+    folder.mkdir()
+    (folder / "2017-18.csv").write_bytes(
+        "Player Name,Team,Total Points\nSergio Agüero,Man City,201\n".encode("latin-1")
+    )
+
+    result = load_table("fpl_premier_league_player_data", "2017-18", data_dir=tmp_path)
+
+    assert list(result["Player Name"]) == ["Sergio Agüero"]
+    assert result["Team"].dtype == "category"
+    assert result["Total Points"].dtype == "int16"
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "csv"])
+def test_load_table_parses_legacy_rank_differences(tmp_path, fmt):
+    # Joined tables used to store the difference as a display string
+    legacy_table = pd.DataFrame(
+        {
+            "Pos": [1, 2, 3],
+            "Team": ["A", "B", "C"],
+            "Difference": ["⬆️ +2", " ", "⬇️ -1"],
+        }
+    )
+    path = table_path("fpl_premier_league_tables_joined", "2023-24", fmt, tmp_path)
+    (tmp_path / "fpl_premier_league_tables_joined").mkdir()
+    if fmt == "parquet":
+        legacy_table.to_parquet(path, index=False)
+    else:
+        legacy_table.to_csv(path, index=False)
+
+    result = load_table(
+        "fpl_premier_league_tables_joined", "2023-24", data_dir=tmp_path
+    )
+
+    assert result["Difference"].dtype == "int8"
+    assert list(result["Difference"]) == [2, 0, -1]
+
+
+def test_load_table_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_table("actual_premier_league_tables", "2015-16", data_dir=tmp_path)
+
+
+def test_list_seasons(tmp_path):
+    folder = tmp_path / "fpl_premier_league_tables"
+    folder.mkdir()
+    for file_name in ["2022-23.csv", "2023-24.parquet", "2023-24.csv", ".gitkeep"]:
+        (folder / file_name).touch()
+
+    assert sorted(list_seasons("fpl_premier_league_tables", data_dir=tmp_path)) == [
+        "2022-23",
+        "2023-24",
+    ]
+
+
+def test_list_seasons_missing_table(tmp_path):
+    assert list_seasons("fpl_team_history", data_dir=tmp_path) == []
+
+
+def test_migrate_storage_skips_tables_not_saved(tmp_path, monkeypatch):
+    # Only one table is saved, as CSV, and the other table folders are missing
+    monkeypatch.chdir(tmp_path)
+    save_table(make_actual_table(), "actual_premier_league_tables", "2023-24", "csv")
+    monkeypatch.setattr(sys, "argv", ["migrate_storage.py"])
+
+    runpy.run_path(
+        str(Path(__file__).parents[3] / "scripts/python/migrate_storage.py"),
+        run_name="__main__",
+    )
+
+    assert list((tmp_path / "data/actual_premier_league_tables").iterdir()) == [
+        tmp_path / "data/actual_premier_league_tables/2023-24.parquet"
+    ]
+
+
+def test_migrate_storage_drops_all_teams_copies(tmp_path, monkeypatch):
+    # A legacy player file, with a copy of each player under "All Teams"
+    monkeypatch.chdir(tmp_path)
+    players = pd.DataFrame(
+        {
+            "Player Name": ["Bukayo Saka", "Cole Palmer"],
+            "Team": ["Arsenal", "Chelsea"],
+            "Position": ["MID", "MID"],
+            "Total Points": [183, 244],
+        }
+    )
+    legacy = pd.concat([players, players.assign(Team="All Teams")])
+    save_table(legacy, "fpl_premier_league_player_data", "2023-24", "csv")
+    monkeypatch.setattr(sys, "argv", ["migrate_storage.py"])
+
+    runpy.run_path(
+        str(Path(__file__).parents[3] / "scripts/python/migrate_storage.py"),
+        run_name="__main__",
+    )
+
+    assert (tmp_path / "data/fpl_premier_league_player_data/2023-24.parquet").exists()
+    migrated = load_table("fpl_premier_league_player_data", "2023-24")
+    assert list(migrated["Team"]) == ["Arsenal", "Chelsea"]
+    assert list(migrated["Total Points"]) == [183, 244]
@@ -0,0 +1,28 @@
+from src.tools.artifact_session import ArtifactSession
+
+
+def test_get_or_create_calls_factory_once():
+    session = ArtifactSession()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return {"GW": 7}
+
+    first = session.get_or_create("merged_gw", factory)
+    second = session.get_or_create("merged_gw", factory)
+
+    assert first is second
+    assert len(calls) == 1
+    assert "merged_gw" in session
+    assert len(session) == 1
+
+
+def test_get_or_create_keeps_keys_separate():
+    session = ArtifactSession()
+
+    session.get_or_create("a", lambda: 1)
+    result = session.get_or_create("b", lambda: 2)
+
+    assert result == 2
+    assert len(session) == 2
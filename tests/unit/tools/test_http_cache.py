@@ -0,0 +1,311 @@
+import hashlib
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from src.tools.http_cache import (
+    fetch_url,
+    fetch_url_to_file,
+    fetch_urls_to_files,
+    hold_cached_files,
+    load_index,
+)
+from src.tools.profiling import Profiler
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Shared across requests: path -> body, plus a log of (path, status) served
+    files = {}
+    served = []
+    # path -> (arrived, release) events, to hold a request until released
+    gates = {}
+
+    def do_GET(self):
+        if self.path in self.gates:
+            arrived, release = self.gates[self.path]
+            arrived.set()
+            release.wait(5)
+        body = self.files.get(self.path)
+        if body is None:
+            self.served.append((self.path, 404))
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.served.append((self.path, 304))
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.served.append((self.path, 200))
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubHandler.files = {}
+    StubHandler.served = []
+    StubHandler.gates = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", StubHandler
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_url_revalidates_with_etag(stub_server, tmp_path):
+    base_url, handler = stub_server
+    handler.files["/merged_gw.csv"] = b"name,GW\nA,1\n"
+
+    first = fetch_url(f"{base_url}/merged_gw.csv", cache_dir=tmp_path)
+    second = fetch_url(f"{base_url}/merged_gw.csv", cache_dir=tmp_path)
+
+    assert first == second == b"name,GW\nA,1\n"
+    assert handler.served == [("/merged_gw.csv", 200), ("/merged_gw.csv", 304)]
+
+
+def test_fetch_url_downloads_changed_content(stub_server, tmp_path):
+    base_url, handler = stub_server
+    handler.files["/merged_gw.csv"] = b"name,GW\nA,1\n"
+    fetch_url(f"{base_url}/merged_gw.csv", cache_dir=tmp_path)
+
+    handler.files["/merged_gw.csv"] = b"name,GW\nA,1\nA,2\n"
+    result = fetch_url(f"{base_url}/merged_gw.csv", cache_dir=tmp_path)
+
+    assert result == b"name,GW\nA,1\nA,2\n"
+    assert handler.served[-1] == ("/merged_gw.csv", 200)
+
+
+def test_fetch_url_records_spans(stub_server, tmp_path):
+    base_url, handler = stub_server
+    handler.files["/merged_gw.csv"] = b"name,GW\nA,1\n"
+    profiler = Profiler()
+
+    with profiler.activate():
+        fetch_url(f"{base_url}/merged_gw.csv", cache_dir=tmp_path)
+        fetch_url(f"{base_url}/merged_gw.csv", cache_dir=tmp_path)
+        fetch_url(f"{base_url}/merged_gw.csv", cache_dir=tmp_path, immutable=True)
+
+    assert [
+        (span.attributes["status"], span.bytes_downloaded) for span in profiler.spans
+    ] == [("downloaded", 12), ("not modified", 0), ("cached", 0)]
+
+
+def test_fetch_url_immutable_skips_network(stub_server, tmp_path):
+    base_url, handler = stub_server
+    handler.files["/players_raw.csv"] = b"id,team\n1,2\n"
+
+    fetch_url(f"{base_url}/players_raw.csv", cache_dir=tmp_path, immutable=True)
+    result = fetch_url(f"{base_url}/players_raw.csv", cache_dir=tmp_path)
+
+    assert result == b"id,team\n1,2\n"
+    assert handler.served == [("/players_raw.csv", 200)]
+
+
+def test_fetch_url_evicts_least_recently_used(stub_server, tmp_path):
+    base_url, handler = stub_server
+    handler.files["/pinned.csv"] = b"p" * 40
+    handler.files["/old.csv"] = b"o" * 40
+    handler.files["/new.csv"] = b"n" * 40
+
+    fetch_url(f"{base_url}/pinned.csv", cache_dir=tmp_path, immutable=True)
+    fetch_url(f"{base_url}/old.csv", cache_dir=tmp_path, max_bytes=100)
+    fetch_url(f"{base_url}/new.csv", cache_dir=tmp_path, max_bytes=100)
+
+    index = load_index(tmp_path)
+    assert set(index) == {f"{base_url}/pinned.csv", f"{base_url}/new.csv"}
+
+
+def blob_files(cache_dir):
+    return [
+        name
+        for _, _, names in os.walk(os.path.join(cache_dir, "blobs"))
+        for name in names
+        if not name.endswith(".tmp")
+    ]
+
+
+def test_changed_content_replaces_old_blob(stub_server, tmp_path):
+    base_url, handler = stub_server
+    url = f"{base_url}/merged_gw.csv"
+
+    for gameweek in range(1, 6):
+        handler.files["/merged_gw.csv"] = f"name,GW\nA,{gameweek}\n".encode()
+        fetch_url(url, cache_dir=tmp_path)
+
+    assert blob_files(tmp_path) == [load_index(tmp_path)[url]["digest"]]
+
+
+def test_old_blob_in_use_is_deleted_later(stub_server, tmp_path):
+    base_url, handler = stub_server
+    url = f"{base_url}/merged_gw.csv"
+    handler.files["/merged_gw.csv"] = b"name,GW\nA,1\n"
+
+    with hold_cached_files():
+        path = fetch_url_to_file(url, cache_dir=tmp_path)
+        handler.files["/merged_gw.csv"] = b"name,GW\nA,2\n"
+        fetch_url(url, cache_dir=tmp_path)
+        with open(path, "rb") as file:
+            assert file.read() == b"name,GW\nA,1\n"
+
+    fetch_url(url, cache_dir=tmp_path)
+    assert not os.path.exists(path)
+    assert len(blob_files(tmp_path)) == 1
+
+
+def test_eviction_skips_fetch_in_flight(stub_server, tmp_path):
+    base_url, handler = stub_server
+    handler.files["/old.csv"] = b"o" * 40
+    handler.files["/new.csv"] = b"n" * 40
+    fetch_url(f"{base_url}/old.csv", cache_dir=tmp_path)
+
+    # Revalidate the old entry in another thread, and fetch a new file while
+    # its request is in flight. The new file alone fills the cache.
+    arrived, release = threading.Event(), threading.Event()
+    handler.gates["/old.csv"] = (arrived, release)
+    result = {}
+    thread = threading.Thread(
+        target=lambda: result.update(
+            old=fetch_url(f"{base_url}/old.csv", cache_dir=tmp_path, max_bytes=60)
+        )
+    )
+    thread.start()
+    arrived.wait(5)
+    new = fetch_url(f"{base_url}/new.csv", cache_dir=tmp_path, max_bytes=60)
+    release.set()
+    thread.join()
+
+    assert new == b"n" * 40
+    assert result["old"] == b"o" * 40
+
+
+def test_hold_cached_files_defers_eviction(stub_server, tmp_path):
+    base_url, handler = stub_server
+    handler.files["/old.csv"] = b"o" * 40
+    handler.files["/new.csv"] = b"n" * 40
+
+    with hold_cached_files():
+        path = fetch_url_to_file(f"{base_url}/old.csv", cache_dir=tmp_path)
+        thread = threading.Thread(
+            target=fetch_url,
+            args=(f"{base_url}/new.csv",),
+            kwargs={"cache_dir": tmp_path, "max_bytes": 60},
+        )
+        thread.start()
+        thread.join()
+
+        with open(path, "rb") as file:
+            assert file.read() == b"o" * 40
+
+    # The first fetch after the block evicts the held file
+    fetch_url(f"{base_url}/new.csv", cache_dir=tmp_path, max_bytes=60)
+    assert set(load_index(tmp_path)) == {f"{base_url}/new.csv"}
+
+
+def test_fetch_from_several_processes(stub_server, tmp_path):
+    base_url, handler = stub_server
+    handler.files["/2022-23/merged_gw.csv"] = b"name,GW\nA,1\n"
+    handler.files["/master_team_list.csv"] = b"team,season\n1,2024-25\n"
+    fetch_url(f"{base_url}/2022-23/merged_gw.csv", cache_dir=tmp_path, immutable=True)
+
+    # Spawned workers share the cache, with cached immutable hits and
+    # revalidations of a mutable file interleaved
+    urls = [f"{base_url}/2022-23/merged_gw.csv", f"{base_url}/master_team_list.csv"]
+    with ProcessPoolExecutor(
+        max_workers=4, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        paths = list(
+            pool.map(
+                partial(fetch_url_to_file, cache_dir=str(tmp_path), immutable=False),
+                urls * 100,
+                chunksize=1,
+            )
+        )
+
+    assert all(os.path.exists(path) for path in paths)
+    assert set(load_index(tmp_path)) == set(urls)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_eviction_skips_files_held_by_another_process(stub_server, tmp_path):
+    base_url, handler = stub_server
+    handler.files["/old.csv"] = b"o" * 40
+    handler.files["/new.csv"] = b"n" * 40
+
+    # Another process fetches a file and holds it until told to exit
+    script = (
+        "import sys\n"
+        "from src.tools.http_cache import fetch_url_to_file, hold_cached_files\n"
+        "with hold_cached_files():\n"
+        f"    print(fetch_url_to_file({base_url + '/old.csv'!r}, "
+        f"cache_dir={str(tmp_path)!r}), flush=True)\n"
+        "    sys.stdin.readline()\n"
+    )
+    holder = subprocess.Popen(
+        [sys.executable, "-c", script],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+        cwd=os.path.dirname(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        ),
+    )
+    try:
+        path = holder.stdout.readline().strip()
+        fetch_url(f"{base_url}/new.csv", cache_dir=tmp_path, max_bytes=60)
+        assert os.path.exists(path)
+        assert f"{base_url}/old.csv" in load_index(tmp_path)
+    finally:
+        holder.communicate("\n", timeout=30)
+
+    # Once released, the next fetch evicts it
+    fetch_url(f"{base_url}/new.csv", cache_dir=tmp_path, max_bytes=60)
+    assert not os.path.exists(path)
+    assert set(load_index(tmp_path)) == {f"{base_url}/new.csv"}
+
+
+def test_fetch_url_raises_on_http_error(stub_server, tmp_path):
+    base_url, _ = stub_server
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        fetch_url(f"{base_url}/missing.csv", cache_dir=tmp_path)
+
+    assert load_index(tmp_path) == {}
+
+
+def test_fetch_urls_to_files_fetches_batch(stub_server, tmp_path):
+    base_url, handler = stub_server
+    handler.files["/2023-24/merged_gw.csv"] = b"name,GW\nA,1\n"
+    handler.files["/2023-24/players_raw.csv"] = b"id,team\n1,2\n"
+    urls = [
+        f"{base_url}/2023-24/merged_gw.csv",
+        f"{base_url}/2023-24/players_raw.csv",
+        f"{base_url}/2024-25/merged_gw.csv",
+    ]
+
+    paths, errors = fetch_urls_to_files(urls, cache_dir=tmp_path, immutable=True)
+
+    with open(paths[urls[1]], "rb") as file:
+        assert file.read() == b"id,team\n1,2\n"
+    assert set(paths) == set(urls[:2])
+    assert isinstance(errors[urls[2]], requests.exceptions.HTTPError)
+    assert set(load_index(tmp_path)) == set(urls[:2])
@@ -0,0 +1,178 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from src.tools.http_client import HttpClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep connections alive, so connection reuse can be observed
+    protocol_version = "HTTP/1.1"
+
+    # Shared across requests: path -> list of statuses to serve in turn (the
+    # last is repeated), plus a log of (path, client port) and in-flight counts
+    statuses = {}
+    requests = []
+    delay = 0
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.requests.append((self.path, self.client_address[1]))
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            statuses = cls.statuses.get(self.path, [200])
+            status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+        time.sleep(cls.delay)
+
+        body = self.path.encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with cls.lock:
+            cls.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubHandler.statuses = {}
+    StubHandler.requests = []
+    StubHandler.delay = 0
+    StubHandler.in_flight = 0
+    StubHandler.max_in_flight = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+    )
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", StubHandler
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_reuses_connections(stub_server):
+    base_url, handler = stub_server
+    client = HttpClient()
+
+    for _ in range(3):
+        assert client.get(f"{base_url}/merged_gw.csv").content == b"/merged_gw.csv"
+
+    client_ports = {port for _, port in handler.requests}
+    assert len(handler.requests) == 3
+    assert len(client_ports) == 1
+
+
+def test_get_retries_server_errors(stub_server):
+    base_url, handler = stub_server
+    handler.statuses["/players_raw.csv"] = [503, 500, 200]
+    client = HttpClient(backoff=0)
+
+    response = client.get(f"{base_url}/players_raw.csv")
+
+    assert response.status_code == 200
+    assert len(handler.requests) == 3
+
+
+def test_get_returns_last_response_after_retries(stub_server):
+    base_url, handler = stub_server
+    handler.statuses["/players_raw.csv"] = [503]
+    client = HttpClient(retries=2, backoff=0)
+
+    response = client.get(f"{base_url}/players_raw.csv")
+
+    assert response.status_code == 503
+    assert len(handler.requests) == 3
+
+
+def test_get_does_not_retry_client_errors(stub_server):
+    base_url, handler = stub_server
+    handler.statuses["/missing.csv"] = [404]
+    client = HttpClient(backoff=0)
+
+    assert client.get(f"{base_url}/missing.csv").status_code == 404
+    assert len(handler.requests) == 1
+
+
+def test_fetch_all_applies_host_limit(stub_server):
+    base_url, handler = stub_server
+    handler.delay = 0.1
+    client = HttpClient(host_limit=2)
+    urls = [f"{base_url}/{season}/merged_gw.csv" for season in range(6)]
+
+    results, errors = client.fetch_all(urls)
+
+    assert errors == {}
+    assert [results[url].content for url in urls] == [
+        f"/{season}/merged_gw.csv".encode() for season in range(6)
+    ]
+    assert handler.max_in_flight == 2
+
+
+def test_fetch_all_reports_errors(stub_server):
+    base_url, handler = stub_server
+    handler.statuses["/missing.csv"] = [404]
+    client = HttpClient()
+
+    def fetch(url):
+        response = client.get(url)
+        response.raise_for_status()
+        return response.content
+
+    results, errors = client.fetch_all(
+        [f"{base_url}/merged_gw.csv", f"{base_url}/missing.csv"], fetch=fetch
+    )
+
+    assert results == {f"{base_url}/merged_gw.csv": b"/merged_gw.csv"}
+    assert isinstance(errors[f"{base_url}/missing.csv"], requests.HTTPError)
+
+
+class FlakyTransport:
+    # Fails to connect a given number of times, then returns a stub response
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = []
+
+    def send(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        if len(self.calls) <= self.failures:
+            raise requests.exceptions.ConnectionError("connection refused")
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"ok"
+        return response
+
+    def close(self):
+        pass
+
+
+def test_transport_is_pluggable():
+    transport = FlakyTransport(failures=2)
+    client = HttpClient(transport=transport, backoff=0, timeout=5)
+
+    response = client.get("https://example.com/data.csv", params={"season": 1})
+
+    assert response.content == b"ok"
+    assert len(transport.calls) == 3
+    assert transport.calls[-1] == (
+        "GET",
+        "https://example.com/data.csv",
+        {"params": {"season": 1}, "headers": None, "timeout": 5},
+    )
+
+
+def test_connection_errors_are_raised_after_retries():
+    transport = FlakyTransport(failures=10)
+    client = HttpClient(transport=transport, retries=1, backoff=0)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get("https://example.com/data.csv")
+    assert len(transport.calls) == 2
@@ -0,0 +1,142 @@
+import json
+import multiprocessing
+import pstats
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from src.tools.profiling import (
+    Profiler,
+    memory_report,
+    merge_worker_span,
+    run_profiled,
+    span,
+    worker_profile_settings,
+)
+
+
+def test_span_is_no_op_without_profiler():
+    with span("stage") as recorded:
+        recorded.add(rows=10)
+        recorded.set(status="cached")
+
+
+def run_worker(i):
+    with span(f"worker_{i}") as worker:
+        worker.add(rows=i)
+
+
+def test_profiler_records_span_tree(tmp_path):
+    profiler = Profiler()
+
+    with profiler.activate():
+        with span("refresh", season="2024-25") as refresh:
+            refresh.add(rows=5)
+            with span("http_fetch", url="https://example.com") as fetch:
+                fetch.add(bytes_downloaded=100)
+                fetch.add(bytes_downloaded=50)
+
+            # Spans opened in worker threads attach to the open span
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                list(pool.map(run_worker, range(2)))
+    profiler.save_report(tmp_path / "report.json")
+
+    report = json.loads((tmp_path / "report.json").read_text())
+    (refresh_span,) = report["spans"]
+    assert refresh_span["name"] == "refresh"
+    assert refresh_span["attributes"] == {"season": "2024-25"}
+    assert refresh_span["rows"] == 5
+    assert refresh_span["seconds"] >= 0
+    assert refresh_span["peak_bytes"] is None
+    assert refresh_span["children"][0]["bytes_downloaded"] == 150
+    assert sorted(child["name"] for child in refresh_span["children"][1:]) == [
+        "worker_0",
+        "worker_1",
+    ]
+    assert "refresh" in profiler.format_report()
+
+
+def test_profiler_traces_peak_memory():
+    profiler = Profiler(trace_memory=True)
+
+    with profiler.activate():
+        with span("outer") as outer:
+            with span("allocate") as inner:
+                data = bytearray(4 * 1024 * 1024)
+                del data
+            with span("small") as small:
+                pass
+
+    assert inner.peak_bytes >= 4 * 1024 * 1024
+    assert small.peak_bytes < 4 * 1024 * 1024
+    assert outer.peak_bytes >= inner.peak_bytes
+
+
+def test_profiler_dumps_cprofile_of_stage(tmp_path):
+    profiler = Profiler(profile_stages=["join"], profile_dir=tmp_path)
+
+    with profiler.activate():
+        with span("join") as join:
+            sum(range(1000))
+        with span("other") as other:
+            pass
+
+    assert join.attributes["profile"] == str(tmp_path / "join.prof")
+    assert (tmp_path / "join.prof").exists()
+    assert "profile" not in other.attributes
+
+
+def test_memory_report_records_frames_on_open_span():
+    frames = {
+        "names": pd.DataFrame({"name": [f"Player {i}" for i in range(100)]}),
+        "teams": pd.DataFrame({"team": pd.Categorical(["Arsenal"] * 100)}),
+    }
+    assert memory_report(frames) == {}
+
+    profiler = Profiler()
+    with profiler.activate():
+        with span("stage") as stage:
+            report = memory_report(frames)
+
+    assert report["names"] > report["teams"]
+    assert report["names"] == frames["names"].memory_usage(deep=True).sum()
+    assert stage.frames["teams"] == {"rows": 100, "bytes": report["teams"]}
+    assert profiler.to_dict()["spans"][0]["frames"]["names"]["rows"] == 100
+    assert "stage:names" in profiler.format_report()
+
+
+def run_worker_stage():
+    with span("aggregate", season="2019-20") as aggregate:
+        aggregate.add(rows=7)
+        memory_report({"summary_df": pd.DataFrame({"points": range(3)})})
+    return "done"
+
+
+def test_worker_process_spans_merge_into_open_span(tmp_path):
+    profiler = Profiler(
+        trace_memory=True, profile_stages=["fpl:2019-20"], profile_dir=str(tmp_path)
+    )
+    context = multiprocessing.get_context("spawn")
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        with profiler.activate():
+            with span("fpl:2019-20") as task:
+                result, recorded = executor.submit(
+                    run_profiled, run_worker_stage, worker_profile_settings()
+                ).result()
+                merge_worker_span(recorded)
+
+    assert result == "done"
+    (aggregate,) = task.children
+    assert aggregate.name == "aggregate"
+    assert aggregate.attributes == {"season": "2019-20"}
+    assert aggregate.rows == 7
+    assert aggregate.frames["summary_df"]["rows"] == 3
+    assert aggregate.peak_bytes > 0
+    assert task.peak_bytes >= aggregate.peak_bytes
+
+    # The task's cProfile is the worker's, not the parent's wait for it
+    profile_path = tmp_path / "fpl:2019-20.prof"
+    assert task.attributes["profile"] == str(profile_path)
+    functions = [key[2] for key in pstats.Stats(str(profile_path)).stats]
+    assert "run_worker_stage" in functions
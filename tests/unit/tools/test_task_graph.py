@@ -0,0 +1,108 @@
+import os
+import threading
+
+import pytest
+from src.tools.task_graph import Task, run_task_graph, topological_order
+
+
+def test_run_task_graph_runs_dependencies_first():
+    order = []
+    tasks = [
+        Task("join", lambda: order.append("join"), deps=["fpl", "actual"]),
+        Task("fpl", lambda: order.append("fpl")),
+        Task("actual", lambda: order.append("actual"), deps=["fpl"]),
+    ]
+
+    statuses, errors = run_task_graph(tasks)
+
+    assert order == ["fpl", "actual", "join"]
+    assert statuses == {"fpl": "ran", "actual": "ran", "join": "ran"}
+    assert errors == {}
+
+
+def test_run_task_graph_runs_independent_tasks_concurrently():
+    # Each task waits for the other, so they only finish if run at once
+    barrier = threading.Barrier(2, timeout=5)
+    tasks = [Task("fpl", barrier.wait), Task("actual", barrier.wait)]
+
+    statuses, _ = run_task_graph(tasks, jobs=2)
+
+    assert statuses == {"fpl": "ran", "actual": "ran"}
+
+
+def test_run_task_graph_blocks_dependents_of_failed_task():
+    def fail():
+        raise ValueError("Season not found")
+
+    ran = []
+    tasks = [
+        Task("fpl", fail),
+        Task("actual", lambda: ran.append("actual")),
+        Task("join", lambda: ran.append("join"), deps=["fpl", "actual"]),
+        Task("metadata", lambda: ran.append("metadata"), deps=["join"]),
+    ]
+
+    statuses, errors = run_task_graph(tasks, jobs=2)
+
+    assert statuses == {
+        "fpl": "failed",
+        "actual": "ran",
+        "join": "blocked",
+        "metadata": "blocked",
+    }
+    assert list(errors) == ["fpl"]
+    assert ran == ["actual"]
+
+
+def test_run_task_graph_skips_up_to_date_tasks():
+    ran = []
+    tasks = [
+        Task("fpl", lambda: ran.append("fpl"), is_up_to_date=lambda: True),
+        Task("join", lambda: ran.append("join"), deps=["fpl"]),
+    ]
+
+    statuses, _ = run_task_graph(tasks)
+    forced_statuses, _ = run_task_graph(tasks, force=True)
+
+    assert statuses == {"fpl": "up to date", "join": "ran"}
+    assert forced_statuses == {"fpl": "ran", "join": "ran"}
+    assert ran == ["join", "fpl", "join"]
+
+
+def test_task_is_up_to_date_compares_file_times(tmp_path):
+    source, output = tmp_path / "source.csv", tmp_path / "output.csv"
+    task = Task("join", lambda: None, inputs=[source], outputs=[output])
+    source.write_text("a")
+
+    assert not task.is_up_to_date()
+
+    output.write_text("b")
+    os.utime(source, (1000, 1000))
+    os.utime(output, (2000, 2000))
+    assert task.is_up_to_date()
+
+    os.utime(source, (3000, 3000))
+    assert not task.is_up_to_date()
+
+
+def test_run_task_graph_dry_run_does_not_run_tasks():
+    ran = []
+    tasks = [
+        Task("fpl", lambda: ran.append("fpl"), is_up_to_date=lambda: True),
+        Task("join", lambda: ran.append("join"), deps=["fpl"]),
+    ]
+
+    statuses, _ = run_task_graph(tasks, dry_run=True)
+
+    assert statuses == {"fpl": "up to date", "join": "would run"}
+    assert ran == []
+
+
+def test_topological_order_ignores_tasks_outside_graph_and_detects_cycles():
+    join = Task("join", lambda: None, deps=["fpl:2024-25"])
+    assert topological_order([join]) == [join]
+
+    with pytest.raises(ValueError, match="cycle"):
+        topological_order(
+            [Task("a", lambda: None, deps=["b"]), Task("b", lambda: None, deps=["a"])]
+        )